@@ -1,73 +1,28 @@
+import time
+# Taken before the other imports, so the time to the first prompt includes them
+STARTED: float = time.perf_counter()
 import logging
-from ressources.main_functions import check_and_initialize_db, create_new_driver, add_results, mark_round_done, calculate_drivers_rankings, calculate_constructors_rankings,calculate_drivers_h2h_quali, calculate_drivers_h2h_sprint_quali, calculate_drivers_h2h_race, calculate_drivers_h2h_sprint
-from ressources.data_entry import get_driver_trigramme, get_driver_car_number, get_round_number, get_session_type
-from ressources.constants import LOG_FILE, LOG_FORMAT, DATABASE_FILE
+import sys
+from typing import Dict
+from ressources.main_functions import check_and_initialize_db, create_new_driver, add_results, mark_round_done, calculate_drivers_rankings, calculate_constructors_rankings, refresh_season_store,calculate_drivers_h2h_quali, calculate_drivers_h2h_sprint_quali, calculate_drivers_h2h_race, calculate_drivers_h2h_sprint, import_season, correct_results, calculate_drivers_h2h_matrix, calculate_championship_outlook, simulate_title_probabilities, get_title_probabilities_trend, get_championship_labels
+from ressources.data_entry import get_driver_trigramme, get_driver_car_number, get_round_number, get_session_type, get_session_family
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.logging_setup import configure_logging
+from ressources.cli import build_parser, run_cli
+from ressources.instrumentation import profile_action, format_action_report, format_functions_report
+from ressources.classes.Profiler import PROFILER
+from ressources.constants import DATABASE_FILE, MENU_PROMPT
 
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format=LOG_FORMAT)
 
-def main():
-    sql_connection = check_and_initialize_db(DATABASE_FILE)
-    logger.info("Program ready to run")
-    '''
-    # Importing previous results
-    print(f'Importing results for round 01')
-    add_results("ROUND 1 - Q1.csv",1,"Q1",sql_connection)
-    add_results("ROUND 1 - Q2.csv",1,"Q2",sql_connection)
-    add_results("ROUND 1 - Q3.csv",1,"Q3",sql_connection)
-    add_results("ROUND 1 - Race.csv",1,"Race",sql_connection)
-    mark_round_done(sql_connection,1)
-    print(f'Calculating Drivers Rankings after round 01')
-    calculate_drivers_rankings(sql_connection,1)
-    print(f'Calculating Constructors Rankings after round 01')
-    calculate_constructors_rankings(sql_connection,1)
-    print(f'Importing results for round 02')
-    add_results("ROUND 2 - SQ1.csv",2,"SQ1",sql_connection)
-    add_results("ROUND 2 - SQ2.csv",2,"SQ2",sql_connection)
-    add_results("ROUND 2 - SQ3.csv",2,"SQ3",sql_connection)
-    add_results("ROUND 2 - Sprint.csv",2,"Sprint",sql_connection)
-    add_results("ROUND 2 - Q1.csv",2,"Q1",sql_connection)
-    add_results("ROUND 2 - Q2.csv",2,"Q2",sql_connection)
-    add_results("ROUND 2 - Q3.csv",2,"Q3",sql_connection)
-    add_results("ROUND 2 - Race.csv",2,"Race",sql_connection)
-    mark_round_done(sql_connection,2)
-    print(f'Calculating Drivers Rankings after round 02')
-    calculate_drivers_rankings(sql_connection,2)
-    print(f'Calculating Constructors Rankings after round 02')
-    calculate_constructors_rankings(sql_connection,2)
-    print(f'Importing results for round 03')
-    add_results("ROUND 3 - Q1.csv",3,"Q1",sql_connection)
-    add_results("ROUND 3 - Q2.csv",3,"Q2",sql_connection)
-    add_results("ROUND 3 - Q3.csv",3,"Q3",sql_connection)
-    add_results("ROUND 3 - Race.csv",3,"Race",sql_connection)
-    mark_round_done(sql_connection,3)
-    print(f'Calculating Drivers Rankings after round 03')
-    calculate_drivers_rankings(sql_connection,3)
-    print(f'Calculating Constructors Rankings after round 03')
-    calculate_constructors_rankings(sql_connection,3)
-    print(f'Importing results for round 04')
-    add_results("ROUND 4 - Q1.csv",4,"Q1",sql_connection)
-    add_results("ROUND 4 - Q2.csv",4,"Q2",sql_connection)
-    add_results("ROUND 4 - Q3.csv",4,"Q3",sql_connection)
-    add_results("ROUND 4 - Race.csv",4,"Race",sql_connection)
-    mark_round_done(sql_connection,4)
-    print(f'Calculating Drivers Rankings after round 04')
-    calculate_drivers_rankings(sql_connection,4)
-    print(f'Calculating Constructors Rankings after round 04')
-    calculate_constructors_rankings(sql_connection,4)
-    print(f'Importing results for round 05')
-    add_results("ROUND 5 - Q1.csv",5,"Q1",sql_connection)
-    add_results("ROUND 5 - Q2.csv",5,"Q2",sql_connection)
-    add_results("ROUND 5 - Q3.csv",5,"Q3",sql_connection)
-    add_results("ROUND 5 - Race.csv",5,"Race",sql_connection)
-    mark_round_done(sql_connection,5)
-    print(f'Calculating Drivers Rankings after round 05')
-    calculate_drivers_rankings(sql_connection,5)
-    print(f'Calculating Constructors Rankings after round 05')
-    calculate_constructors_rankings(sql_connection,5)
-    print('Pre-imports done')
-    '''
+def main(profile:bool=False,database:str=DATABASE_FILE):
+    PROFILER.enabled = profile
+    with profile_action("startup"):
+        sql_connection = check_and_initialize_db(database)
+    logger.info("Program ready to run in %.1f ms",(time.perf_counter() - STARTED)*1000,extra={'summary': True})
+    # Importing previous results: rebuilds the whole season from the files in RESULTS_FOLDER
+    # import_season(sql_connection)
     
     while True:
         print(f"\n### Welcome to F1 Stats ###")
@@ -77,52 +32,103 @@ def main():
         print(f"4. Get Drivers Head to Head in Sprint Qualification")
         print(f"5. Get Drivers Head to Head in Races")
         print(f"6. Get Drivers Head to Head in Sprints")
+        print(f"7. Import full season from results folder")
+        print(f"8. Correct result for a session via CSV")
+        print(f"9. Get Head to Head matrix for all drivers")
+        print(f"10. Get championship outlook (clinched and eliminated rounds)")
+        print(f"11. Simulate title probabilities after a round")
         print(f"0. Exit")
-        choice = int(input('Enter your choice (1 - 0):'))
-        if choice == 1:
-            logger.info("Option chosen: new driver")
-            driver_name: str = input("Driver name: ")
-            driver_trigramme: str = get_driver_trigramme()
-            driver_car_number: int = get_driver_car_number()
-            driver_nationality: str = input("Driver nationality: ")
-            driver = create_new_driver(driver_name,driver_trigramme,driver_car_number,driver_nationality,sql_connection)
-            print(f"=== Succesfully created driver {driver.name} with car number {driver.car_number} ===")
-        elif choice == 2:
-            logger.info("Option chosen: add session result")
-            round_number: int = get_round_number()
-            session_type: str = get_session_type()
-            filename: str = input("Filename: ")
-            add_results(filename,round_number,session_type,sql_connection)
-            if session_type == 'Race':
-                mark_round_done(sql_connection,round_number)
-                calculate_drivers_rankings(sql_connection,round_number)
-                calculate_constructors_rankings(sql_connection,round_number)
-            print("=== Succesfully imported session result ===")
-        elif choice == 3:
-            logger.info("Option chosen: Drivers Head to Head in Qualification")
-            driver1: str = get_driver_trigramme()
-            driver2: str = get_driver_trigramme()
-            calculate_drivers_h2h_quali(sql_connection,driver1,driver2)
-        elif choice == 4:
-            logger.info("Option chosen: Drivers Head to Head in Sprint Qualification")
-            driver1: str = get_driver_trigramme()
-            driver2: str = get_driver_trigramme()
-            calculate_drivers_h2h_sprint_quali(sql_connection,driver1,driver2)
-        elif choice == 5:
-            logger.info("Option chosen: Drivers Head to Head in Races")
-            driver1: str = get_driver_trigramme()
-            driver2: str = get_driver_trigramme()
-            calculate_drivers_h2h_race(sql_connection,driver1,driver2)
-        elif choice == 6:
-            logger.info("Option chosen: Drivers Head to Head in Sprints")
-            driver1: str = get_driver_trigramme()
-            driver2: str = get_driver_trigramme()
-            calculate_drivers_h2h_sprint(sql_connection,driver1,driver2)
-        elif choice == 0:
-            print("Exiting...")
-            break
-        else:
-            print("Invalid choice. Enter options 1 - 0")
+        choice = int(input(MENU_PROMPT))
+        with profile_action(f"option {choice}") as action:
+            if choice == 1:
+                logger.info("Option chosen: new driver")
+                driver_name: str = input("Driver name: ")
+                driver_trigramme: str = get_driver_trigramme()
+                driver_car_number: int = get_driver_car_number()
+                driver_nationality: str = input("Driver nationality: ")
+                driver = create_new_driver(driver_name,driver_trigramme,driver_car_number,driver_nationality,sql_connection)
+                print(f"=== Succesfully created driver {driver.name} with car number {driver.car_number} ===")
+            elif choice == 2:
+                logger.info("Option chosen: add session result")
+                round_number: int = get_round_number()
+                session_type: str = get_session_type()
+                filename: str = input("Filename: ")
+                if not add_results(filename,round_number,session_type,sql_connection):
+                    print("=== Session already stored, nothing imported: use option 8 to correct it ===")
+                else:
+                    if session_type == 'Race':
+                        mark_round_done(sql_connection,round_number)
+                        calculate_drivers_rankings(sql_connection,round_number)
+                        calculate_constructors_rankings(sql_connection,round_number)
+                        refresh_season_store(sql_connection,round_number)
+                    print("=== Succesfully imported session result ===")
+            elif choice == 3:
+                logger.info("Option chosen: Drivers Head to Head in Qualification")
+                driver1: str = get_driver_trigramme()
+                driver2: str = get_driver_trigramme()
+                calculate_drivers_h2h_quali(sql_connection,driver1,driver2)
+            elif choice == 4:
+                logger.info("Option chosen: Drivers Head to Head in Sprint Qualification")
+                driver1: str = get_driver_trigramme()
+                driver2: str = get_driver_trigramme()
+                calculate_drivers_h2h_sprint_quali(sql_connection,driver1,driver2)
+            elif choice == 5:
+                logger.info("Option chosen: Drivers Head to Head in Races")
+                driver1: str = get_driver_trigramme()
+                driver2: str = get_driver_trigramme()
+                calculate_drivers_h2h_race(sql_connection,driver1,driver2)
+            elif choice == 6:
+                logger.info("Option chosen: Drivers Head to Head in Sprints")
+                driver1: str = get_driver_trigramme()
+                driver2: str = get_driver_trigramme()
+                calculate_drivers_h2h_sprint(sql_connection,driver1,driver2)
+            elif choice == 7:
+                logger.info("Option chosen: Import full season from results folder")
+                imported_rounds: list[int] = import_season(sql_connection)
+                print(f"=== Succesfully imported {len(imported_rounds)} rounds ===")
+            elif choice == 8:
+                logger.info("Option chosen: correct session result")
+                round_number: int = get_round_number()
+                session_type: str = get_session_type()
+                filename: str = input("Filename: ")
+                correct_results(filename,round_number,session_type,sql_connection)
+                print("=== Succesfully corrected session result and recalculated the rankings ===")
+            elif choice == 9:
+                logger.info("Option chosen: Head to Head matrix for all drivers")
+                session_family: str = get_session_family()
+                export: bool = input("Export to CSV (y/n): ") == 'y'
+                calculate_drivers_h2h_matrix(sql_connection,session_family,export)
+            elif choice == 10:
+                logger.info("Option chosen: championship outlook")
+                for outlook in calculate_championship_outlook(sql_connection):
+                    print(f'#### {outlook.championship} championship {outlook.season} ####')
+                    print('\n'.join(outlook.summary()))
+            elif choice == 11:
+                logger.info("Option chosen: title probabilities")
+                round_number: int = get_round_number()
+                simulate_title_probabilities(sql_connection,round_number)
+                for championship in ('Drivers','Constructors'):
+                    labels: Dict[int,str] = get_championship_labels(sql_connection,championship)
+                    print(f'#### {championship} title probabilities after round No. {round_number} ####')
+                    for number, (probability, change) in sorted(get_title_probabilities_trend(sql_connection,championship,round_number).items(),key=lambda x: -x[1][0]):
+                        if probability > 0 or change:
+                            print(f'{labels.get(number,str(number)):>25}: {probability:7.2%}' + ('' if change is None else f' ({change:+.2%})'))
+            elif choice == 0:
+                logger.info("Reference data cache hits and misses: %s",REFERENCE_CACHE.stats())
+                if PROFILER.enabled:
+                    print('\n'.join(format_functions_report()))
+                print("Exiting...")
+                break
+            else:
+                print("Invalid choice. Enter options 1 - 0")
+        if action is not None:
+            print('\n'.join(format_action_report(*PROFILER.actions[-1])))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = build_parser()
+    arguments = parser.parse_args()
+    configure_logging(arguments.log_level,arguments.log_levels,arguments.quiet_hot_path)
+    if arguments.command is None:
+        main(arguments.profile,arguments.database)
+    else:
+        sys.exit(run_cli(arguments,parser))
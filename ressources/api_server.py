@@ -0,0 +1,220 @@
+import json
+import asyncio
+import logging
+import sqlite3
+from functools import partial
+from http import HTTPStatus
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from ressources.classes.ResponseCache import ResponseCache
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.db_connection import get_reader_connection
+from ressources.database_functions_sqlite3 import get_data_version_fromDB
+from ressources.records import rankings_records, standings_history_records, teammate_battles_records, session_results_records, h2h_records
+from ressources.constants import DATABASE_FILE, CURRENT_SEASON, SESSION_FAMILIES, VALID_SESSION_TYPES, API_HOST, API_PORT, API_WORKERS, API_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# The event loop only parses requests and writes responses: every read of the Database runs in the thread pool, on the read-only connection of its thread.
+# The response cache is only touched by the event loop, and every response carries the data version as its ETag
+
+class ApiError(Exception):
+    '''Raised by a route for a request it cannot answer, with the HTTP status to reply'''
+    def __init__(self,status: int,message: str):
+        super().__init__(message)
+        self.status: int = status
+
+#############################################################################
+####                          Routes                                     ####
+#############################################################################
+
+def query_int(query:Dict[str,str],name:str,default:Optional[int]=None) -> Optional[int]:
+    '''Returns an integer parameter of the query string, default if it is missing. Raises ApiError (400) if it is not an integer'''
+    if name not in query:
+        return default
+    try:
+        return int(query[name])
+    except ValueError:
+        raise ApiError(400,f'{name} must be an integer')
+
+def query_choice(query:Dict[str,str],name:str,choices:list[str],default:Optional[str]=None) -> str:
+    '''Returns a parameter of the query string among choices, default if it is missing. Raises ApiError (400) if it is missing without default or not a choice'''
+    value: Optional[str] = query.get(name,default)
+    if value is None:
+        raise ApiError(400,f'{name} is required')
+    if value not in choices:
+        raise ApiError(400,f'{name} must be one of {", ".join(choices)}')
+    return value
+
+def route_drivers_standings(sql_connection:sqlite3.Connection,query:Dict[str,str]) -> list[Dict[str,Any]]:
+    '''GET /standings/drivers?round=&season=: drivers standings after a round, the last finished round by default'''
+    return rankings_records(sql_connection,'Drivers',query_int(query,'round'),query_int(query,'season',CURRENT_SEASON))
+
+def route_constructors_standings(sql_connection:sqlite3.Connection,query:Dict[str,str]) -> list[Dict[str,Any]]:
+    '''GET /standings/constructors?round=&season=: constructors standings after a round, the last finished round by default'''
+    return rankings_records(sql_connection,'Constructors',query_int(query,'round'),query_int(query,'season',CURRENT_SEASON))
+
+def route_standings_history(sql_connection:sqlite3.Connection,query:Dict[str,str]) -> list[Dict[str,Any]]:
+    '''GET /standings/history?championship=&from=&to=&season=: standings of a championship (drivers by default) after every round from a round (1 by default) to a round (the last stored round by default)'''
+    championship: str = query_choice(query,'championship',['drivers','constructors'],'drivers')
+    return standings_history_records(sql_connection,championship.capitalize(),query_int(query,'from',1),query_int(query,'to'),query_int(query,'season',CURRENT_SEASON))
+
+def route_session_results(sql_connection:sqlite3.Connection,query:Dict[str,str]) -> list[Dict[str,Any]]:
+    '''GET /results?round=&session=&season=: results of a session (Race by default) of a round'''
+    round_number: Optional[int] = query_int(query,'round')
+    if round_number is None:
+        raise ApiError(400,'round is required')
+    return session_results_records(sql_connection,round_number,query_choice(query,'session',VALID_SESSION_TYPES,'Race'),query_int(query,'season',CURRENT_SEASON))
+
+def route_h2h(sql_connection:sqlite3.Connection,query:Dict[str,str]) -> list[Dict[str,Any]]:
+    '''GET /h2h?driver1=&driver2=&family=&season=: head to head between two drivers (trigrammes) for a session family (Race by default)'''
+    if 'driver1' not in query or 'driver2' not in query:
+        raise ApiError(400,'driver1 and driver2 are required')
+    try:
+        return h2h_records(sql_connection,query['driver1'].upper(),query['driver2'].upper(),query_choice(query,'family',list(SESSION_FAMILIES),'Race'),query_int(query,'season',CURRENT_SEASON))
+    except KeyError as e:
+        raise ApiError(404,f'unknown driver {e}')
+
+def route_teammates(sql_connection:sqlite3.Connection,query:Dict[str,str]) -> list[Dict[str,Any]]:
+    '''GET /teammates?season=: battle of every pair of teammates of every constructor'''
+    return teammate_battles_records(sql_connection,query_int(query,'season',CURRENT_SEASON))
+
+def route_version(sql_connection:sqlite3.Connection,query:Dict[str,str]) -> Dict[str,int]:
+    '''GET /version: data version of the Database'''
+    return {'data_version': get_data_version_fromDB(sql_connection)}
+
+ROUTES: Dict[str,Callable[[sqlite3.Connection,Dict[str,str]],Any]] = {
+    '/standings/drivers': route_drivers_standings,
+    '/standings/constructors': route_constructors_standings,
+    '/standings/history': route_standings_history,
+    '/results': route_session_results,
+    '/h2h': route_h2h,
+    '/teammates': route_teammates,
+    '/version': route_version,
+}
+
+#############################################################################
+####                          Reads                                      ####
+#############################################################################
+
+def read_data_version(database:str) -> int:
+    '''Fetches the data version of the Database on the reader connection of the current thread'''
+    return get_data_version_fromDB(get_reader_connection(database))
+
+def read_route(database:str,route:Callable[[sqlite3.Connection,Dict[str,str]],Any],query:Dict[str,str]) -> bytes:
+    '''Answers a route on the reader connection of the current thread and returns the JSON body of the response'''
+    return json.dumps(route(get_reader_connection(database),query)).encode()
+
+#############################################################################
+####                          HTTP                                       ####
+#############################################################################
+
+def etag_matches(if_none_match:Optional[str],etag:str) -> bool:
+    '''Returns if the If-None-Match header of a request names the ETag (or any ETag with *), weak ETags included'''
+    if if_none_match is None:
+        return False
+    tags: list[str] = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+    return '*' in tags or etag in tags
+
+def json_error(status:int,message:str) -> Tuple[int,Dict[str,str],bytes]:
+    '''Returns an error response with its message as a JSON body'''
+    return status, {'Content-Type': 'application/json'}, json.dumps({'error': message}).encode()
+
+async def handle_request(method:str,target:str,headers:Dict[str,str],database:str,executor:ThreadPoolExecutor,cache:ResponseCache) -> Tuple[int,Dict[str,str],bytes]:
+    '''Answers a request: checks the data version first (a change drops the cached responses and reference data), then replies 304 if the client holds the current version, else the cached body or a fresh read. Returns the status, headers and body of the response'''
+    if method not in ('GET','HEAD'):
+        status, headers_out, body = json_error(405,f'{method} is not allowed, the API is read-only')
+        headers_out['Allow'] = 'GET, HEAD'
+        return status, headers_out, body
+    url = urlsplit(target)
+    route: Optional[Callable[[sqlite3.Connection,Dict[str,str]],Any]] = ROUTES.get(url.path.rstrip('/') or '/')
+    if route is None:
+        return json_error(404,f'unknown path {url.path}')
+    loop: asyncio.AbstractEventLoop = asyncio.get_running_loop()
+    version: int = await loop.run_in_executor(executor,read_data_version,database)
+    if cache.set_version(version):
+        REFERENCE_CACHE.clear()
+    etag: str = f'"{version}"'
+    response_headers: Dict[str,str] = {'Content-Type': 'application/json','ETag': etag,'Cache-Control': 'no-cache'}
+    if etag_matches(headers.get('if-none-match'),etag):
+        return 304, response_headers, b''
+    query: Dict[str,str] = dict(parse_qsl(url.query))
+    key: str = f'{url.path.rstrip("/")}?{urlencode(sorted(query.items()))}'
+    body: Optional[bytes] = cache.get(key)
+    if body is None:
+        try:
+            body = await loop.run_in_executor(executor,read_route,database,route,query)
+        except ApiError as e:
+            return json_error(e.status,str(e))
+        except Exception as e:
+            logger.error('Error %s detected when answering %s',e,target)
+            return json_error(500,f'{type(e).__name__}: {e}')
+        # A write during the read is caught by the next request, whose data version differs
+        cache.put(key,body)
+    return 200, response_headers, body
+
+async def handle_connection(reader:asyncio.StreamReader,writer:asyncio.StreamWriter,database:str,executor:ThreadPoolExecutor,cache:ResponseCache) -> None:
+    '''Serves the requests of an HTTP/1.1 connection one after the other until the client closes it or asks to (Connection: close, or HTTP/1.0 without keep-alive)'''
+    try:
+        while True:
+            request_line: bytes = await reader.readline()
+            if not request_line.strip():
+                break
+            headers: Dict[str,str] = {}
+            while True:
+                header_line: bytes = await reader.readline()
+                if header_line in (b'\r\n',b'\n',b''):
+                    break
+                name, _, value = header_line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            parts: list[str] = request_line.decode('latin-1').split()
+            if len(parts) != 3:
+                method, keep_alive = 'GET', False
+                status, response_headers, body = json_error(400,'malformed request line')
+            else:
+                method, target, http_version = parts
+                # The API takes no request body, it is read and ignored to keep the connection in sync
+                content_length: str = headers.get('content-length','0')
+                if content_length.isdigit() and int(content_length):
+                    await reader.readexactly(int(content_length))
+                connection: str = headers.get('connection','').lower()
+                keep_alive = connection == 'keep-alive' if http_version == 'HTTP/1.0' else connection != 'close'
+                status, response_headers, body = await handle_request(method,target,headers,database,executor,cache)
+            response_headers['Content-Length'] = str(len(body))
+            response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+            head: str = f'HTTP/1.1 {status} {HTTPStatus(status).phrase}\r\n' + ''.join(f'{name}: {value}\r\n' for name, value in response_headers.items()) + '\r\n'
+            writer.write(head.encode('latin-1') + (b'' if method == 'HEAD' or status == 304 else body))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError,asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+#############################################################################
+####                          Server                                     ####
+#############################################################################
+
+async def serve_api(database:str=DATABASE_FILE,host:str=API_HOST,port:int=API_PORT,workers:int=API_WORKERS,started:Optional[asyncio.Event]=None) -> None:
+    '''Serves the API until cancelled, with workers threads reading the Database. Sets started once listening'''
+    cache: ResponseCache = ResponseCache(API_CACHE_SIZE)
+    with ThreadPoolExecutor(max_workers=workers,thread_name_prefix='api-reader') as executor:
+        server: asyncio.Server = await asyncio.start_server(partial(handle_connection,database=database,executor=executor,cache=cache),host,port)
+        logger.info('API serving %s on http://%s:%s with %s readers',database,host,port,workers,extra={'summary': True})
+        if started is not None:
+            started.set()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            logger.info('API stopped, response cache: %s, reference data cache: %s',cache.stats(),REFERENCE_CACHE.stats(),extra={'summary': True})
+
+def run_api_server(database:str=DATABASE_FILE,host:str=API_HOST,port:int=API_PORT,workers:int=API_WORKERS) -> None:
+    '''Runs the API in its own event loop until interrupted (Ctrl+C)'''
+    print(f'Serving the API on http://{host}:{port} (Ctrl+C to stop)')
+    try:
+        asyncio.run(serve_api(database,host,port,workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,275 @@
+import os
+import sys
+import json
+import time
+import sqlite3
+import logging
+import argparse
+import tracemalloc
+import dataclasses
+import platform
+import tempfile
+import shutil
+import subprocess
+from datetime import datetime
+from contextlib import nullcontext
+from typing import Callable, Optional
+from ressources.migrations import apply_migrations
+from ressources.instrumentation import query_budget
+from ressources.synthetic_data import generate_season, generate_seasons
+from ressources.classes.Result import Result
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.database_functions_sqlite3 import TABLES_SCHEMA, result_factory, initialize_db, get_last_round_fromDB, get_all_drivers_trigramme_fromDB, get_results_by_session_types_fromDB, get_race_results_by_driver_fromDB, get_driver_by_carnumber_fromDB, get_drivers_standings_fromDB, get_constructors_standings_fromDB
+from ressources.helper_functions import compare_results_H2H, calculate_h2h_matrix
+from ressources.columnar_store import refresh_columnar_season, open_columnar_season, columnar_h2h
+from ressources.main_functions import seed_reference_data, import_season, build_seed_snapshot, recalculate_rankings_from_round, calculate_championship_outlook, simulate_title_probabilities, get_standings_history, import_season_laps, calculate_session_stint_pace, refresh_teammate_comparisons, calculate_teammate_battles
+from ressources.constants import BENCHMARK_SIZES, BENCHMARKS_FOLDER, BENCHMARK_TOLERANCE, SESSION_FAMILIES, QUERY_BUDGETS, CURRENT_SEASON, SIMULATION_CHUNK, SEED_FILES, SEED_SNAPSHOT_FILE, DATABASE_FILE, MENU_PROMPT, STARTUP_BUDGETS_MS, RECORDS_BENCHMARK_ROWS, VALID_SESSION_TYPES, STINT_PACE_WINDOW
+
+logger = logging.getLogger(__name__)
+
+def time_call(sql_connection:sqlite3.Connection,step:str,function:Callable,*args) -> float:
+    '''Returns the duration in seconds of a single call of a benchmark step, asserting the query budget of the step (QUERY_BUDGETS in the constants.py file) on the connection so a query per driver or per round cannot come back unnoticed'''
+    with query_budget(sql_connection,QUERY_BUDGETS[step],label=step) if step in QUERY_BUDGETS else nullcontext():
+        start: float = time.perf_counter()
+        function(*args)
+        return time.perf_counter() - start
+
+def benchmark_season(sql_connection:sqlite3.Connection,paths:dict[str,str],season:int,max_workers:Optional[int]=None) -> dict[str,float]:
+    '''Imports a synthetic season (see generate_season) into the database, next to the seasons already imported, and times the import, the standings, the championship outlook, the teammate battles, the lap by lap import with the stint pace and the head to head calculations. Returns the duration in seconds of each step'''
+    timings: dict[str,float] = {}
+    start: float = time.perf_counter()
+    seed_reference_data(sql_connection,paths,season)
+    timings['import_reference'] = time.perf_counter() - start
+    # The columnar store of the season next to its synthetic files, built by the import
+    store_folder: str = os.path.join(os.path.dirname(paths['drivers']),'columnar','')
+    timings['import_season'] = time_call(sql_connection,'import_season',import_season,sql_connection,paths['results'],max_workers,season,store_folder)
+
+    last_round: int = get_last_round_fromDB(sql_connection,season)
+    timings['drivers_standings'] = time_call(sql_connection,'drivers_standings',get_drivers_standings_fromDB,sql_connection,last_round,season)
+    timings['constructors_standings'] = time_call(sql_connection,'constructors_standings',get_constructors_standings_fromDB,sql_connection,last_round,season)
+    timings['recalculate_rankings'] = time_call(sql_connection,'recalculate_rankings',recalculate_rankings_from_round,sql_connection,1,season)
+    timings['championship_outlook'] = time_call(sql_connection,'championship_outlook',calculate_championship_outlook,sql_connection,season)
+    # A single chunk of seasons from mid-season in this process: the cost of the simulated seasons, whatever the number of workers
+    timings['title_probabilities'] = time_call(sql_connection,'title_probabilities',simulate_title_probabilities,sql_connection,max(1,last_round//2),SIMULATION_CHUNK,0,1,season)
+
+    def standings_history() -> None:
+        # Built again from the rankings, then read after every round
+        REFERENCE_CACHE.invalidate('DriversRanking')
+        history = get_standings_history(sql_connection,'Drivers',season)
+        for round_number in range(1,history.last_round+1):
+            history.standings_as_of(round_number)
+    timings['standings_history'] = time_call(sql_connection,'standings_history',standings_history)
+
+    timings['teammate_refresh'] = time_call(sql_connection,'teammate_refresh',refresh_teammate_comparisons,sql_connection,1,season)
+    timings['teammate_battles'] = time_call(sql_connection,'teammate_battles',calculate_teammate_battles,sql_connection,season)
+    timings['laps_import'] = time_call(sql_connection,'laps_import',import_season_laps,sql_connection,paths['laps'],season)
+    timings['stint_pace'] = time_call(sql_connection,'stint_pace',calculate_session_stint_pace,sql_connection,last_round,'Race',STINT_PACE_WINDOW,season)
+
+    def h2h_pair() -> None:
+        driver1 = get_driver_by_carnumber_fromDB(sql_connection,1,season)
+        driver2 = get_driver_by_carnumber_fromDB(sql_connection,2,season)
+        compare_results_H2H(driver1,driver2,get_race_results_by_driver_fromDB(sql_connection,1,season),get_race_results_by_driver_fromDB(sql_connection,2,season))
+    timings['h2h_pair'] = time_call(sql_connection,'h2h_pair',h2h_pair)
+    timings['columnar_refresh'] = time_call(sql_connection,'columnar_refresh',refresh_columnar_season,sql_connection,season,store_folder,1)
+
+    def h2h_pair_columnar() -> None:
+        driver1 = get_driver_by_carnumber_fromDB(sql_connection,1,season)
+        driver2 = get_driver_by_carnumber_fromDB(sql_connection,2,season)
+        with open_columnar_season(season,store_folder) as store:
+            columnar_h2h(store,driver1,driver2,'Race')
+    timings['h2h_pair_columnar'] = time_call(sql_connection,'h2h_pair_columnar',h2h_pair_columnar)
+
+    def h2h_matrix(session_family:str) -> None:
+        trigrammes: dict[int,str] = get_all_drivers_trigramme_fromDB(sql_connection,season)
+        calculate_h2h_matrix(session_family,get_results_by_session_types_fromDB(sql_connection,SESSION_FAMILIES[session_family],season),sorted(trigrammes.keys()),trigrammes)
+    timings['h2h_matrix_q'] = time_call(sql_connection,'h2h_matrix_q',h2h_matrix,'Q')
+    timings['h2h_matrix_race'] = time_call(sql_connection,'h2h_matrix_race',h2h_matrix,'Race')
+    return timings
+
+def run_benchmarks(sizes:list[tuple[int,int]]=BENCHMARK_SIZES,seasons:int=1,repeat:int=3,max_workers:Optional[int]=None,seed:int=0,first_year:int=CURRENT_SEASON) -> dict:
+    '''Generates synthetic seasons for each size (rounds, drivers) and benchmarks them (see benchmark_season), all the seasons of a run sharing one database so the later seasons are measured against the history already stored, keeping the best time of each step over repeat runs (summed over the seasons). Returns the timings keyed by size ("<rounds>x<drivers>") with the environment they were measured in'''
+    results: dict = {'date': datetime.now().isoformat(timespec='seconds'),'python': platform.python_version(),'sqlite': sqlite3.sqlite_version,'platform': platform.platform(),'seasons': seasons,'repeat': repeat,'sizes': {}}
+    for rounds, drivers in sizes:
+        size: str = f'{rounds}x{drivers}'
+        best: dict[str,float] = {}
+        with tempfile.TemporaryDirectory() as folder:
+            seasons_paths: list[dict[str,str]] = generate_seasons(folder,seasons,rounds,drivers,first_year=first_year,seed=seed)
+            for run in range(repeat):
+                run_timings: dict[str,float] = {}
+                sql_connection: sqlite3.Connection = initialize_db(os.path.join(folder,f'benchmark-{run}.sqlite'))
+                apply_migrations(sql_connection)
+                for season_index, paths in enumerate(seasons_paths):
+                    for step, duration in benchmark_season(sql_connection,paths,first_year + season_index,max_workers).items():
+                        run_timings[step] = run_timings.get(step,0.0) + duration
+                sql_connection.close()
+                for step, duration in run_timings.items():
+                    best[step] = min(best.get(step,duration),duration)
+        results['sizes'][size] = {step: round(duration,6) for step, duration in best.items()}
+        logger.info('Benchmark %s: %s',size,results['sizes'][size],extra={'summary': True})
+    return results
+
+#### Startup ####
+
+# The interactive program, launched in a fresh process for each startup measure
+MAIN_SCRIPT: str = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),'main.py')
+
+def time_to_first_prompt(folder:str) -> float:
+    '''Launches the interactive program in folder and returns the seconds until its menu prompt is shown (interpreter startup, imports, Database connection or creation and migrations included), then exits it'''
+    start: float = time.perf_counter()
+    process = subprocess.Popen([sys.executable,MAIN_SCRIPT],cwd=folder,stdin=subprocess.PIPE,stdout=subprocess.PIPE,stderr=subprocess.DEVNULL,text=True)
+    output: str = ''
+    # input() flushes the menu and its prompt before waiting, so the prompt shows up on the pipe as soon as the program is ready
+    while not output.endswith(MENU_PROMPT):
+        character: str = process.stdout.read(1)
+        if not character:
+            process.wait()
+            raise RuntimeError(f'Program exited with {process.returncode} before its first prompt')
+        output += character
+    duration: float = time.perf_counter() - start
+    process.communicate('0\n')
+    return duration
+
+def measure_startup(repeat:int=3) -> dict[str,float]:
+    '''Measures the time to the first prompt of the program in a folder holding the seed files of a synthetic season, keeping the best of repeat launches, for a missing Database seeded from the seed files (cold_start_csv) or copied from the seed snapshot (cold_start_snapshot), and for an existing Database (warm_start). Returns the duration in seconds of each case'''
+    best: dict[str,float] = {}
+    with tempfile.TemporaryDirectory() as folder:
+        # The seed files of a synthetic season, where the program looks for its seed files
+        synthetic_paths: dict[str,str] = generate_season(os.path.join(folder,'synthetic'))
+        for kind, path in SEED_FILES.items():
+            os.makedirs(os.path.dirname(os.path.join(folder,path)),exist_ok=True)
+            shutil.copyfile(synthetic_paths[kind],os.path.join(folder,path))
+        database: str = os.path.join(folder,DATABASE_FILE)
+        snapshot: str = os.path.join(folder,SEED_SNAPSHOT_FILE)
+        os.makedirs(os.path.dirname(database),exist_ok=True)
+        for run in range(repeat):
+            for case in ['cold_start_csv','cold_start_snapshot','warm_start']:
+                if case == 'cold_start_snapshot' and not os.path.isfile(snapshot):
+                    build_seed_snapshot(snapshot,{kind: os.path.join(folder,path) for kind, path in SEED_FILES.items()})
+                if case != 'warm_start':
+                    for filename in [database,database + '-wal',database + '-shm']:
+                        if os.path.isfile(filename):
+                            os.remove(filename)
+                if case == 'cold_start_csv' and os.path.isfile(snapshot):
+                    os.remove(snapshot)
+                duration: float = time_to_first_prompt(folder)
+                best[case] = min(best.get(case,duration),duration)
+    logger.info('Startup: %s',best,extra={'summary': True})
+    return best
+
+def check_startup_budgets(startup:dict[str,float],budgets:dict[str,float]=STARTUP_BUDGETS_MS) -> list[str]:
+    '''Compares the times to the first prompt with their budgets (STARTUP_BUDGETS_MS in the constants.py file). Returns a description of every case over its budget'''
+    return [f'{case}: {duration*1000:.0f} ms over the budget of {budgets[case]:.0f} ms' for case, duration in startup.items() if case in budgets and duration*1000 > budgets[case]]
+
+#### Records ####
+
+def legacy_record_type(record_type:type) -> type:
+    '''Returns a class with the fields of a record type kept in the __dict__ of each instance, as the records were before they became slotted dataclasses'''
+    return dataclasses.make_dataclass(f'Legacy{record_type.__name__}',[(field.name,field.type) for field in dataclasses.fields(record_type)])
+
+def measure_records(rows:int=RECORDS_BENCHMARK_ROWS,repeat:int=3) -> dict[str,float]:
+    '''Measures the memory and the fetch throughput of rows results (a history of several seasons in an in-memory Database), for the legacy records (instance __dict__, built from the tuples of the cursor) and for the slotted Result built by the row factory of the fetchers.
+    The memory is the memory allocated per record, the values of the rows excepted (traced with tracemalloc), the throughput the best of repeat fetches of every row. Returns the bytes and the records per second of each'''
+    legacy_type: type = legacy_record_type(Result)
+    sql_connection: sqlite3.Connection = sqlite3.connect(':memory:')
+    sql_connection.execute(f'''CREATE TABLE Results ({TABLES_SCHEMA['Results']})''')
+    # 20 cars in every session of 24 rounds per season, as many seasons as needed
+    sql_connection.executemany('''INSERT INTO Results (season,round_number,car_position,car_number,paddock_number,session_type,result_time,car_points,time_seconds,status,position) VALUES (?,?,?,?,?,?,?,?,?,?,?)''',
+        [(2000 + row//(20*len(VALID_SESSION_TYPES)*24),row//(20*len(VALID_SESSION_TYPES)) % 24 + 1,str(row % 20 + 1),row % 20 + 1,row % 20//2 + 1,VALID_SESSION_TYPES[row//20 % len(VALID_SESSION_TYPES)],f'{5400 + row % 20*1.5:.3f}',max(0,10 - row % 20),5400 + row % 20*1.5,0,row % 20 + 1) for row in range(rows)])
+    query: str = '''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results'''
+    measures: dict[str,float] = {'rows': rows}
+    for name, build in [('legacy',lambda sql_cursor: [legacy_type(*row) for row in sql_cursor.fetchall()]),('slotted',None)]:
+        best: Optional[float] = None
+        for run in range(repeat):
+            sql_cursor: sqlite3.Cursor = sql_connection.cursor()
+            if build is None:
+                sql_cursor.row_factory = result_factory
+            start: float = time.perf_counter()
+            sql_cursor.execute(query)
+            records: list = sql_cursor.fetchall() if build is None else build(sql_cursor)
+            duration: float = time.perf_counter() - start
+            best = duration if best is None else min(best,duration)
+            del records
+        measures[f'{name}_records_per_s'] = round(rows/best)
+        # The rows are fetched first, so only the records and their attributes storage are traced
+        row_values: list[tuple] = sql_connection.execute(query).fetchall()
+        record_type: type = legacy_type if build is not None else Result
+        tracemalloc.start()
+        records = [record_type(*row) for row in row_values]
+        traced: int = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        measures[f'{name}_bytes_per_record'] = round(traced/rows,1)
+        del records, row_values
+    sql_connection.close()
+    logger.info('Records: %s',measures,extra={'summary': True})
+    return measures
+
+def save_baseline(results:dict,filename:str) -> None:
+    '''Writes benchmark results as a JSON baseline'''
+    os.makedirs(os.path.dirname(filename) or '.',exist_ok=True)
+    with open(filename,'w') as baseline_file:
+        json.dump(results,baseline_file,indent=2)
+    logger.info('Benchmark baseline saved to %s',filename)
+
+def compare_to_baseline(results:dict,baseline:dict,tolerance:float=BENCHMARK_TOLERANCE) -> list[str]:
+    '''Compares benchmark results with a baseline, size by size and step by step. Returns a description of every step slower than the baseline by more than tolerance (0.25 = 25%)'''
+    regressions: list[str] = []
+    for size, timings in results['sizes'].items():
+        for step, duration in timings.items():
+            reference: Optional[float] = baseline.get('sizes',{}).get(size,{}).get(step)
+            if reference and duration > reference*(1 + tolerance):
+                regressions.append(f'{size} {step}: {duration:.4f}s vs {reference:.4f}s (+{(duration/reference - 1)*100:.0f}%)')
+    for case, duration in results.get('startup',{}).items():
+        reference = baseline.get('startup',{}).get(case)
+        if reference and duration > reference*(1 + tolerance):
+            regressions.append(f'startup {case}: {duration:.4f}s vs {reference:.4f}s (+{(duration/reference - 1)*100:.0f}%)')
+    return regressions
+
+def parse_sizes(sizes:str) -> list[tuple[int,int]]:
+    '''Parses sizes written as "rounds x drivers" separated by commas, e.g. "5x20,24x20,24x40"'''
+    return [(int(size.split('x')[0]),int(size.split('x')[1])) for size in sizes.split(',')]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the import, standings and head to head calculations on synthetic seasons")
+    parser.add_argument("--sizes",type=parse_sizes,default=BENCHMARK_SIZES,help='Sizes to benchmark as "rounds x drivers", e.g. "5x20,24x20,24x40"')
+    parser.add_argument("--seasons",type=int,default=1,help="Seasons generated for each size")
+    parser.add_argument("--repeat",type=int,default=3,help="Runs of each size, the best time of each step is kept")
+    parser.add_argument("--workers",type=int,default=None,help="Processes used to parse the result files")
+    parser.add_argument("--save",default=None,help=f"Saves the results as a JSON baseline (e.g. {BENCHMARKS_FOLDER}baseline.json)")
+    parser.add_argument("--compare",default=None,help="Compares the results with a JSON baseline and exits with 1 on regressions")
+    parser.add_argument("--skip-startup",action="store_true",help="Does not measure the time to the first prompt of the program")
+    parser.add_argument("--records",type=int,default=RECORDS_BENCHMARK_ROWS,help="Results of the memory and throughput comparison of the records, 0 to skip it")
+    parser.add_argument("--tolerance",type=float,default=BENCHMARK_TOLERANCE,help="Slowdown tolerated against the baseline (0.25 = 25%%)")
+    arguments = parser.parse_args()
+
+    results: dict = run_benchmarks(arguments.sizes,arguments.seasons,arguments.repeat,arguments.workers)
+    for size, timings in results['sizes'].items():
+        print(f'#### {size} (rounds x drivers) ####')
+        for step, duration in timings.items():
+            print(f'{step:>22}: {duration*1000:10.2f} ms')
+    over_budget: list[str] = []
+    if not arguments.skip_startup:
+        results['startup'] = measure_startup(arguments.repeat)
+        print('#### Startup (time to the first prompt) ####')
+        for case, duration in results['startup'].items():
+            print(f'{case:>22}: {duration*1000:10.2f} ms')
+        over_budget = check_startup_budgets(results['startup'])
+        for description in over_budget:
+            print(f'OVER BUDGET {description}')
+    if arguments.records:
+        results['records'] = measure_records(arguments.records,arguments.repeat)
+        print(f'#### Records ({arguments.records} results) ####')
+        for name in ['legacy','slotted']:
+            print(f'{name:>22}: {results["records"][f"{name}_bytes_per_record"]:10.1f} bytes/record {results["records"][f"{name}_records_per_s"]:10d} records/s')
+    if arguments.save:
+        save_baseline(results,arguments.save)
+        print(f'Baseline saved to {arguments.save}')
+    if arguments.compare:
+        with open(arguments.compare,'r') as baseline_file:
+            regressions: list[str] = compare_to_baseline(results,json.load(baseline_file),arguments.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regression against {arguments.compare}')
+    if over_budget:
+        sys.exit(1)
@@ -0,0 +1,190 @@
+import heapq
+import logging
+from typing import Dict, Iterator, Tuple
+import numpy as np
+from ressources.classes.Season import Season
+from ressources.classes.ChampionshipOutlook import ChampionshipOutlook
+from ressources.constants import CHAMPIONSHIP_SEARCH_NODES
+
+logger = logging.getLogger(__name__)
+
+# A competitor keeps a chance only if it can finish strictly above every rival: a tie on points is counted as lost, as in the rankings
+
+class SearchLimitReached(Exception):
+    '''Raised when the exact check explores more than its node budget'''
+
+#### Remaining sessions ####
+
+def session_points(season:Season,session_type:str) -> list[int]:
+    '''Returns the points of the scoring positions of a Race or a Sprint of the season, best position first'''
+    return sorted((points for points in season.points_table(session_type).values() if points > 0),reverse=True)
+
+def remaining_sessions(calendar:list[Tuple[int,str]],after_round:int,season:Season) -> list[list[int]]:
+    '''Returns the points of the scoring positions of every session still to run after after_round: the Race of every later round of the calendar (round number, round type) and the Sprint of every later Sprint weekend, plus the races and sprints of the rules of the season missing from the calendar'''
+    race_points: list[int] = session_points(season,'Race')
+    sprint_points: list[int] = session_points(season,'Sprint')
+    later_rounds: list[str] = [round_type for round_number, round_type in calendar if round_number > after_round]
+    missing_races: int = max(0,season.total_races - len(calendar))
+    missing_sprints: int = max(0,season.total_sprints - sum(1 for round_number, round_type in calendar if round_type == 'Sprint'))
+    races: int = len(later_rounds) + missing_races
+    sprints: int = later_rounds.count('Sprint') + missing_sprints
+    return [race_points]*races + [sprint_points]*sprints
+
+def max_points_available(sessions:list[list[int]],cars:int) -> int:
+    '''Returns the points a competitor scores by winning every remaining session, with its cars (1 for a driver, 2 for a constructor) in the first positions'''
+    return sum(sum(points[:cars]) for points in sessions)
+
+#### Bound pass ####
+
+def order_competitors(points:Dict[int,int]) -> list[Tuple[int,int]]:
+    '''Orders the competitors (number, points) as in the rankings: by points, ties ordered by their number'''
+    return sorted(points.items(),key=lambda x: (-x[1],x[0]))
+
+def bound_chances(points:Dict[int,int],sessions:list[list[int]],cars:int) -> Dict[int,bool]:
+    '''Upper bound pass over all the competitors at once: a competitor keeps a chance if winning every remaining session takes it above the current leader, the leader always keeps it. Never eliminates a competitor that can still win, but ignores that the rivals also score'''
+    available: int = max_points_available(sessions,cars)
+    numbers: np.ndarray = np.fromiter(points.keys(),dtype=np.int64,count=len(points))
+    totals: np.ndarray = np.fromiter(points.values(),dtype=np.int64,count=len(points))
+    # Leader as in order_competitors: most points, then lowest number
+    leader: int = int(np.lexsort((numbers,-totals))[0])
+    chances: np.ndarray = totals + available > totals[leader]
+    chances[leader] = True
+    return dict(zip(numbers.tolist(),chances.tolist()))
+
+#### Exact check ####
+
+def session_assignments(capacities:Tuple[int,...],slots:list[int],per_session:int,nodes:list[int],max_nodes:int) -> Iterator[Tuple[int,...]]:
+    '''Yields the capacities left to the rivals by every way of giving the slots of one session (points, best first) to the rivals, at most per_session slots each and never above the capacity of a rival. Rivals with the same capacity and the same slots already taken are interchangeable, so only one of them is tried'''
+    remaining: list[int] = list(capacities)
+    taken: list[int] = [0]*len(capacities)
+    seen: set = set()
+
+    def assign(slot_index:int) -> Iterator[Tuple[int,...]]:
+        nodes[0] += 1
+        if nodes[0] > max_nodes:
+            raise SearchLimitReached()
+        if slot_index == len(slots):
+            result: Tuple[int,...] = tuple(sorted(remaining,reverse=True))
+            if result not in seen:
+                seen.add(result)
+                yield result
+            return
+        slot: int = slots[slot_index]
+        tried: set = set()
+        for rival in sorted(range(len(remaining)),key=lambda x: -remaining[x]):
+            if remaining[rival] < slot:
+                break
+            if taken[rival] == per_session or (remaining[rival],taken[rival]) in tried:
+                continue
+            tried.add((remaining[rival],taken[rival]))
+            remaining[rival] -= slot
+            taken[rival] += 1
+            yield from assign(slot_index + 1)
+            remaining[rival] += slot
+            taken[rival] -= 1
+    return assign(0)
+
+def greedy_fit(capacities:list[int],sessions:list[list[int]],per_session:int) -> bool:
+    '''Gives every slot, session by session and best first, to the rival with the most capacity left (a heap of the rivals of the session). Returns if every slot found a rival, which proves the points fit (a failure proves nothing)'''
+    remaining: list[int] = sorted(capacities,reverse=True)
+    for slots in sessions:
+        # Sorted by decreasing capacity, the rivals already form a heap of the negative capacities
+        heap: list[Tuple[int,int,int]] = [(-capacity,rival,0) for rival, capacity in enumerate(remaining)]
+        for slot in slots:
+            if not heap or -heap[0][0] < slot:
+                return False
+            negative_capacity, rival, taken = heapq.heappop(heap)
+            remaining[rival] = -negative_capacity - slot
+            if taken + 1 < per_session:
+                heapq.heappush(heap,(-remaining[rival],rival,taken + 1))
+        remaining.sort(reverse=True)
+    return True
+
+def points_fit(capacities:list[int],sessions:list[list[int]],per_session:int,max_nodes:int=CHAMPIONSHIP_SEARCH_NODES) -> bool:
+    '''Returns if the points of the slots of every session can be shared among the rivals, at most per_session slots of a session each, without any rival scoring more than its capacity.
+    Tries the aggregate bound and a greedy assignment first, then searches session by session, capping the capacities to what a rival can still score so equivalent states meet, and remembering the states that failed. Raises SearchLimitReached beyond max_nodes'''
+    best_by_rival: list[int] = [0]*(len(sessions) + 1)
+    total: list[int] = [0]*(len(sessions) + 1)
+    for index in range(len(sessions) - 1,-1,-1):
+        best_by_rival[index] = best_by_rival[index + 1] + sum(sessions[index][:per_session])
+        total[index] = total[index + 1] + sum(sessions[index])
+    start: Tuple[int,...] = tuple(sorted((min(capacity,best_by_rival[0]) for capacity in capacities),reverse=True))
+    if sum(start) < total[0]:
+        return False
+    if greedy_fit(list(start),sessions,per_session):
+        return True
+    smallest_slot: list[int] = [min(min(slots) for slots in sessions[index:]) for index in range(len(sessions))] + [0]
+    failed: set = set()
+    nodes: list[int] = [0]
+
+    def enough_rivals(remaining:Tuple[int,...],slots:list[int]) -> bool:
+        '''The k best slots of a session need at least k/per_session rivals able to take the k-th one'''
+        return all(per_session*sum(1 for capacity in remaining if capacity >= slot) > slot_index for slot_index, slot in enumerate(slots))
+
+    def fit(index:int,remaining:Tuple[int,...]) -> bool:
+        if index == len(sessions):
+            return True
+        if (index,remaining) in failed or sum(remaining) < total[index] or not enough_rivals(remaining,sessions[index]):
+            return False
+        for left in session_assignments(remaining,sessions[index],per_session,nodes,max_nodes):
+            # Rivals too close to the target for any slot left only take positions without points
+            if fit(index + 1,tuple(sorted((min(capacity,best_by_rival[index + 1]) for capacity in left if capacity >= smallest_slot[index + 1]),reverse=True))):
+                return True
+        failed.add((index,remaining))
+        return False
+    return fit(0,tuple(capacity for capacity in start if capacity >= smallest_slot[0]))
+
+def can_still_win(number:int,points:Dict[int,int],sessions:list[list[int]],cars:int,max_nodes:int=CHAMPIONSHIP_SEARCH_NODES) -> bool:
+    '''Exact check of the chance of a competitor: it wins every remaining session (its cars in the first positions, which can only help it), and the points of the following positions must be shared among the rivals without any of them reaching its total. Accounts for the rivals taking points from each other, which the bound pass ignores. Raises SearchLimitReached beyond max_nodes'''
+    target: int = points[number] + max_points_available(sessions,cars)
+    capacities: list[int] = [target - 1 - rival_points for rival, rival_points in points.items() if rival != number]
+    if any(capacity < 0 for capacity in capacities):
+        return False
+    rival_cars: int = len(capacities)*cars
+    sessions_slots: list[list[int]] = [slots for slots in (points_table[cars:cars + rival_cars] for points_table in sessions) if slots]
+    return points_fit(capacities,sessions_slots,cars,max_nodes)
+
+def championship_chances(points:Dict[int,int],sessions:list[list[int]],cars:int,max_nodes:int=CHAMPIONSHIP_SEARCH_NODES) -> Dict[int,bool]:
+    '''Returns if each competitor can still win the championship with the remaining sessions: bound pass for all the competitors, then exact checks where the bound is not decisive.
+    A competitor that can win makes every competitor with more points able to win too (they can swap their results), so the contenders are the first ones of the standings and the last one is found by a binary search, with a handful of exact checks. A check beyond its node budget keeps the answer of the bound'''
+    if not points:
+        return {}
+    chances: Dict[int,bool] = bound_chances(points,sessions,cars)
+    ordered: list[Tuple[int,int]] = order_competitors(points)
+    low: int = 1
+    high: int = sum(1 for number, competitor_points in ordered if chances[number])
+    while low < high:
+        middle: int = (low + high + 1)//2
+        number: int = ordered[middle - 1][0]
+        try:
+            still_possible: bool = can_still_win(number,points,sessions,cars,max_nodes)
+        except SearchLimitReached:
+            logger.warning('Exact championship check of No. %s stopped after %s nodes, keeping the bound',number,max_nodes)
+            still_possible = True
+        if still_possible:
+            low = middle
+        else:
+            high = middle - 1
+    return {number: position <= low for position, (number, competitor_points) in enumerate(ordered,start=1)}
+
+#### Season ####
+
+def championship_outlook(championship:str,points_by_round:Dict[int,Dict[int,int]],competitors:Dict[int,str],calendar:list[Tuple[int,str]],finished_rounds:list[int],season:Season,cars:int) -> ChampionshipOutlook:
+    '''Replays the finished rounds of a season from the points scored by each competitor in each round ({round_number: {number: points}}) and returns the round after which each competitor (number: label) was eliminated and the round the championship was clinched, if any'''
+    outlook: ChampionshipOutlook = ChampionshipOutlook(season.season,championship,competitors)
+    running_points: Dict[int,int] = {number: 0 for number in competitors}
+    for round_number in finished_rounds:
+        for number, points in points_by_round.get(round_number,{}).items():
+            if number in running_points:
+                running_points[number] += points
+        chances: Dict[int,bool] = championship_chances(running_points,remaining_sessions(calendar,round_number,season),cars)
+        contenders: list[int] = [number for number, competitor_points in order_competitors(running_points) if chances[number]]
+        for number in competitors:
+            if not chances[number] and number not in outlook.eliminated_rounds:
+                outlook.eliminated_rounds[number] = round_number
+        outlook.contenders_by_round[round_number] = contenders
+        if len(contenders) == 1 and outlook.clinched_round is None:
+            outlook.clinched_round = round_number
+            outlook.champion = contenders[0]
+    logger.info('%s championship %s: %s competitors eliminated, clinched after round No. %s',championship,season.season,len(outlook.eliminated_rounds),outlook.clinched_round,extra={'summary': True})
+    return outlook
@@ -0,0 +1,34 @@
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ChampionshipOutlook:
+    def __init__(self,season: int,championship: str,labels: Dict[int,str]):
+        self.season: int = season
+        # 'Drivers' or 'Constructors'
+        self.championship: str = championship
+        # Trigramme of each driver or short name of each constructor, by number
+        self.labels: Dict[int,str] = labels
+        # Round after which each competitor can no longer win the championship
+        self.eliminated_rounds: Dict[int,int] = {}
+        self.clinched_round: Optional[int] = None
+        self.champion: Optional[int] = None
+        # Competitors still in contention after each finished round
+        self.contenders_by_round: Dict[int,list[int]] = {}
+
+    def label(self,number: int) -> str:
+        '''Label of a competitor, its number if it has no label'''
+        return self.labels.get(number,str(number))
+
+    def summary(self) -> list[str]:
+        '''Describes the clinched round and the round each competitor was eliminated, in order of elimination'''
+        lines: list[str] = []
+        if self.clinched_round is not None:
+            lines.append(f'{self.championship} championship {self.season} clinched by {self.label(self.champion)} after round No. {self.clinched_round}')
+        elif self.contenders_by_round:
+            last_round: int = max(self.contenders_by_round)
+            lines.append(f'{self.championship} championship {self.season} still open after round No. {last_round}: ' + ', '.join(self.label(number) for number in self.contenders_by_round[last_round]))
+        for number, round_number in sorted(self.eliminated_rounds.items(),key=lambda x: (x[1],x[0])):
+            lines.append(f'{self.label(number):>25}: eliminated after round No. {round_number}')
+        return lines
@@ -0,0 +1,41 @@
+import logging
+from typing import Dict, Optional
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ColumnarSeason:
+    '''Columns of a season of the columnar store (see columnar_store.py), each one a NumPy array memory mapped read-only over its .npy file: indexing and slicing read the pages of the file directly, without building a Python object per row.
+    The rows of every table are ordered by round, so the rows of a range of rounds are a slice found by bisection'''
+    def __init__(self,season: int,last_round: int):
+        self.season: int = season
+        # Last finished round stored
+        self.last_round: int = last_round
+        # table -> column -> memory mapped array
+        self.columns: Dict[str,Dict[str,np.ndarray]] = {}
+        self.rows: Dict[str,int] = {}
+
+    def add_column(self,table: str,name: str,values: np.ndarray) -> None:
+        '''Adds the memory mapped array of a column'''
+        self.columns.setdefault(table,{})[name] = values
+        self.rows[table] = len(values)
+
+    def column(self,table: str,name: str) -> np.ndarray:
+        '''Returns the memory mapped array of a column of a table'''
+        return self.columns[table][name]
+
+    def round_rows(self,table: str,first_round: int=1,last_round: Optional[int]=None) -> slice:
+        '''Returns the slice of the rows of a table from first_round to last_round (the last round stored by default), both included'''
+        rounds: np.ndarray = self.columns[table]['round_number']
+        return slice(int(np.searchsorted(rounds,first_round,side='left')),int(np.searchsorted(rounds,self.last_round if last_round is None else last_round,side='right')))
+
+    def close(self) -> None:
+        '''Drops the arrays, their memory maps being closed once no slice of them is left'''
+        self.columns.clear()
+        self.rows.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*exc_info) -> None:
+        self.close()
@@ -0,0 +1,25 @@
+from typing import Dict, Optional
+from ressources.classes.Driver import Driver
+
+class HeadToHead:
+    def __init__(self,driver1: Driver,driver2: Driver):
+        self.driver1: Driver = driver1
+        self.driver2: Driver = driver2
+        self.driver1_ahead: Dict[str,int] = {}
+        self.driver2_ahead: Dict[str,int] = {}
+        self.comparable_sessions: Dict[str,int] = {}
+        self.time_delta_sum: float = 0
+        self.time_delta_count: int = 0
+
+    def add_session_type(self,session_type: str) -> None:
+        '''Starts the counters of a session type at 0, so every session type driven by any of the drivers is reported'''
+        self.driver1_ahead.setdefault(session_type,0)
+        self.driver2_ahead.setdefault(session_type,0)
+        self.comparable_sessions.setdefault(session_type,0)
+
+    @property
+    def time_delta_average(self) -> Optional[float]:
+        '''Average delta time (driver 1 - driver 2) of the sessions both drivers finished with a time, None if there is none'''
+        if self.time_delta_count == 0:
+            return None
+        return self.time_delta_sum / self.time_delta_count
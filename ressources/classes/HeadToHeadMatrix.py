@@ -0,0 +1,47 @@
+import csv
+import logging
+from typing import Dict
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class HeadToHeadMatrix:
+    def __init__(self,session_family: str,car_numbers: list[int],trigrammes: Dict[int,str]):
+        self.session_family: str = session_family
+        self.car_numbers: list[int] = car_numbers
+        self.trigrammes: Dict[int,str] = trigrammes
+        self.index: Dict[int,int] = {car_number: i for i, car_number in enumerate(car_numbers)}
+        size: int = len(car_numbers)
+        # wins[i, j]: sessions where car i finished ahead of car j
+        self.wins: np.ndarray = np.zeros((size,size),dtype=np.int64)
+        self.comparable_sessions: np.ndarray = np.zeros((size,size),dtype=np.int64)
+        # time_delta_sum[i, j]: sum of (time of car i - time of car j) for the sessions both finished with a time
+        self.time_delta_sum: np.ndarray = np.zeros((size,size),dtype=np.float64)
+        self.time_delta_count: np.ndarray = np.zeros((size,size),dtype=np.int64)
+
+    def mean_time_delta(self) -> np.ndarray:
+        '''Average delta time of every pair of cars, NaN where no timed session is comparable'''
+        with np.errstate(invalid='ignore',divide='ignore'):
+            return np.where(self.time_delta_count > 0,self.time_delta_sum / self.time_delta_count,np.nan)
+
+    def labels(self) -> list[str]:
+        '''Trigramme of each row/column of the matrix, car number if the driver is not in the Drivers Table'''
+        return [self.trigrammes.get(car_number,str(car_number)) for car_number in self.car_numbers]
+
+    def export_to_csv(self,folder: str) -> list[str]:
+        '''Writes the wins and the mean delta time matrices as CSV files in folder, with the trigrammes as header. Returns the paths of the files'''
+        labels: list[str] = self.labels()
+        wins_file: str = f'{folder}H2H {self.session_family} - wins.csv'
+        delta_file: str = f'{folder}H2H {self.session_family} - mean delta.csv'
+        with open(wins_file,"w",newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Driver'] + labels)
+            for label, row in zip(labels, self.wins.tolist()):
+                writer.writerow([label] + row)
+        with open(delta_file,"w",newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Driver'] + labels)
+            for label, row in zip(labels, self.mean_time_delta().tolist()):
+                writer.writerow([label] + ['' if np.isnan(delta) else f'{delta:.3f}' for delta in row])
+        logger.info('Head to Head matrix for %s exported to %s and %s',self.session_family,wins_file,delta_file)
+        return [wins_file, delta_file]
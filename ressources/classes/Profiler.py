@@ -0,0 +1,77 @@
+import bisect
+import logging
+import threading
+from typing import Dict, Optional
+from ressources.constants import LATENCY_BUCKETS_MS
+
+logger = logging.getLogger(__name__)
+
+class FunctionProfile:
+    '''Calls, SQL statements, rows and latency histogram of one instrumented function (or of one action)'''
+    def __init__(self,name:str):
+        self.name: str = name
+        self.calls: int = 0
+        self.queries: int = 0
+        self.writes: int = 0
+        self.rows: int = 0
+        self.total_ms: float = 0.0
+        self.max_ms: float = 0.0
+        # One counter per bucket of LATENCY_BUCKETS_MS (constants.py file), plus one for the slower calls
+        self.histogram: list[int] = [0]*(len(LATENCY_BUCKETS_MS) + 1)
+
+    def add(self,queries:int,writes:int,rows:int,elapsed_ms:float) -> None:
+        '''Adds one call'''
+        self.calls += 1
+        self.queries += queries
+        self.writes += writes
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms,elapsed_ms)
+        self.histogram[bisect.bisect_left(LATENCY_BUCKETS_MS,elapsed_ms)] += 1
+
+    def percentile_ms(self,percentile:float) -> Optional[float]:
+        '''Returns the upper bound of the histogram bucket holding the percentile (0.5 for the median), or the slowest call for the last bucket'''
+        if self.calls == 0:
+            return None
+        rank: float = percentile*self.calls
+        seen: int = 0
+        for bucket, count in enumerate(self.histogram):
+            seen += count
+            if seen >= rank:
+                return LATENCY_BUCKETS_MS[bucket] if bucket < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+class Profiler:
+    '''Collects the SQL statements executed on the traced connections, and the time, statements and rows of each instrumented function, per function and per action (e.g. a menu option)'''
+    def __init__(self):
+        self.enabled: bool = False
+        self.functions: Dict[str,FunctionProfile] = {}
+        self.actions: list[tuple[FunctionProfile,Dict[str,FunctionProfile]]] = []
+        self.lock: threading.Lock = threading.Lock()
+        # Statements counters and the stack of the running actions, per thread
+        self.local: threading.local = threading.local()
+
+    def counters(self) -> threading.local:
+        '''Returns the counters of the current thread'''
+        local: threading.local = self.local
+        if not hasattr(local,'queries'):
+            local.queries = 0
+            local.writes = 0
+            local.rows = 0
+            local.actions = []
+        return local
+
+    def record(self,name:str,queries:int,writes:int,rows:int,elapsed_ms:float) -> None:
+        '''Adds one call of an instrumented function, to its totals and to the breakdown of every running action of the thread'''
+        with self.lock:
+            self.functions.setdefault(name,FunctionProfile(name)).add(queries,writes,rows,elapsed_ms)
+            for action, breakdown in self.counters().actions:
+                breakdown.setdefault(name,FunctionProfile(name)).add(queries,writes,rows,elapsed_ms)
+
+    def reset(self) -> None:
+        '''Drops every function and action profile'''
+        with self.lock:
+            self.functions.clear()
+            self.actions.clear()
+
+PROFILER: Profiler = Profiler()
@@ -0,0 +1,51 @@
+import logging
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ReferenceDataCache:
+    '''Read-through cache of the reference tables (Seasons, Drivers, Constructors, Rounds), and of the standings histories pivoted from the rankings tables (DriversRanking, ConstructorsRanking), by connection. A table is loaded whole on the first lookup and kept until a write to that table invalidates it'''
+    def __init__(self):
+        # id(connection) -> (connection, {table: loaded data}), the connection is kept so its id is not reused while cached
+        self.entries: Dict[int,Tuple[sqlite3.Connection,Dict[str,Any]]] = {}
+        self.hits: Dict[str,int] = {}
+        self.misses: Dict[str,int] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def get(self,sql_connection: sqlite3.Connection,table: str,loader: Callable[[sqlite3.Connection],Any]) -> Any:
+        '''Returns the cached data of a table for the connection, calling loader to read it from the DB on a miss'''
+        with self.lock:
+            tables: Dict[str,Any] = self.entries.setdefault(id(sql_connection),(sql_connection,{}))[1]
+            if table in tables:
+                self.hits[table] = self.hits.get(table,0) + 1
+                return tables[table]
+            self.misses[table] = self.misses.get(table,0) + 1
+        data: Any = loader(sql_connection)
+        with self.lock:
+            self.entries.setdefault(id(sql_connection),(sql_connection,{}))[1][table] = data
+        logger.info('Reference data of table %s loaded in cache',table)
+        return data
+
+    def invalidate(self,table: str) -> None:
+        '''Drops the cached data of a table for every connection and every season (cached as "<table>/<season>"), after it was written'''
+        with self.lock:
+            for connection, tables in self.entries.values():
+                for cached_table in [cached_table for cached_table in tables if cached_table == table or cached_table.startswith(f'{table}/')]:
+                    tables.pop(cached_table)
+        logger.info('Reference data of table %s invalidated in cache',table)
+
+    def clear(self) -> None:
+        '''Drops every cached table and connection, and resets the counters'''
+        with self.lock:
+            self.entries.clear()
+            self.hits.clear()
+            self.misses.clear()
+
+    def stats(self) -> Dict[str,Dict[str,int]]:
+        '''Returns the hits and misses of each table'''
+        with self.lock:
+            return {table: {'hits': self.hits.get(table,0), 'misses': self.misses.get(table,0)} for table in sorted(set(self.hits) | set(self.misses))}
+
+REFERENCE_CACHE: ReferenceDataCache = ReferenceDataCache()
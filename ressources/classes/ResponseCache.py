@@ -0,0 +1,44 @@
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    '''Bodies of the HTTP API responses by request, all valid for one data version of the Database (see get_data_version_fromDB). Keeps the max_entries most recently used, and drops them all when the data version changes'''
+    def __init__(self,max_entries: int):
+        self.max_entries: int = max_entries
+        self.version: Optional[int] = None
+        self.entries: OrderedDict[str,bytes] = OrderedDict()
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def set_version(self,version: int) -> bool:
+        '''Moves the cache to a data version, dropping the responses of the previous one. Returns if the version changed'''
+        if version == self.version:
+            return False
+        logger.info('Data version %s replaces %s, %s cached responses dropped',version,self.version,len(self.entries))
+        self.version = version
+        self.entries.clear()
+        return True
+
+    def get(self,key: str) -> Optional[bytes]:
+        '''Returns the cached body of a request, None on a miss'''
+        body: Optional[bytes] = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return body
+
+    def put(self,key: str,body: bytes) -> None:
+        '''Caches the body of a request, dropping the least recently used one beyond max_entries'''
+        self.entries[key] = body
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def stats(self) -> Dict[str,int]:
+        '''Returns the hits, misses and size of the cache'''
+        return {'hits': self.hits,'misses': self.misses,'entries': len(self.entries),'version': -1 if self.version is None else self.version}
@@ -0,0 +1,26 @@
+import logging
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class Season:
+    def __init__(self,season:int,total_races:int,total_sprints:int,race_points:str,sprint_points:str,max_points_race_driver:int,max_points_sprint_driver:int,max_points_race_constructor:int,max_points_sprint_constructor:int):
+        self.season: int = season
+        self.total_races: int = total_races
+        self.total_sprints: int = total_sprints
+        # Points by position as stored in the Seasons Table, separated by spaces (e.g. "25 18 15 12 10 8 6 4 2 1")
+        self.race_points: str = race_points
+        self.sprint_points: str = sprint_points
+        self.max_points_race_driver: int = max_points_race_driver
+        self.max_points_sprint_driver: int = max_points_sprint_driver
+        self.max_points_race_constructor: int = max_points_race_constructor
+        self.max_points_sprint_constructor: int = max_points_sprint_constructor
+
+    def points_table(self,session_type:str) -> Dict[str,int]:
+        '''Returns the points attributed to each position (e.g. {'1': 25, '2': 18}) for a Race or a Sprint of the season, empty for the other sessions'''
+        points: str = self.race_points if session_type == 'Race' else self.sprint_points if session_type == 'Sprint' else ''
+        return {str(position): int(position_points) for position, position_points in enumerate(points.split(),start=1)}
+
+    def max_points(self,session_type:str,cars:int) -> int:
+        '''Returns the most points a competitor with cars cars in the session (1 for a driver, 2 for a constructor) can score in a Race or a Sprint of the season'''
+        return sum(sorted(self.points_table(session_type).values(),reverse=True)[:cars])
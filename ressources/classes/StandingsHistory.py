@@ -0,0 +1,41 @@
+from typing import Dict, Optional, Tuple
+
+class StandingsHistory:
+    '''Standings of a championship ('Drivers' or 'Constructors') of a season after every round, as dense matrices round x competitor (see calculate_standings_history).
+    Row 0 is the start of the season (0 points, no position) and row k the standings after round k. The points being cumulative, each row is the prefix sum of the points scored up to its round: the points scored between two rounds are the difference of their rows'''
+    def __init__(self,championship: str,numbers: list[int],last_round: int,season: int):
+        self.championship: str = championship
+        self.season: int = season
+        self.numbers: list[int] = numbers
+        self.index: Dict[int,int] = {number: i for i, number in enumerate(numbers)}
+        self.last_round: int = last_round
+        size: int = len(numbers)
+        # points[k][i]: points of competitor i after round k, positions[k][i] its position (None without ranking)
+        self.points: list[list[int]] = [[0]*size for _ in range(last_round+1)]
+        self.positions: list[list[Optional[int]]] = [[None]*size for _ in range(last_round+1)]
+
+    def row(self,round_number: int) -> int:
+        '''Row of the standings after a round: the last stored round for the rounds after it, the start of the season for the rounds before the first'''
+        return min(max(round_number,0),self.last_round)
+
+    def points_as_of(self,number: int,round_number: int) -> int:
+        '''Points of a competitor after a round'''
+        return self.points[self.row(round_number)][self.index[number]]
+
+    def position_as_of(self,number: int,round_number: int) -> Optional[int]:
+        '''Position of a competitor after a round, None before the first round'''
+        return self.positions[self.row(round_number)][self.index[number]]
+
+    def standings_as_of(self,round_number: int) -> list[Tuple[int,Optional[int],int]]:
+        '''Number, position and points of every competitor after a round, by position (by number before the first round)'''
+        row: int = self.row(round_number)
+        return sorted(zip(self.numbers,self.positions[row],self.points[row]),key=lambda x: (x[1] is None,x[1] or 0,x[0]))
+
+    def points_between(self,number: int,from_round: int,to_round: int) -> int:
+        '''Points scored by a competitor after from_round up to to_round'''
+        i: int = self.index[number]
+        return self.points[self.row(to_round)][i] - self.points[self.row(from_round)][i]
+
+    def deltas(self,from_round: int,to_round: int) -> Dict[int,int]:
+        '''Points scored by every competitor after from_round up to to_round, by number'''
+        return {number: to_points - from_points for number, to_points, from_points in zip(self.numbers,self.points[self.row(to_round)],self.points[self.row(from_round)])}
@@ -0,0 +1,18 @@
+from dataclasses import dataclass, field
+from typing import Optional
+
+@dataclass(slots=True)
+class StintPace:
+    '''Pace of a car over a stint of a session, calculated from the Laps Table (see calculate_stint_pace). The pace laps exclude the in-lap, the out-lap and the laps without a time; times are in seconds'''
+    car_number: int
+    stint: int
+    first_lap: int
+    last_lap: int
+    laps: int
+    pace_laps: int
+    average: Optional[float] = None
+    best_lap: Optional[float] = None
+    # Fastest rolling average over the window, and the last rolling average minus the first (the pace lost over the stint)
+    best_window: Optional[float] = None
+    fade: Optional[float] = None
+    rolling_pace: list[float] = field(default_factory=list)
@@ -0,0 +1,26 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from ressources.constants import CURRENT_SEASON
+
+@dataclass(slots=True)
+class TeammateBattle:
+    '''Battle between two teammates of a constructor over a season, summarized from the Teammate Comparisons Table (see summarize_teammate_battles). The counters and median gaps are keyed by session family (Q, SQ, Race, Sprint), a gap being the time of the car minus the time of its teammate'''
+    paddock_number: int
+    car_number: int
+    teammate_number: int
+    season: int = CURRENT_SEASON
+    car_ahead: Dict[str,int] = field(default_factory=dict)
+    teammate_ahead: Dict[str,int] = field(default_factory=dict)
+    comparable_sessions: Dict[str,int] = field(default_factory=dict)
+    median_gap: Dict[str,Optional[float]] = field(default_factory=dict)
+    # Points scored in the sessions both drove for the constructor
+    car_points: int = 0
+    teammate_points: int = 0
+
+    @property
+    def points_share(self) -> Optional[float]:
+        '''Share of the points of the pair scored by the car, None if neither scored'''
+        total_points: int = self.car_points + self.teammate_points
+        if total_points == 0:
+            return None
+        return self.car_points / total_points
@@ -0,0 +1,17 @@
+import logging
+from ressources.constants import CURRENT_SEASON
+
+logger = logging.getLogger(__name__)
+
+class TitleProbability:
+    def __init__(self,round_number:int,championship:str,number:int,probability:float,simulations:int,seed:int,season:int=CURRENT_SEASON):
+        self.round_number: int = round_number
+        # 'Drivers' or 'Constructors'
+        self.championship: str = championship
+        # Car number of a driver or paddock number of a constructor
+        self.number: int = number
+        # Share of the simulated seasons won
+        self.probability: float = probability
+        self.simulations: int = simulations
+        self.seed: int = seed
+        self.season: int = season
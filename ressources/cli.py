@@ -0,0 +1,288 @@
+import sys
+import csv
+import json
+import math
+import shlex
+import logging
+import argparse
+import sqlite3
+from typing import Any, Callable, Dict, Optional, TextIO
+from ressources.classes.HeadToHeadMatrix import HeadToHeadMatrix
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.classes.Profiler import PROFILER
+from ressources.instrumentation import profile_action, format_action_report, format_functions_report
+from ressources.main_functions import check_and_initialize_db, import_season, get_championship_labels, build_drivers_h2h_matrix, export_drivers_h2h_matrix, calculate_drivers_h2h_from_store, calculate_championship_outlook, simulate_title_probabilities, build_seed_snapshot, import_season_laps, calculate_session_stint_pace
+from ressources.migrations import SCHEMA_VERSION
+from ressources.records import rankings_records, standings_history_records, teammate_battles_records, session_results_records, h2h_records, head_to_head_records
+from ressources.constants import DATABASE_FILE, RESULTS_FOLDER, EXPORTS_FOLDER, SESSION_FAMILIES, CURRENT_SEASON, SIMULATIONS, CLI_FORMATS, SEED_SNAPSHOT_FILE, VALID_SESSION_TYPES, API_HOST, API_PORT, API_WORKERS, COLUMNAR_FOLDER, LAPS_FOLDER, STINT_PACE_WINDOW
+
+logger = logging.getLogger(__name__)
+
+# Every command returns its output as records (one dictionary per row), written as JSON or CSV by write_records
+
+#############################################################################
+####                          Commands                                   ####
+#############################################################################
+
+def command_import(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Imports every results file of a folder into a season and recalculates its rankings. One record per round imported'''
+    return [{'season': arguments.season,'round_number': round_number} for round_number in import_season(sql_connection,arguments.folder,arguments.workers,arguments.season)]
+
+def command_laps(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Streams every lap file of a folder into the Laps Table of a season. One record per session imported'''
+    return [{'season': arguments.season,'round_number': round_number,'session_type': session_type,'laps': laps} for round_number, session_type, laps in import_season_laps(sql_connection,arguments.folder,arguments.season)]
+
+def command_rankings(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Stored rankings of a championship after a round (the last finished round by default). One record per competitor, by position'''
+    return rankings_records(sql_connection,arguments.championship.capitalize(),arguments.round,arguments.season)
+
+def command_history(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Standings of a championship after every round of a range, with the points scored in each round and since the first round of the range. One record per round and competitor'''
+    return standings_history_records(sql_connection,arguments.championship.capitalize(),getattr(arguments,'from'),arguments.to,arguments.season)
+
+def command_results(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Results of a session of a round. One record per car, classified cars first by position'''
+    return session_results_records(sql_connection,arguments.round,arguments.session,arguments.season)
+
+def command_h2h(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Head to head between two drivers for a session family, from the Database or from the columnar store of the season. One record per session type, with the average delta time of the whole family'''
+    if arguments.store:
+        return head_to_head_records(calculate_drivers_h2h_from_store(sql_connection,arguments.driver1.upper(),arguments.driver2.upper(),arguments.family,arguments.season,arguments.store),arguments.season)
+    return h2h_records(sql_connection,arguments.driver1.upper(),arguments.driver2.upper(),arguments.family,arguments.season)
+
+def command_stints(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Pace of every stint of every car in a session of a round, from its laps. One record per stint, by car and stint'''
+    labels: Dict[int,str] = get_championship_labels(sql_connection,'Drivers',arguments.season)
+    return [{'season': arguments.season,'round_number': arguments.round,'session_type': arguments.session,'number': stint.car_number,'label': labels.get(stint.car_number,str(stint.car_number)),'stint': stint.stint,'first_lap': stint.first_lap,'last_lap': stint.last_lap,'laps': stint.laps,'pace_laps': stint.pace_laps,'average': stint.average,'best_lap': stint.best_lap,'best_window': stint.best_window,'fade': stint.fade} for stint in calculate_session_stint_pace(sql_connection,arguments.round,arguments.session,arguments.window,arguments.season)]
+
+def command_teammates(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Battle of every pair of teammates of every constructor: sessions won and median gap by session family, and share of the points. One record per pair, by constructor'''
+    return teammate_battles_records(sql_connection,arguments.season)
+
+def command_matrix(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Head to head of every pair of drivers for a session family. One record per ordered pair with comparable sessions'''
+    matrix: HeadToHeadMatrix = build_drivers_h2h_matrix(sql_connection,arguments.family,arguments.season)
+    labels: list[str] = matrix.labels()
+    # Python numbers for the JSON and CSV writers, None where no timed session is comparable
+    wins: list[list[int]] = matrix.wins.tolist()
+    comparable_sessions: list[list[int]] = matrix.comparable_sessions.tolist()
+    mean_time_delta: list[list[Optional[float]]] = [[None if math.isnan(delta) else delta for delta in row] for row in matrix.mean_time_delta().tolist()]
+    return [{'season': arguments.season,'session_family': arguments.family,'driver': labels[row],'opponent': labels[column],'wins': wins[row][column],'comparable_sessions': comparable_sessions[row][column],'mean_time_delta': mean_time_delta[row][column]} for row in range(len(labels)) for column in range(len(labels)) if comparable_sessions[row][column]]
+
+def command_export(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Writes the wins and mean delta time head to head matrices of a session family as CSV files in a folder. One record per file written'''
+    matrix: HeadToHeadMatrix = build_drivers_h2h_matrix(sql_connection,arguments.family,arguments.season)
+    return [{'season': arguments.season,'session_family': arguments.family,'file': exported_file} for exported_file in export_drivers_h2h_matrix(matrix,arguments.folder)]
+
+def command_outlook(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Round each competitor was eliminated from each championship and round each championship was clinched. One record per competitor'''
+    records: list[Dict[str,Any]] = []
+    for outlook in calculate_championship_outlook(sql_connection,arguments.season):
+        for number in outlook.labels:
+            records.append({'season': outlook.season,'championship': outlook.championship,'number': number,'label': outlook.label(number),'eliminated_round': outlook.eliminated_rounds.get(number),'champion': number == outlook.champion,'clinched_round': outlook.clinched_round if number == outlook.champion else None})
+    return records
+
+def command_probabilities(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Simulated probabilities of winning each championship after a round (the last finished round by default), stored for their trend. One record per competitor'''
+    drivers_probabilities, constructors_probabilities = simulate_title_probabilities(sql_connection,arguments.round,arguments.simulations,arguments.seed,arguments.workers,arguments.season)
+    records: list[Dict[str,Any]] = []
+    for championship, probabilities in (('Drivers',drivers_probabilities),('Constructors',constructors_probabilities)):
+        labels: Dict[int,str] = get_championship_labels(sql_connection,championship,arguments.season)
+        records.extend({'season': arguments.season,'championship': championship,'number': number,'label': labels.get(number,str(number)),'probability': probability} for number, probability in sorted(probabilities.items(),key=lambda x: (-x[1],x[0])))
+    return records
+
+def command_snapshot(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Builds the seed snapshot copied into place when the Database is missing, from the seed files. One record with the file written'''
+    return [{'file': build_seed_snapshot(arguments.file),'schema_version': SCHEMA_VERSION}]
+
+COMMANDS: Dict[str,Callable[[sqlite3.Connection,argparse.Namespace],list[Dict[str,Any]]]] = {
+    'import': command_import,
+    'laps': command_laps,
+    'rankings': command_rankings,
+    'history': command_history,
+    'results': command_results,
+    'h2h': command_h2h,
+    'stints': command_stints,
+    'teammates': command_teammates,
+    'matrix': command_matrix,
+    'export': command_export,
+    'outlook': command_outlook,
+    'probabilities': command_probabilities,
+    'snapshot': command_snapshot,
+}
+
+#############################################################################
+####                          Parser                                     ####
+#############################################################################
+
+def build_parser() -> argparse.ArgumentParser:
+    '''Builds the parser of the command line: the global options, then an optional command (the interactive menu without one). The commands of a batch file are parsed with the same parser'''
+    parser = argparse.ArgumentParser(description="F1 Stats")
+    parser.add_argument("--log-level",default=None,help="Global log level (DEBUG, INFO, WARNING...), F1STATS_LOG_LEVEL by default")
+    parser.add_argument("--log-levels",default=None,help='Per subsystem log levels, e.g. "database_functions_sqlite3=WARNING,main_functions=DEBUG", F1STATS_LOG_LEVELS by default')
+    parser.add_argument("--quiet-hot-path",action="store_true",default=None,help="Only keeps the summary lines and the warnings of the hot paths, F1STATS_QUIET_HOT_PATH=1 by default")
+    parser.add_argument("--profile",action="store_true",help="Prints the SQL queries, rows and time of each menu action or command, and of each database function on exit")
+    parser.add_argument("--format",choices=CLI_FORMATS,default='json',help="Output format of the commands (json by default)")
+    parser.add_argument("--output",default=None,help="File the output of the commands is written to, standard output by default")
+    parser.add_argument("--database",default=DATABASE_FILE,help="Database file, DATABASE_FILE by default")
+
+    season_parser = argparse.ArgumentParser(add_help=False)
+    season_parser.add_argument("--season",type=int,default=CURRENT_SEASON,help="Season, CURRENT_SEASON by default")
+    commands = parser.add_subparsers(dest="command",metavar="command")
+
+    import_parser = commands.add_parser("import",parents=[season_parser],help="Import every results file of a folder and recalculate the rankings")
+    import_parser.add_argument("--folder",default=RESULTS_FOLDER,help="Folder of the results files, RESULTS_FOLDER by default")
+    import_parser.add_argument("--workers",type=int,default=None,help="Processes parsing the results files")
+
+    laps_parser = commands.add_parser("laps",parents=[season_parser],help="Import every lap file of a folder into the Laps Table")
+    laps_parser.add_argument("--folder",default=LAPS_FOLDER,help="Folder of the lap files, LAPS_FOLDER by default")
+
+    rankings_parser = commands.add_parser("rankings",parents=[season_parser],help="Stored rankings of a championship after a round")
+    rankings_parser.add_argument("championship",nargs="?",choices=['drivers','constructors'],default='drivers')
+    rankings_parser.add_argument("--round",type=int,default=None,help="Round, the last finished round by default")
+
+    history_parser = commands.add_parser("history",parents=[season_parser],help="Standings of a championship after every round")
+    history_parser.add_argument("championship",nargs="?",choices=['drivers','constructors'],default='drivers')
+    history_parser.add_argument("--from",type=int,default=1,help="First round, 1 by default")
+    history_parser.add_argument("--to",type=int,default=None,help="Last round, the last stored round by default")
+
+    results_parser = commands.add_parser("results",parents=[season_parser],help="Results of a session of a round")
+    results_parser.add_argument("round",type=int,help="Round")
+    results_parser.add_argument("session",nargs="?",choices=VALID_SESSION_TYPES,default='Race',help="Session type, Race by default")
+
+    h2h_parser = commands.add_parser("h2h",parents=[season_parser],help="Head to head between two drivers")
+    h2h_parser.add_argument("driver1",help="Trigramme of the first driver, e.g. VER")
+    h2h_parser.add_argument("driver2",help="Trigramme of the second driver, e.g. NOR")
+    h2h_parser.add_argument("--family",choices=list(SESSION_FAMILIES),default='Race',help="Session family, Race by default")
+    h2h_parser.add_argument("--store",nargs="?",const=COLUMNAR_FOLDER,default=None,help="Read the results from the columnar store in this folder (COLUMNAR_FOLDER without a value) instead of the Database")
+
+    stints_parser = commands.add_parser("stints",parents=[season_parser],help="Pace of every stint of a session from its laps")
+    stints_parser.add_argument("round",type=int,help="Round")
+    stints_parser.add_argument("session",nargs="?",choices=VALID_SESSION_TYPES,default='Race',help="Session type, Race by default")
+    stints_parser.add_argument("--window",type=int,default=STINT_PACE_WINDOW,help="Laps of the rolling pace window")
+
+    commands.add_parser("teammates",parents=[season_parser],help="Battle of every pair of teammates of every constructor")
+
+    matrix_parser = commands.add_parser("matrix",parents=[season_parser],help="Head to head of every pair of drivers")
+    matrix_parser.add_argument("--family",choices=list(SESSION_FAMILIES),default='Race',help="Session family, Race by default")
+
+    export_parser = commands.add_parser("export",parents=[season_parser],help="Export the head to head matrices of a session family as CSV files")
+    export_parser.add_argument("--family",choices=list(SESSION_FAMILIES),default='Race',help="Session family, Race by default")
+    export_parser.add_argument("--folder",default=EXPORTS_FOLDER,help="Folder of the CSV files, EXPORTS_FOLDER by default")
+
+    commands.add_parser("outlook",parents=[season_parser],help="Rounds each competitor was eliminated and each championship clinched")
+
+    probabilities_parser = commands.add_parser("probabilities",parents=[season_parser],help="Simulate the probabilities of winning the championships after a round")
+    probabilities_parser.add_argument("--round",type=int,default=None,help="Round, the last finished round by default")
+    probabilities_parser.add_argument("--simulations",type=int,default=SIMULATIONS,help="Seasons simulated, SIMULATIONS by default")
+    probabilities_parser.add_argument("--seed",type=int,default=0,help="Seed of the simulation, 0 by default")
+    probabilities_parser.add_argument("--workers",type=int,default=None,help="Processes simulating the seasons")
+
+    snapshot_parser = commands.add_parser("snapshot",help="Build the seed snapshot a missing Database is copied from")
+    snapshot_parser.add_argument("--file",default=SEED_SNAPSHOT_FILE,help="Snapshot file, SEED_SNAPSHOT_FILE by default")
+
+    serve_parser = commands.add_parser("serve",help="Serve the standings, session results and head to head as a local read-only HTTP API")
+    serve_parser.add_argument("--host",default=API_HOST,help="Address to listen on, API_HOST by default")
+    serve_parser.add_argument("--port",type=int,default=API_PORT,help="Port to listen on, API_PORT by default")
+    serve_parser.add_argument("--workers",type=int,default=API_WORKERS,help="Threads reading the Database, API_WORKERS by default")
+
+    batch_parser = commands.add_parser("batch",help="Run the commands of a file (one per line, # for comments) on a single connection")
+    batch_parser.add_argument("file",help="File of commands, - for the standard input")
+    batch_parser.add_argument("--stop-on-error",action="store_true",help="Stop at the first failed command instead of running the next ones")
+    return parser
+
+#############################################################################
+####                          Output                                     ####
+#############################################################################
+
+def write_records(records:list[Dict[str,Any]],output_format:str,stream:TextIO,command:Optional[str]=None) -> None:
+    '''Writes the records of a command as a JSON array, or as CSV with a header. With the command line of a batch, writes one JSON object per line ({"command", "records"}) or CSV records led by a command column, each command with its own header'''
+    if output_format == 'json':
+        json.dump(records if command is None else {'command': command,'records': records},stream)
+        stream.write('\n')
+        return
+    if command is not None:
+        records = [{'command': command,**record} for record in records]
+    if not records:
+        return
+    writer = csv.DictWriter(stream,fieldnames=list(records[0]),lineterminator='\n')
+    writer.writeheader()
+    writer.writerows(records)
+
+def write_error(error:str,output_format:str,stream:TextIO,command:str) -> None:
+    '''Writes the error of a failed command of a batch, a JSON object ({"command", "error"}) or a CSV record'''
+    if output_format == 'json':
+        json.dump({'command': command,'error': error},stream)
+        stream.write('\n')
+    else:
+        csv.writer(stream,lineterminator='\n').writerows([['command','error'],[command,error]])
+
+#############################################################################
+####                          Runners                                    ####
+#############################################################################
+
+def run_command(sql_connection:sqlite3.Connection,arguments:argparse.Namespace) -> list[Dict[str,Any]]:
+    '''Runs a parsed command, profiled as an action when PROFILER is enabled, and returns its records'''
+    with profile_action(f"command {arguments.command}") as action:
+        records: list[Dict[str,Any]] = COMMANDS[arguments.command](sql_connection,arguments)
+    if action is not None:
+        print('\n'.join(format_action_report(*PROFILER.actions[-1])),file=sys.stderr)
+    return records
+
+def run_batch(sql_connection:sqlite3.Connection,parser:argparse.ArgumentParser,lines:list[str],output_format:str,stream:TextIO,stop_on_error:bool=False) -> int:
+    '''Runs the commands of a batch (one command line per line, blank lines and # comments skipped) one after the other on the same connection and reference data cache, writing the output of each one as it finishes. A failed command is reported in the output and the next ones still run unless stop_on_error is set. Returns the number of failed commands'''
+    failures: int = 0
+    for line in lines:
+        command_line: str = line.strip()
+        if not command_line or command_line.startswith('#'):
+            continue
+        try:
+            arguments: argparse.Namespace = parser.parse_args(shlex.split(command_line))
+            if arguments.command not in COMMANDS:
+                raise ValueError('a command is required' if arguments.command is None else f'{arguments.command} is not allowed in a batch')
+            write_records(run_command(sql_connection,arguments),output_format,stream,command_line)
+        except SystemExit:
+            # argparse already explained the error on the standard error
+            failures += 1
+            write_error('invalid command',output_format,stream,command_line)
+        except Exception as e:
+            failures += 1
+            logger.error('Error %s detected when running the batch command "%s"',e,command_line)
+            write_error(f'{type(e).__name__}: {e}',output_format,stream,command_line)
+        stream.flush()
+        if failures and stop_on_error:
+            break
+    logger.info('Batch of %s lines run with %s failed commands',len(lines),failures,extra={'summary': True})
+    return failures
+
+def run_cli(arguments:argparse.Namespace,parser:argparse.ArgumentParser) -> int:
+    '''Runs the command of the command line (or the commands of a batch file) on a single connection and writes its output as JSON or CSV. Returns the exit status of the program: 0 if every command succeeded'''
+    PROFILER.enabled = arguments.profile
+    sql_connection = check_and_initialize_db(arguments.database)
+    if arguments.command == 'serve':
+        # The API only reads, through its own connections: the writer is only needed to create and migrate the Database
+        sql_connection.close()
+        from ressources.api_server import run_api_server
+        run_api_server(arguments.database,arguments.host,arguments.port,arguments.workers)
+        return 0
+    stream: TextIO = open(arguments.output,"w",newline="") if arguments.output else sys.stdout
+    try:
+        if arguments.command == 'batch':
+            with (sys.stdin if arguments.file == '-' else open(arguments.file)) as batch_file:
+                lines: list[str] = batch_file.readlines()
+            return 1 if run_batch(sql_connection,parser,lines,arguments.format,stream,arguments.stop_on_error) else 0
+        try:
+            records: list[Dict[str,Any]] = run_command(sql_connection,arguments)
+        except Exception as e:
+            logger.error('Error %s detected when running the command %s',e,arguments.command)
+            print(f'Error: {e}',file=sys.stderr)
+            return 1
+        write_records(records,arguments.format,stream)
+        return 0
+    finally:
+        if stream is not sys.stdout:
+            stream.close()
+        logger.info("Reference data cache hits and misses: %s",REFERENCE_CACHE.stats())
+        if PROFILER.enabled:
+            print('\n'.join(format_functions_report()),file=sys.stderr)
+        sql_connection.close()
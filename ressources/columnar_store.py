@@ -0,0 +1,193 @@
+import os
+import sqlite3
+import logging
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+from ressources.classes.ColumnarSeason import ColumnarSeason
+from ressources.classes.Driver import Driver
+from ressources.classes.HeadToHead import HeadToHead
+from ressources.database_functions_sqlite3 import get_data_version_fromDB, get_finished_rounds_fromDB, get_columnar_results_fromDB, get_columnar_drivers_ranking_fromDB, get_columnar_constructors_ranking_fromDB
+from ressources.constants import CURRENT_SEASON, COLUMNAR_FOLDER, VALID_SESSION_TYPES, SESSION_FAMILIES, STATUS_DNF, STATUS_DNS, STATUS_DSQ
+
+logger = logging.getLogger(__name__)
+
+# The columnar store keeps, for each season, every column of the results and rankings of the finished rounds in its own NumPy file
+# ("<season>-<table>-<column>.npy", the type and byte order in its header), ordered by round, and a manifest ("<season>-manifest.npz") with the
+# finished rounds, the rows of each table and the data version of the Database they were read at. It is a cache of the Database: it can be deleted at any time
+
+# Session type of the results as a code: its index in VALID_SESSION_TYPES
+SESSION_CODES: Dict[str,int] = {session_type: code for code, session_type in enumerate(VALID_SESSION_TYPES)}
+# Status of the results without a status (Databases from before the typed columns)
+STATUS_UNKNOWN: int = -1
+# Results status without any time, as is_not_time_result (helper_functions.py)
+NOT_TIME_STATUS: Tuple[int,...] = (STATUS_DNF,STATUS_DNS,STATUS_DSQ)
+# Beyond any position stored in an int16 column
+NO_POSITION: int = 1 << 15
+
+def result_row(row:Tuple) -> Tuple:
+    '''Converts a row of get_columnar_results_fromDB into the values of its columns: session code, 0 for no position, STATUS_UNKNOWN for no status and NaN for no time'''
+    round_number, car_number, paddock_number, session_type, position, status, time_seconds, car_points = row
+    return (round_number,car_number,paddock_number,SESSION_CODES[session_type],position or 0,STATUS_UNKNOWN if status is None else status,float('nan') if time_seconds is None else time_seconds,car_points or 0)
+
+# Table -> (columns (name, type), fetcher of the rows of the finished rounds from a round, converter of a row into its column values)
+COLUMNAR_TABLES: Dict[str,Tuple[list[Tuple[str,type]],Callable[[sqlite3.Connection,int,int],list[Tuple]],Optional[Callable[[Tuple],Tuple]]]] = {
+    'results': ([('round_number',np.int16),('car_number',np.int16),('paddock_number',np.int16),('session_code',np.int8),('position',np.int16),('status',np.int8),('time_seconds',np.float64),('points',np.int16)],get_columnar_results_fromDB,result_row),
+    'drivers_ranking': ([('round_number',np.int16),('number',np.int16),('position',np.int16),('points',np.int32)],get_columnar_drivers_ranking_fromDB,None),
+    'constructors_ranking': ([('round_number',np.int16),('number',np.int16),('position',np.int16),('points',np.int32)],get_columnar_constructors_ranking_fromDB,None),
+}
+
+#############################################################################
+####                          Files                                      ####
+#############################################################################
+
+def column_file(folder:str,season:int,table:str,column:str) -> str:
+    '''Returns the path of the file of a column of a table of a season'''
+    return f'{folder}{season}-{table}-{column}.npy'
+
+def manifest_file(folder:str,season:int) -> str:
+    '''Returns the path of the manifest of a season'''
+    return f'{folder}{season}-manifest.npz'
+
+def read_column(folder:str,season:int,table:str,column:str) -> np.ndarray:
+    '''Memory maps the file of a column read-only: only the pages of the rows used are read'''
+    return np.load(column_file(folder,season,table,column),mmap_mode='r')
+
+def write_column(folder:str,season:int,table:str,column:str,values:np.ndarray) -> None:
+    '''Writes the file of a column through a temporary file, so a reader never sees it half written'''
+    path: str = column_file(folder,season,table,column)
+    with open(path + '.tmp','wb') as column_tmp:
+        np.save(column_tmp,values)
+    os.replace(path + '.tmp',path)
+
+def load_manifest(folder:str,season:int) -> Optional[Dict[str,Any]]:
+    '''Reads the manifest of a season (finished rounds, rows of each table, data version), None if the season was never stored'''
+    try:
+        with np.load(manifest_file(folder,season)) as manifest:
+            return {'rounds': manifest['rounds'].tolist(),'rows': dict(zip(manifest['tables'].tolist(),manifest['rows'].tolist())),'data_version': int(manifest['data_version'])}
+    except FileNotFoundError:
+        return None
+
+def write_manifest(folder:str,season:int,manifest:Dict[str,Any]) -> None:
+    '''Writes the manifest of a season through a temporary file, so a reader never sees it half written'''
+    path: str = manifest_file(folder,season)
+    with open(path + '.tmp','wb') as manifest_tmp:
+        np.savez(manifest_tmp,rounds=np.array(manifest['rounds'],dtype=np.int16),tables=np.array(list(manifest['rows'])),rows=np.array(list(manifest['rows'].values()),dtype=np.int64),data_version=np.int64(manifest['data_version']))
+    os.replace(path + '.tmp',path)
+
+def files_match_manifest(folder:str,season:int,manifest:Dict[str,Any]) -> bool:
+    '''Checks that every column file has the type of COLUMNAR_TABLES and the rows of the manifest: a refresh stopped half way leaves them apart, and a store written with other types is rebuilt'''
+    for table, (columns, fetcher, converter) in COLUMNAR_TABLES.items():
+        for name, dtype in columns:
+            if not os.path.exists(column_file(folder,season,table,name)):
+                return False
+            column: np.ndarray = read_column(folder,season,table,name)
+            if column.dtype != dtype or column.shape != (manifest['rows'].get(table,0),):
+                return False
+    return True
+
+#############################################################################
+####                          Refresh                                    ####
+#############################################################################
+
+def stored_rows_before(folder:str,season:int,table:str,rows:int,first_round:int) -> int:
+    '''Returns the rows of a table stored for the rounds before first_round, by bisection on its round column'''
+    if rows == 0:
+        return 0
+    return int(np.searchsorted(read_column(folder,season,table,'round_number'),first_round,side='left'))
+
+def refresh_columnar_season(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON,folder:str=COLUMNAR_FOLDER,from_round:Optional[int]=None) -> int:
+    '''Brings the columnar store of a season up to date with the Database, with one query per table: keeps the rows stored before the first round finished since the last refresh (or before from_round, a round re-imported or corrected) and reads the rows of the finished rounds from there.
+    Nothing is read when the data version of the Database has not changed since the last refresh. A change inside a round already stored is only picked up with from_round. The whole season is rebuilt if it was never stored or if its files do not match the manifest. Returns the rows written'''
+    manifest: Optional[Dict[str,Any]] = load_manifest(folder,season)
+    data_version: int = get_data_version_fromDB(sql_connection)
+    rebuild: bool = manifest is None or not files_match_manifest(folder,season,manifest)
+    if not rebuild and from_round is None and manifest['data_version'] == data_version:
+        logger.info('Columnar store of season %s is up to date at data version %s',season,data_version)
+        return 0
+    finished_rounds: list[int] = [round_number for round_number, round_type in get_finished_rounds_fromDB(sql_connection,season)]
+    if rebuild:
+        first_round: int = 1
+    else:
+        # Rounds finished since the last refresh, in any order, and stored rounds no longer finished are read again from the first of them
+        changed_rounds: set = set(finished_rounds).symmetric_difference(manifest['rounds'])
+        if from_round is not None:
+            changed_rounds.add(from_round)
+        if not changed_rounds:
+            manifest['data_version'] = data_version
+            write_manifest(folder,season,manifest)
+            return 0
+        first_round = min(changed_rounds)
+    os.makedirs(folder,exist_ok=True)
+    rows: Dict[str,int] = {}
+    written: int = 0
+    for table, (columns, fetcher, converter) in COLUMNAR_TABLES.items():
+        kept: int = 0 if rebuild else stored_rows_before(folder,season,table,manifest['rows'][table],first_round)
+        table_rows: list[Tuple] = fetcher(sql_connection,first_round,season)
+        if converter is not None:
+            table_rows = [converter(row) for row in table_rows]
+        # One record per row, each column then being a field of the records
+        records: np.ndarray = np.array(table_rows,dtype=np.dtype(columns))
+        for name, dtype in columns:
+            values: np.ndarray = records[name]
+            if kept:
+                values = np.concatenate((read_column(folder,season,table,name)[:kept],values))
+            write_column(folder,season,table,name,values)
+        rows[table] = kept + len(table_rows)
+        written += len(table_rows)
+    write_manifest(folder,season,{'rounds': finished_rounds,'rows': rows,'data_version': data_version})
+    logger.info('Columnar store of season %s refreshed from round No. %s: %s rows written, %s rows stored',season,first_round,written,rows,extra={'summary': True})
+    return written
+
+#############################################################################
+####                          Reads                                      ####
+#############################################################################
+
+def open_columnar_season(season:int=CURRENT_SEASON,folder:str=COLUMNAR_FOLDER) -> ColumnarSeason:
+    '''Opens the columnar store of a season, memory mapping every column file read-only (see ColumnarSeason). Raises FileNotFoundError if the season was never stored'''
+    manifest: Optional[Dict[str,Any]] = load_manifest(folder,season)
+    if manifest is None:
+        raise FileNotFoundError(manifest_file(folder,season))
+    store: ColumnarSeason = ColumnarSeason(season,max(manifest['rounds'],default=0))
+    for table, (columns, fetcher, converter) in COLUMNAR_TABLES.items():
+        for name, dtype in columns:
+            store.add_column(table,name,read_column(folder,season,table,name))
+    return store
+
+def columnar_h2h(store:ColumnarSeason,driver1:Driver,driver2:Driver,session_family:str,first_round:int=1,last_round:Optional[int]=None) -> HeadToHead:
+    '''Head to head between two drivers for a session family over a range of rounds, read from the columns of the results, with the rules of compare_results_H2H (helper_functions.py): sessions where neither driver had a time are not comparable, a driver without a time is behind, and the delta time only counts sessions both drivers finished with a time'''
+    head_to_head: HeadToHead = HeadToHead(driver1,driver2)
+    rows: slice = store.round_rows('results',first_round,last_round)
+    codes: list[int] = [SESSION_CODES[session_type] for session_type in SESSION_FAMILIES[session_family]]
+    cars: np.ndarray = store.column('results','car_number')[rows]
+    sessions: np.ndarray = store.column('results','session_code')[rows]
+    in_family: np.ndarray = np.isin(sessions,codes)
+    rows_driver1: np.ndarray = np.flatnonzero(in_family & (cars == driver1.car_number))
+    rows_driver2: np.ndarray = np.flatnonzero(in_family & (cars == driver2.car_number))
+    for session_code in np.concatenate((sessions[rows_driver2],sessions[rows_driver1])).tolist():
+        head_to_head.add_session_type(VALID_SESSION_TYPES[session_code])
+    # A session is a (round, session code) key, the rows of both drivers being joined on it
+    keys: np.ndarray = store.column('results','round_number')[rows].astype(np.int64)*len(VALID_SESSION_TYPES) + sessions
+    common_keys, joined1, joined2 = np.intersect1d(keys[rows_driver1],keys[rows_driver2],assume_unique=True,return_indices=True)
+    row1: np.ndarray = rows_driver1[joined1]
+    row2: np.ndarray = rows_driver2[joined2]
+    statuses: np.ndarray = store.column('results','status')[rows]
+    times: np.ndarray = store.column('results','time_seconds')[rows]
+    # Classified drivers without a position (0) are behind
+    positions: np.ndarray = store.column('results','position')[rows].astype(np.int32)
+    positions[positions == 0] = NO_POSITION
+    d1_not_time: np.ndarray = np.isin(statuses[row1],NOT_TIME_STATUS) & np.isnan(times[row1])
+    d2_not_time: np.ndarray = np.isin(statuses[row2],NOT_TIME_STATUS) & np.isnan(times[row2])
+    comparable: np.ndarray = ~(d1_not_time & d2_not_time)
+    driver1_ahead: np.ndarray = comparable & (d2_not_time | (~d1_not_time & (positions[row1] < positions[row2])))
+    driver2_ahead: np.ndarray = comparable & ~driver1_ahead
+    session_codes: np.ndarray = common_keys % len(VALID_SESSION_TYPES)
+    for counters, selected in [(head_to_head.comparable_sessions,comparable),(head_to_head.driver1_ahead,driver1_ahead),(head_to_head.driver2_ahead,driver2_ahead)]:
+        for session_code, count in enumerate(np.bincount(session_codes[selected],minlength=len(VALID_SESSION_TYPES)).tolist()):
+            if count:
+                counters[VALID_SESSION_TYPES[session_code]] += count
+    # NaN for a classified driver without a time (e.g. Lapped), and for a driver without a time
+    deltas: np.ndarray = times[row1] - times[row2]
+    timed: np.ndarray = ~np.isnan(deltas)
+    head_to_head.time_delta_sum += float(deltas[timed].sum())
+    head_to_head.time_delta_count += int(timed.sum())
+    return head_to_head
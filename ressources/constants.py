@@ -15,8 +15,63 @@ VALID_SESSION_TYPES: list[str] = ['Race','Q1','Q2','Q3','Sprint','SQ1','SQ2','SQ
 TOTAL_RACES: int = 24
 TOTAL_SPRINTS: int = 6
 MAX_POINTS_RACE_DRIVER: int = 25
-MAX_POINTS_SPRINT_DRIVER: int = 25
+MAX_POINTS_SPRINT_DRIVER: int = 8
 MAX_POINTS_RACE_CONSTRUCTOR: int = 43
 MAX_POINTS_SPRINT_CONSTRUCTOR: int = 15
 RACE_POINTS: Dict[str, int] = {'1': 25,'2': 18,'3': 15,'4': 12,'5': 10,'6': 8,'7': 6,'8': 4,'9': 2,'10': 1,'11': 0,'12': 0,'13': 0,'14': 0,'15': 0,'16': 0,'17': 0,'18': 0,'19': 0,'20': 0,'NC': 0,'DQ':0}
 SPRINT_POINTS: Dict[str, int] = {'1': 8,'2': 7,'3': 6,'4': 5,'5': 4,'6': 3,'7': 2,'8': 1,'9': 0,'10': 0,'11': 0,'12': 0,'13': 0,'14': 0,'15': 0,'16': 0,'17': 0,'18': 0,'19': 0,'20': 0,'NC': 0,'DQ':0}
+SESSION_FAMILIES: Dict[str, list[str]] = {'Q': ['Q1','Q2','Q3'],'SQ': ['SQ1','SQ2','SQ3'],'Race': ['Race'],'Sprint': ['Sprint']}
+EXPORTS_FOLDER: str = ".\\data\\exports\\"
+STATUS_FINISHED: int = 0
+STATUS_DNF: int = 1
+STATUS_DNS: int = 2
+STATUS_DSQ: int = 3
+STATUS_NC: int = 4
+STATUS_LAPPED: int = 5
+RESULT_STATUS: Dict[str, int] = {'DNF': STATUS_DNF,'DNS': STATUS_DNS,'DSQ': STATUS_DSQ,'NC': STATUS_NC,'DQ': STATUS_DSQ,'Lapped': STATUS_LAPPED}
+SQLITE_PRAGMAS: Dict[str, str] = {'journal_mode': 'WAL','synchronous': 'NORMAL','cache_size': '-65536','temp_store': 'MEMORY','mmap_size': '268435456','foreign_keys': 'OFF'}
+LOG_LEVEL_ENV: str = 'F1STATS_LOG_LEVEL'
+LOG_LEVELS_ENV: str = 'F1STATS_LOG_LEVELS'
+QUIET_HOT_PATH_ENV: str = 'F1STATS_QUIET_HOT_PATH'
+HOT_PATH_LOGGERS: list[str] = ['ressources.database_functions_sqlite3','ressources.helper_functions','ressources.main_functions','ressources.time_parsing','ressources.classes']
+BENCHMARKS_FOLDER: str = ".\\data\\benchmarks\\"
+BENCHMARK_SIZES: list[tuple[int,int]] = [(5,20),(24,20),(24,40)]
+BENCHMARK_TOLERANCE: float = 0.25
+LATENCY_BUCKETS_MS: list[float] = [0.1,0.25,0.5,1,2.5,5,10,25,50,100,250,500,1000,2500]
+# Most SQL queries allowed for each step of the benchmark suite, whatever the number of drivers and rounds
+QUERY_BUDGETS: Dict[str, int] = {'drivers_standings': 1,'constructors_standings': 1,'recalculate_rankings': 8,'championship_outlook': 2,'title_probabilities': 4,'standings_history': 1,'teammate_refresh': 1,'teammate_battles': 1,'laps_import': 0,'stint_pace': 1,'h2h_pair': 4,'columnar_refresh': 5,'h2h_pair_columnar': 0,'h2h_matrix_q': 2,'h2h_matrix_race': 2}
+CURRENT_SEASON: int = 2025
+SEASONS_FILE: str = '.\\data\\Seasons.csv'
+SEASONS_COLUMNS: list[str] = ['season','total_races','total_sprints','race_points','sprint_points','max_points_race_driver','max_points_sprint_driver','max_points_race_constructor','max_points_sprint_constructor']
+# Cars of a constructor in each session, and nodes explored at most by an exact championship check before keeping the bound (see championship_math.py)
+CARS_PER_CONSTRUCTOR: int = 2
+CHAMPIONSHIP_SEARCH_NODES: int = 50000
+# Monte Carlo simulation of the title (see season_simulator.py): form scale of the Plackett-Luce strengths, decay of the form per round, seasons simulated per chunk (one seed each) and by default
+SIMULATION_FORM_SCALE: float = 4.0
+SIMULATION_FORM_DECAY: float = 0.8
+SIMULATION_CHUNK: int = 5000
+SIMULATIONS: int = 100000
+# Output formats of the command line commands (see cli.py)
+CLI_FORMATS: list[str] = ['json','csv']
+# Seed files of a new Database by kind, and the prebuilt snapshot of the seeded Database copied into place when it is up to date (see build_seed_snapshot)
+SEED_FILES: Dict[str, str] = {'seasons': SEASONS_FILE,'drivers': DRIVERS_FILE,'constructors': CONSTRUCTORS_FILE,'rounds': ROUNDS_FILE}
+SEED_SNAPSHOT_FILE: str = '.\\data\\database\\seed-snapshot.sqlite'
+MENU_PROMPT: str = 'Enter your choice (1 - 0):'
+# Most milliseconds allowed to reach the menu prompt, interpreter startup included (see measure_startup in benchmark_suite.py)
+STARTUP_BUDGETS_MS: Dict[str, float] = {'cold_start_csv': 300,'cold_start_snapshot': 300,'warm_start': 250}
+# Local read-only HTTP API (see api_server.py): address, port, threads reading the Database and responses kept for the current data version
+API_HOST: str = '127.0.0.1'
+API_PORT: int = 8080
+API_WORKERS: int = 4
+API_CACHE_SIZE: int = 256
+# Columnar store of the results and rankings of each season (see columnar_store.py)
+COLUMNAR_FOLDER: str = ".\\data\\columnar\\"
+# Results of the memory and fetch throughput comparison of the records in the benchmark suite (see measure_records)
+RECORDS_BENCHMARK_ROWS: int = 25000
+# Lap by lap data (see lap_data.py): one "ROUND n - <session> laps.csv" file per session, rows written per chunk, and laps of the rolling pace window of a stint
+LAPS_FOLDER: str = ".\\data\\laps\\"
+LAPS_COLUMNS: list[str] = ['Lap','No','Time','Pos','Pit']
+LAPS_CHUNK_ROWS: int = 5000
+STINT_PACE_WINDOW: int = 5
+# Pit cells of a lap file marking an in-lap
+LAPS_PIT_FLAGS: list[str] = ['1','Y','YES','TRUE','PIT']
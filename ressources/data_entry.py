@@ -1,9 +1,8 @@
 import re
 import logging
-from ressources.constants import LOG_FILE, LOG_FORMAT, VALID_SESSION_TYPES
+from ressources.constants import VALID_SESSION_TYPES, SESSION_FAMILIES
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format=LOG_FORMAT)
 
 def get_driver_trigramme() -> str:
     driver_trigramme: str = input('Driver trigramme: ')
@@ -14,7 +13,7 @@ def get_driver_trigramme() -> str:
         return driver_trigramme
     except ValueError as e:
         print(e)
-        logger.warning(f'Wrong trigramme selected: {driver_trigramme}')
+        logger.warning('Wrong trigramme selected: %s',driver_trigramme)
         return get_driver_trigramme()
 
 def get_driver_car_number() -> int:
@@ -25,7 +24,7 @@ def get_driver_car_number() -> int:
         return driver_car_number
     except ValueError as e:
         print(e)
-        logger.warning(f'Wrong car number selected: {driver_car_number}')
+        logger.warning('Wrong car number selected: %s',driver_car_number)
         return get_driver_car_number()
 
 def get_round_number() -> int:
@@ -36,7 +35,7 @@ def get_round_number() -> int:
         return round_number
     except ValueError as e:
         print(e)
-        logger.warning(f'Wrong round number selected: {round_number}')
+        logger.warning('Wrong round number selected: %s',round_number)
         return get_round_number()
     
 def get_session_type() -> str:
@@ -47,5 +46,16 @@ def get_session_type() -> str:
         return session_type
     except ValueError as e:
         print(e)
-        logger.warning(f'Wrong session type: {session_type}')
+        logger.warning('Wrong session type: %s',session_type)
         return get_session_type()
+
+def get_session_family() -> str:
+    try:
+        session_family: str = input("Session family:")
+        if session_family not in SESSION_FAMILIES:
+            raise ValueError(f'Invalid session family, please select a valid one, between this list: {list(SESSION_FAMILIES.keys())}')
+        return session_family
+    except ValueError as e:
+        print(e)
+        logger.warning('Wrong session family: %s',session_family)
+        return get_session_family()
@@ -1,309 +1,589 @@
+import os
 import sqlite3
 import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
 from ressources.classes.Constructor import Constructor
 from ressources.classes.ConstructorRanking import ConstructorRanking
 from ressources.classes.Driver import Driver
 from ressources.classes.DriverRanking import DriverRanking
 from ressources.classes.Result import Result
 from ressources.classes.Round import Round
-from ressources.constants import LOG_FILE,LOG_FORMAT,TOTAL_RACES,TOTAL_SPRINTS
+from ressources.classes.Season import Season
+from ressources.classes.TitleProbability import TitleProbability
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.time_parsing import parse_time_column
+from ressources.db_connection import open_writer_connection, transaction
+from ressources.instrumentation import instrument_functions
+from ressources.constants import CURRENT_SEASON,TOTAL_RACES,TOTAL_SPRINTS,RACE_POINTS,SPRINT_POINTS,MAX_POINTS_RACE_DRIVER,MAX_POINTS_SPRINT_DRIVER,MAX_POINTS_RACE_CONSTRUCTOR,MAX_POINTS_SPRINT_CONSTRUCTOR
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format=LOG_FORMAT)
 
 #############################################################################
 ####                    Initalize DB                                     ####
 #############################################################################
 
-def initialize_db(filename:str) -> sqlite3.Connection:
-    '''Initialises the database with the required tables of Drivers, Constructors, Rounds, Results, DriversRanking and ConstructorsRanking'''
-    logger.info(f"Creating and connecting to {filename}.")
-    try:
-        sql_connection = sqlite3.connect(filename)
-    except sqlite3.OperationalError as e:
-        logger.critical(f"Error accesing the DB: {e}")
-        exit()
-    sql_cursor = sql_connection.cursor()
-    logger.info(f"Creating tables in the database.")
-    sql_cursor.executescript('''
-        CREATE TABLE Drivers (
+# Columns of each table, with the season leading every key so the lookups of a season stay on an index range as the history grows.
+# The key of Results follows the results of a driver by session type, like idx_results_car_session (see migrations.py), so it never competes with it
+TABLES_SCHEMA: Dict[str,str] = {
+    'Seasons': '''
+            season INTEGER PRIMARY KEY,
+            total_races INT,
+            total_sprints INT,
+            race_points TEXT,
+            sprint_points TEXT,
+            max_points_race_driver INT,
+            max_points_sprint_driver INT,
+            max_points_race_constructor INT,
+            max_points_sprint_constructor INT''',
+    'Drivers': '''
             id     INTEGER PRIMARY KEY,
+            season INT,
             name   TEXT,
             trigramme TEXT,
-            car_number INTEGER UNIQUE,
-            nationality TEXT                         
-        );
-
-        CREATE TABLE Constructors (
+            car_number INTEGER,
+            nationality TEXT,
+            UNIQUE (season, car_number)''',
+    'Constructors': '''
             id     INTEGER PRIMARY KEY,
+            season INT,
             full_name  TEXT,
             result_name  TEXT,
             short_name TEXT,
-            paddock_number INTEGER UNIQUE
-        );
-        CREATE TABLE Rounds (
+            paddock_number INTEGER,
+            UNIQUE (season, paddock_number)''',
+    'Rounds': '''
             id     INTEGER PRIMARY KEY,
+            season INT,
             round_name  TEXT,
             country TEXT,
             circuit TEXT,
             round_date TEXT,
             round_type TEXT,
-            round_finished BOOLEAN,                                              
-            round_number INTEGER UNIQUE
-            
-        );
-        CREATE TABLE Results (
+            round_finished BOOLEAN,
+            round_number INTEGER,
+            UNIQUE (season, round_number)''',
+    'Results': '''
+            season INT,
             round_number  INT,
             car_position TEXT,
             car_number INT,
             paddock_number INT,
             session_type TEXT,
             result_time TEXT,
-            car_points INT,                            
-            PRIMARY KEY (round_number,car_number,session_type)
-        );
-        CREATE TABLE ConstructorsRanking (
+            car_points INT,
+            time_seconds REAL,
+            status INT,
+            position INT,
+            PRIMARY KEY (season,car_number,session_type,round_number)''',
+    'ConstructorsRanking': '''
+            season INT,
             round_number INT,
             paddock_number INT,
             constructor_position INT,
             constructor_points INT,
             championship_chance BOOLEAN,
-            PRIMARY KEY (round_number, paddock_number)
-        );
-        CREATE TABLE DriversRanking (
+            PRIMARY KEY (season, round_number, paddock_number)''',
+    'DriversRanking': '''
+            season INT,
             round_number INT,
             car_number INT,
             car_position INT,
             car_points INT,
             championship_chance BOOLEAN,
-            PRIMARY KEY (round_number, car_number)
-        )
-    ''')
-    logger.info(f"Tables Drivers, Rounds, and Constructors created in DB.")
+            PRIMARY KEY (season, round_number, car_number)''',
+    'TitleProbabilities': '''
+            season INT,
+            round_number INT,
+            championship TEXT,
+            number INT,
+            probability REAL,
+            simulations INT,
+            seed INT,
+            PRIMARY KEY (season, round_number, championship, number)''',
+    'Laps': '''
+            season INT,
+            round_number INT,
+            session_type TEXT,
+            car_number INT,
+            lap_number INT,
+            lap_time TEXT,
+            time_seconds REAL,
+            status INT,
+            position INT,
+            pit BOOLEAN,
+            PRIMARY KEY (season, round_number, session_type, car_number, lap_number)''',
+    'TeammateComparisons': '''
+            season INT,
+            round_number INT,
+            session_family TEXT,
+            paddock_number INT,
+            car_number INT,
+            teammate_number INT,
+            session_type TEXT,
+            ahead INT,
+            time_delta REAL,
+            car_points INT,
+            teammate_points INT,
+            PRIMARY KEY (season, round_number, session_family, paddock_number, car_number, teammate_number)''',
+    'Metadata': '''
+            key TEXT PRIMARY KEY,
+            value INT'''
+}
+# Tables without a season column
+SEASONLESS_TABLES: list[str] = ['Seasons','Metadata']
+# Tables written in bulk (thousands of rows per session), whose writers bump the data version once per transaction instead of a trigger per row (see create_data_version_triggers)
+BULK_TABLES: list[str] = ['Laps']
+
+#### Row factories ####
+
+# Build the records straight from the rows of a cursor (sql_cursor.row_factory), the columns being selected in the order of the fields of the record
+
+def result_factory(sql_cursor:sqlite3.Cursor,row:tuple) -> Result:
+    return Result(*row)
+
+def driver_factory(sql_cursor:sqlite3.Cursor,row:tuple) -> Driver:
+    return Driver(*row)
+
+def constructor_factory(sql_cursor:sqlite3.Cursor,row:tuple) -> Constructor:
+    return Constructor(*row)
+
+def season_factory(sql_cursor:sqlite3.Cursor,row:tuple) -> Season:
+    return Season(*row)
+
+def driver_ranking_factory(sql_cursor:sqlite3.Cursor,row:tuple) -> DriverRanking:
+    '''The championship chance is stored as an integer'''
+    return DriverRanking(row[0],row[1],row[2],row[3],bool(row[4]),row[5])
+
+def constructor_ranking_factory(sql_cursor:sqlite3.Cursor,row:tuple) -> ConstructorRanking:
+    '''The championship chance is stored as an integer'''
+    return ConstructorRanking(row[0],row[1],row[2],row[3],bool(row[4]),row[5])
+
+def initialize_db(filename:str) -> sqlite3.Connection:
+    '''Initialises the database with the required tables of Seasons, Drivers, Constructors, Rounds, Results, DriversRanking, ConstructorsRanking, TitleProbabilities, Laps, TeammateComparisons and Metadata (see TABLES_SCHEMA)'''
+    logger.info("Creating and connecting to %s.",filename)
+    sql_connection = open_writer_connection(filename)
+    logger.info("Creating tables in the database.")
+    with transaction(sql_connection) as sql_cursor:
+        for table, columns in TABLES_SCHEMA.items():
+            sql_cursor.execute(f'''CREATE TABLE {table} ({columns})''')
+    logger.info("Tables %s created in DB.",', '.join(TABLES_SCHEMA))
     return sql_connection
 
+def create_data_version_triggers(sql_connection:sqlite3.Connection) -> None:
+    '''Creates the data version of the Database in the Metadata Table, and the triggers that bump it on every insert, update or delete in the other tables (whatever the writer: these functions or another process), so readers can tell that their cached data is stale. The writers of BULK_TABLES bump it themselves (see bump_data_version). Runs in the transaction of the caller.
+    A table rebuilt by a later migration loses its triggers, which this function creates again. A table of TABLES_SCHEMA not created yet (added after migration 7) is skipped: its own migration calls this function once it is created'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute(f'''CREATE TABLE IF NOT EXISTS Metadata ({TABLES_SCHEMA['Metadata']})''')
+    sql_cursor.execute('''INSERT OR IGNORE INTO Metadata (key,value) VALUES ('data_version',0)''')
+    sql_cursor.execute('''SELECT name FROM sqlite_master WHERE type = 'table' ''')
+    tables: list[str] = [row[0] for row in sql_cursor.fetchall()]
+    for table in TABLES_SCHEMA:
+        if table == 'Metadata' or table in BULK_TABLES or table not in tables:
+            continue
+        for event in ['INSERT','UPDATE','DELETE']:
+            sql_cursor.execute(f'''CREATE TRIGGER IF NOT EXISTS data_version_{table}_{event.lower()} AFTER {event} ON {table} BEGIN UPDATE Metadata SET value = value + 1 WHERE key = 'data_version'; END''')
+
+def bump_data_version(sql_cursor:sqlite3.Cursor) -> None:
+    '''Bumps the data version once for a whole write to one of BULK_TABLES, in the transaction of the cursor'''
+    sql_cursor.execute('''UPDATE Metadata SET value = value + 1 WHERE key = 'data_version' ''')
+
+def get_data_version_fromDB(sql_connection:sqlite3.Connection) -> int:
+    '''Fetches the data version of the Database, bumped by every write to its tables (see create_data_version_triggers)'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT value FROM Metadata WHERE key = 'data_version' ''')
+    row = sql_cursor.fetchone()
+    return 0 if row is None else int(row[0])
+
+def create_snapshot_fromDB(sql_connection:sqlite3.Connection,filename:str) -> None:
+    '''Writes a compacted copy of the Database to filename with VACUUM INTO, replacing the file if it exists'''
+    if os.path.isfile(filename):
+        os.remove(filename)
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''VACUUM INTO ?''',(filename,))
+    logger.info('Snapshot of the Database written to %s',filename)
+
+def migrate_results_typed_columns(sql_connection:sqlite3.Connection) -> None:
+    '''Adds the typed columns time_seconds (REAL), status (INT) and position (INT) to the Results Table of a Database created before they existed, and fills them from result_time and car_position, in a single transaction'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''PRAGMA table_info(Results)''')
+    columns: list[str] = [column[1] for column in sql_cursor.fetchall()]
+    missing_columns: list[str] = [f'{name} {sql_type}' for name, sql_type in [('time_seconds','REAL'),('status','INT'),('position','INT')] if name not in columns]
+    if not missing_columns:
+        return
+    logger.info('Migrating Results Table, adding columns %s',missing_columns)
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            for column in missing_columns:
+                sql_cursor.execute(f'''ALTER TABLE Results ADD COLUMN {column}''')
+            sql_cursor.execute('''SELECT rowid, car_position, result_time FROM Results''')
+            rows: list = sql_cursor.fetchall()
+            times, statuses = parse_time_column([str(row[2]) for row in rows],[str(row[1]) for row in rows])
+            sql_cursor.executemany('''UPDATE Results SET time_seconds = ?, status = ?, position = ? WHERE rowid = ?''',[(None if time_seconds != time_seconds else time_seconds,status,int(row[1]) if str(row[1]).isdigit() else None,row[0]) for row, time_seconds, status in zip(rows,times.tolist(),statuses.tolist())])
+    except sqlite3.Error as e:
+        logger.critical('Error %s detected when migrating the Results Table, migration rolled back',e)
+        raise
+    logger.info('Results Table migrated, %s results filled with typed columns',len(rows))
+
+def migrate_season_dimension(sql_connection:sqlite3.Connection) -> None:
+    '''Adds the season dimension to a Database created for a single season: creates the Seasons Table with the rules of CURRENT_SEASON from the constants.py file, and rebuilds every other table with a season column (the keys of TABLES_SCHEMA, led by the season), the existing rows being attributed to CURRENT_SEASON. Runs in the transaction of the caller'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT name FROM sqlite_master WHERE type = 'table' ''')
+    tables: list[str] = [row[0] for row in sql_cursor.fetchall()]
+    if 'Seasons' not in tables:
+        sql_cursor.execute(f'''CREATE TABLE Seasons ({TABLES_SCHEMA['Seasons']})''')
+        sql_cursor.execute('''INSERT INTO Seasons (season,total_races,total_sprints,race_points,sprint_points,max_points_race_driver,max_points_sprint_driver,max_points_race_constructor,max_points_sprint_constructor) VALUES (?,?,?,?,?,?,?,?,?)''',(CURRENT_SEASON,TOTAL_RACES,TOTAL_SPRINTS,' '.join(str(RACE_POINTS[str(position)]) for position in range(1,11)),' '.join(str(SPRINT_POINTS[str(position)]) for position in range(1,9)),MAX_POINTS_RACE_DRIVER,MAX_POINTS_SPRINT_DRIVER,MAX_POINTS_RACE_CONSTRUCTOR,MAX_POINTS_SPRINT_CONSTRUCTOR))
+    for table, columns in TABLES_SCHEMA.items():
+        if table in SEASONLESS_TABLES:
+            continue
+        sql_cursor.execute(f'''PRAGMA table_info({table})''')
+        existing_columns: list[str] = [column[1] for column in sql_cursor.fetchall()]
+        # Tables added after the season dimension are created by their own migration
+        if not existing_columns or 'season' in existing_columns:
+            continue
+        logger.info('Rebuilding table %s with a season column, existing rows attributed to season %s',table,CURRENT_SEASON)
+        copied_columns: str = ', '.join(existing_columns)
+        sql_cursor.execute(f'''CREATE TABLE {table}_with_season ({columns})''')
+        sql_cursor.execute(f'''INSERT INTO {table}_with_season (season, {copied_columns}) SELECT ?, {copied_columns} FROM {table}''',(CURRENT_SEASON,))
+        sql_cursor.execute(f'''DROP TABLE {table}''')
+        sql_cursor.execute(f'''ALTER TABLE {table}_with_season RENAME TO {table}''')
+    REFERENCE_CACHE.clear()
+
+#############################################################################
+####                          Seasons                                    ####
+#############################################################################
+
+def add_season_toDB(sql_connection:sqlite3.Connection,season: Season) -> None:
+    '''Adds the rules of a new season into the Seasons Table of the Database'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''INSERT OR REPLACE INTO Seasons (season,total_races,total_sprints,race_points,sprint_points,max_points_race_driver,max_points_sprint_driver,max_points_race_constructor,max_points_sprint_constructor) VALUES (?,?,?,?,?,?,?,?,?)''',(season.season,season.total_races,season.total_sprints,season.race_points,season.sprint_points,season.max_points_race_driver,season.max_points_sprint_driver,season.max_points_race_constructor,season.max_points_sprint_constructor,))
+    REFERENCE_CACHE.invalidate('Seasons')
+    logger.info('Season %s was succesfully added to DB.',season.season)
+
+def load_seasons_fromDB(sql_connection:sqlite3.Connection) -> Dict[int,Season]:
+    '''Reads the whole Seasons Table for the reference data cache, indexed by season'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = season_factory
+    sql_cursor.execute('''SELECT season,total_races,total_sprints,race_points,sprint_points,max_points_race_driver,max_points_sprint_driver,max_points_race_constructor,max_points_sprint_constructor FROM Seasons ORDER BY season''')
+    seasons: Dict[int,Season] = {season.season: season for season in sql_cursor.fetchall()}
+    logger.info('%s seasons retrieved from Seasons Table',len(seasons))
+    return seasons
+
+def get_season_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> Season:
+    '''Fetches the rules of a season (races, sprints, points) from the Seasons Table, through the reference data cache. Raises ValueError for a season without rules (not seeded)'''
+    seasons: Dict[int,Season] = REFERENCE_CACHE.get(sql_connection,'Seasons',load_seasons_fromDB)
+    if season not in seasons:
+        logger.error('Season %s has no rules in Seasons Table',season)
+        raise ValueError(f'season {season} has no rules in Seasons')
+    return seasons[season]
+
+def get_all_seasons_fromDB(sql_connection:sqlite3.Connection) -> list[int]:
+    '''Fetches the list of the seasons in the Seasons Table, through the reference data cache'''
+    seasons: list[int] = list(REFERENCE_CACHE.get(sql_connection,'Seasons',load_seasons_fromDB).keys())
+    return seasons
+
 #############################################################################
 ####                         Drivers                                     ####
 #############################################################################
 
 def add_driver_toDB(sql_connection:sqlite3.Connection,driver: Driver) -> None:
-    '''Adds a new driver into the Drivers Table of the Database'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''INSERT OR IGNORE INTO Drivers (name, trigramme, car_number, nationality) VALUES (?,?,?,?)''',(driver.name,driver.trigramme,driver.car_number,driver.nationality,))
-    sql_connection.commit()
-    logger.info(f'Driver No. {driver.car_number} - {driver.name} was succesfully added to DB.')
-
-def get_driver_by_trigramme_fromDB(sql_connection:sqlite3.Connection,trigramme: str) -> Driver:
-    '''Fetches Driver from the Drivers Table based on the trigramme of the Driver (eg. VER, NOR)'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''Select name, car_number, nationality from Drivers where trigramme = ?''',(trigramme,))
-    result = sql_cursor.fetchone()
-    name:str = result[0]
-    car_number:int = result[1]
-    nationality:str = result[2]
-    driver:Driver = Driver(name,trigramme,car_number,nationality)
-    logger.info(f'Class instanciated for driver {trigramme}')
+    '''Adds a new driver into the Drivers Table of the Database, for the season of the driver'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''INSERT OR IGNORE INTO Drivers (season, name, trigramme, car_number, nationality) VALUES (?,?,?,?,?)''',(driver.season,driver.name,driver.trigramme,driver.car_number,driver.nationality,))
+    REFERENCE_CACHE.invalidate('Drivers')
+    logger.info('Driver No. %s - %s was succesfully added to DB.',driver.car_number,driver.name)
+
+def add_drivers_batch_toDB(sql_connection:sqlite3.Connection,drivers:list[Driver]) -> None:
+    '''Adds the drivers of a whole file into the Drivers Table of the Database with a single executemany, in one transaction (or in the transaction of the caller)'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.executemany('''INSERT OR IGNORE INTO Drivers (season, name, trigramme, car_number, nationality) VALUES (?,?,?,?,?)''',[(driver.season,driver.name,driver.trigramme,driver.car_number,driver.nationality) for driver in drivers])
+    REFERENCE_CACHE.invalidate('Drivers')
+    logger.info('%s drivers were succesfully added to DB.',len(drivers))
+
+def load_drivers_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> Dict[str,Any]:
+    '''Reads the drivers of a season from the Drivers Table for the reference data cache, indexed by trigramme and by car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = driver_factory
+    sql_cursor.execute('''SELECT name, trigramme, car_number, nationality, season FROM Drivers WHERE season = ? ORDER BY car_number''',(season,))
+    drivers: list[Driver] = sql_cursor.fetchall()
+    logger.info('%s drivers retrieved from Drivers Table for season %s',len(drivers),season)
+    return {
+        'by_trigramme': {driver.trigramme: driver for driver in drivers},
+        'by_car_number': {driver.car_number: driver for driver in drivers}
+    }
+
+def get_season_drivers(sql_connection:sqlite3.Connection,season:int) -> Dict[str,Any]:
+    '''Returns the drivers of a season from the reference data cache (cached as "Drivers/<season>")'''
+    return REFERENCE_CACHE.get(sql_connection,f'Drivers/{season}',lambda sql_connection: load_drivers_fromDB(sql_connection,season))
+
+def get_driver_by_trigramme_fromDB(sql_connection:sqlite3.Connection,trigramme: str,season:int=CURRENT_SEASON) -> Driver:
+    '''Fetches Driver of a season from the Drivers Table based on the trigramme of the Driver (eg. VER, NOR), through the reference data cache'''
+    driver:Driver = get_season_drivers(sql_connection,season)['by_trigramme'][trigramme]
     return driver
 
-def get_driver_by_carnumber_fromDB(sql_connection:sqlite3.Connection,car_number: int) -> Driver:
-    '''Fetches Driver from the Drivers Table based on the car number (eg. 1, 16)'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''Select name, trigramme, nationality from Drivers where car_number = ?''',(car_number,))
-    result = sql_cursor.fetchone()
-    name:str = result[0]
-    trigramme:str = result[1]
-    nationality:str = result[2]
-    driver:Driver = Driver(name,trigramme,car_number,nationality)
-    logger.info(f'Class instanciated for driver No. {car_number}')
+def get_driver_by_carnumber_fromDB(sql_connection:sqlite3.Connection,car_number: int,season:int=CURRENT_SEASON) -> Driver:
+    '''Fetches Driver of a season from the Drivers Table based on the car number (eg. 1, 16), through the reference data cache'''
+    driver:Driver = get_season_drivers(sql_connection,season)['by_car_number'][car_number]
     return driver
 
-def get_all_drivers_carnumber_fromDB(sql_connection:sqlite3.Connection) -> list[int]:
-    '''Fetches a list of car numbers for all the drivers in Drivers Table'''
-    logger.info('Fetching list of drivers in Drivers Table')
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('SELECT car_number FROM Drivers')
-    car_numbers: list[int] = [int(car[0]) for car in sql_cursor.fetchall()]
-    logger.info(f'{len(car_numbers)} car numbers retrieved from Drivers Table')
+def get_all_drivers_carnumber_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[int]:
+    '''Fetches a list of car numbers for all the drivers of a season in Drivers Table, through the reference data cache'''
+    car_numbers: list[int] = list(get_season_drivers(sql_connection,season)['by_car_number'].keys())
     return car_numbers
 
+def get_all_drivers_trigramme_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> Dict[int,str]:
+    '''Fetches a map of car number to trigramme for all the drivers of a season in Drivers Table, through the reference data cache'''
+    trigrammes: Dict[int,str] = {car_number: driver.trigramme for car_number, driver in get_season_drivers(sql_connection,season)['by_car_number'].items()}
+    return trigrammes
+
 #############################################################################
 ####                       Constructors                                  ####
 #############################################################################
 
 def add_constructor_toDB(sql_connection:sqlite3.Connection,constructor: Constructor) -> None:
-    '''Adds a new constructor into the Constructors Table of the Database'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''INSERT OR IGNORE INTO Constructors (full_name,result_name, short_name, paddock_number) VALUES (?,?,?,?)''',(constructor.full_name,constructor.result_name,constructor.short_name,constructor.paddock_number,))
-    sql_connection.commit()
-    logger.info(f'Constructor No. {constructor.paddock_number} - {constructor.full_name} was succesfully added to DB.')
-
-def get_constructor_by_resultname_fromDB(sql_connection:sqlite3.Connection,result_name:str) -> Constructor:
-    '''Fetches Constructor from the Constructors Table based on the result name -Car & Engine Manufacturer- (eg. McLaren Mercedes, Haas Ferrari)'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('SELECT full_name, short_name,paddock_number FROM Constructors WHERE result_name = ? ', (result_name, ))
-    result = sql_cursor.fetchone()
-    full_name: str = result[0]
-    short_name: str = result[1]
-    paddock_number: int = result[2]
-    constructor:Constructor = Constructor(full_name,result_name,short_name,paddock_number)
-    logger.info(f'Class instanciated for constructor {result_name}')
+    '''Adds a new constructor into the Constructors Table of the Database, for the season of the constructor'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''INSERT OR IGNORE INTO Constructors (season,full_name,result_name, short_name, paddock_number) VALUES (?,?,?,?,?)''',(constructor.season,constructor.full_name,constructor.result_name,constructor.short_name,constructor.paddock_number,))
+    REFERENCE_CACHE.invalidate('Constructors')
+    logger.info('Constructor No. %s - %s was succesfully added to DB.',constructor.paddock_number,constructor.full_name)
+
+def add_constructors_batch_toDB(sql_connection:sqlite3.Connection,constructors:list[Constructor]) -> None:
+    '''Adds the constructors of a whole file into the Constructors Table of the Database with a single executemany, in one transaction (or in the transaction of the caller)'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.executemany('''INSERT OR IGNORE INTO Constructors (season,full_name,result_name, short_name, paddock_number) VALUES (?,?,?,?,?)''',[(constructor.season,constructor.full_name,constructor.result_name,constructor.short_name,constructor.paddock_number) for constructor in constructors])
+    REFERENCE_CACHE.invalidate('Constructors')
+    logger.info('%s constructors were succesfully added to DB.',len(constructors))
+
+def load_constructors_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> Dict[str,Any]:
+    '''Reads the constructors of a season from the Constructors Table for the reference data cache, indexed by result name and by paddock number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = constructor_factory
+    sql_cursor.execute('''SELECT full_name, result_name, short_name, paddock_number, season FROM Constructors WHERE season = ? ORDER BY paddock_number''',(season,))
+    constructors: list[Constructor] = sql_cursor.fetchall()
+    logger.info('%s constructors retrieved from Constructors Table for season %s',len(constructors),season)
+    return {
+        'by_result_name': {constructor.result_name: constructor for constructor in constructors},
+        'by_paddock_number': {constructor.paddock_number: constructor for constructor in constructors}
+    }
+
+def get_season_constructors(sql_connection:sqlite3.Connection,season:int) -> Dict[str,Any]:
+    '''Returns the constructors of a season from the reference data cache (cached as "Constructors/<season>")'''
+    return REFERENCE_CACHE.get(sql_connection,f'Constructors/{season}',lambda sql_connection: load_constructors_fromDB(sql_connection,season))
+
+def get_constructor_by_resultname_fromDB(sql_connection:sqlite3.Connection,result_name:str,season:int=CURRENT_SEASON) -> Constructor:
+    '''Fetches Constructor of a season from the Constructors Table based on the result name -Car & Engine Manufacturer- (eg. McLaren Mercedes, Haas Ferrari), through the reference data cache'''
+    constructor:Constructor = get_season_constructors(sql_connection,season)['by_result_name'][result_name]
     return constructor
 
-def get_all_constructors_paddocknumber_fromDB(sql_connection:sqlite3.Connection) -> list[int]:
-    '''Fetches a list of paddock numbers for all the constructors in Copnstructor Table'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('Select paddock_number FROM Constructors')
-    paddock_numbers: list[int] = [int(constructor[0]) for constructor in sql_cursor.fetchall()]
-    logger.info(f'{len(paddock_numbers)} paddock numbers retrieved from Constructors Table')
+def get_constructor_by_paddocknumber_fromDB(sql_connection:sqlite3.Connection,paddock_number:int,season:int=CURRENT_SEASON) -> Constructor:
+    '''Fetches Constructor of a season from the Constructors Table based on the paddock number (eg. 1, 10), through the reference data cache'''
+    constructor:Constructor = get_season_constructors(sql_connection,season)['by_paddock_number'][paddock_number]
+    return constructor
+
+def get_all_constructors_paddocknumber_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[int]:
+    '''Fetches a list of paddock numbers for all the constructors of a season in Constructors Table, through the reference data cache'''
+    paddock_numbers: list[int] = list(get_season_constructors(sql_connection,season)['by_paddock_number'].keys())
     return paddock_numbers
-   
+
+def get_constructors_paddock_map_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> Dict[str,int]:
+    '''Fetches a map of result name -Car & Engine Manufacturer- to paddock number for all the constructors of a season in Constructors Table, through the reference data cache'''
+    paddock_map: Dict[str,int] = {result_name: constructor.paddock_number for result_name, constructor in get_season_constructors(sql_connection,season)['by_result_name'].items()}
+    return paddock_map
 
 #############################################################################
 ####                          Rounds                                     ####
 #############################################################################
 
 def add_round_toDB(sql_connection:sqlite3.Connection,round:Round) -> None:
-    '''Adds a new round into the Rounds Table of the Database'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''INSERT INTO Rounds (round_number,round_name,country,circuit,round_date,round_type,round_finished) VALUES (?,?,?,?,?,?,?)''',(round.round_number,round.round_name,round.country,round.circuit,round.round_date,round.round_type,round.round_finished,))
-    sql_connection.commit()
-    logger.info(f'Round No. {round.round_number} - {round.round_name} was succesfully added to DB.')
-
-def mark_round_done_toDB(sql_connection:sqlite3.Connection,round_number:int) -> None:
-    '''Updates round in Rounds Table to mark round_done as true'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''UPDATE Rounds SET round_finished = true WHERE round_number = ?''',(round_number,))
-    sql_connection.commit()
-    logger.info(f'Round No. {round_number} - Marked as done in DB.')
-
-def get_done_races_fromDB(sql_connection:sqlite3.Connection) -> int:
-    '''Fetches number of races completed in the Rounds Table of the Database'''
+    '''Adds a new round into the Rounds Table of the Database, for the season of the round'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''INSERT INTO Rounds (season,round_number,round_name,country,circuit,round_date,round_type,round_finished) VALUES (?,?,?,?,?,?,?,?)''',(round.season,round.round_number,round.round_name,round.country,round.circuit,round.round_date,round.round_type,round.round_finished,))
+    REFERENCE_CACHE.invalidate('Rounds')
+    logger.info('Round No. %s - %s was succesfully added to DB.',round.round_number,round.round_name)
+
+def add_rounds_batch_toDB(sql_connection:sqlite3.Connection,rounds:list[Round]) -> None:
+    '''Adds the rounds of a whole calendar into the Rounds Table of the Database with a single executemany, in one transaction (or in the transaction of the caller)'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.executemany('''INSERT INTO Rounds (season,round_number,round_name,country,circuit,round_date,round_type,round_finished) VALUES (?,?,?,?,?,?,?,?)''',[(round.season,round.round_number,round.round_name,round.country,round.circuit,round.round_date,round.round_type,round.round_finished) for round in rounds])
+    REFERENCE_CACHE.invalidate('Rounds')
+    logger.info('%s rounds were succesfully added to DB.',len(rounds))
+
+def mark_round_done_toDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> None:
+    '''Updates round of a season in Rounds Table to mark round_done as true'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''UPDATE Rounds SET round_finished = true WHERE season = ? AND round_number = ?''',(season,round_number,))
+    REFERENCE_CACHE.invalidate('Rounds')
+    # The rankings of the round follow, the standings histories of both championships are dropped with the round
+    REFERENCE_CACHE.invalidate('DriversRanking')
+    REFERENCE_CACHE.invalidate('ConstructorsRanking')
+    logger.info('Round No. %s of season %s - Marked as done in DB.',round_number,season)
+
+def load_rounds_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[Tuple[int,str,bool]]:
+    '''Reads the round number, round type and finished flag of the rounds of a season in the Rounds Table for the reference data cache, ordered by round number'''
     sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''SELECT COUNT(round_number) FROM ROUNDS WHERE round_finished = 1''')
-    result = sql_cursor.fetchone()
-    done_races: int = result[0]
-    logger.info(f'{done_races} races has been finished out of {TOTAL_RACES}')
+    sql_cursor.execute('''SELECT round_number, round_type, round_finished FROM Rounds WHERE season = ? ORDER BY round_number''',(season,))
+    rounds: list[Tuple[int,str,bool]] = [(int(round_number),round_type,bool(round_finished)) for round_number, round_type, round_finished in sql_cursor.fetchall()]
+    logger.info('%s rounds retrieved from Rounds Table for season %s',len(rounds),season)
+    return rounds
+
+def get_season_rounds(sql_connection:sqlite3.Connection,season:int) -> list[Tuple[int,str,bool]]:
+    '''Returns the rounds of a season from the reference data cache (cached as "Rounds/<season>")'''
+    return REFERENCE_CACHE.get(sql_connection,f'Rounds/{season}',lambda sql_connection: load_rounds_fromDB(sql_connection,season))
+
+def get_done_races_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> int:
+    '''Fetches number of races completed in a season in the Rounds Table of the Database, through the reference data cache'''
+    done_races: int = sum(1 for round_number, round_type, round_finished in get_season_rounds(sql_connection,season) if round_finished)
     return done_races
 
-def get_done_sprints_fromDB(sql_connection:sqlite3.Connection) -> int:
-    '''Fetches number of sprints completed in the Rounds Table of the Database'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''SELECT COUNT(round_number) FROM ROUNDS WHERE round_type = "Sprint" AND round_finished = 1''')
-    result = sql_cursor.fetchone()
-    done_sprints: int = result[0]
-    logger.info(f'{done_sprints} sprints has been finished out of {TOTAL_SPRINTS}')
+def get_done_sprints_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> int:
+    '''Fetches number of sprints completed in a season in the Rounds Table of the Database, through the reference data cache'''
+    done_sprints: int = sum(1 for round_number, round_type, round_finished in get_season_rounds(sql_connection,season) if round_finished and round_type == 'Sprint')
     return done_sprints
 
-def get_last_round_fromDB(sql_connection:sqlite3.Connection) -> int:
-    '''Fetches the number of the last round marked as done in the Rounds Table of the Database'''
+def get_last_round_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> int:
+    '''Fetches the number of the last round of a season marked as done in the Rounds Table of the Database, 0 if no round is done yet'''
     sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''SELECT round_number FROM Rounds WHERE round_finished = 1 ORDER BY round_number DESC''')
+    sql_cursor.execute('''SELECT COALESCE(MAX(round_number),0) FROM Rounds WHERE season = ? AND round_finished = 1''',(season,))
     round_number:int = sql_cursor.fetchone()[0]
-    logger.info(f'Last round ran is No. {round_number}')
+    logger.info('Last round ran in season %s is No. %s',season,round_number)
     return round_number
 
+def get_calendar_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[Tuple[int,str]]:
+    '''Fetches the round number and round type (GP or Sprint) of every round of a season in the Rounds Table of the Database, finished or not, ordered by round number, through the reference data cache'''
+    calendar: list[Tuple[int,str]] = [(round_number,round_type) for round_number, round_type, round_finished in get_season_rounds(sql_connection,season)]
+    return calendar
+
+def get_finished_rounds_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[Tuple[int,str]]:
+    '''Fetches the round number and round type (GP or Sprint) of every round of a season marked as done in the Rounds Table of the Database, ordered by round number, through the reference data cache'''
+    finished_rounds: list[Tuple[int,str]] = [(round_number,round_type) for round_number, round_type, round_finished in get_season_rounds(sql_connection,season) if round_finished]
+    return finished_rounds
+
 #############################################################################
 ####                          Results                                    ####
 #############################################################################
 
 def add_results_toDB(sql_connection:sqlite3.Connection,result:Result) -> None:
     '''Adds a new result into the Results Table of the Database'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''INSERT INTO Results (season, car_position, car_number, paddock_number,round_number, session_type,result_time,car_points,time_seconds,status,position) VALUES (?,?,?,?,?,?,?,?,?,?,?)''',(result.season,result.car_position,result.car_number,result.paddock_number,result.round_number,result.session_type,result.result_time,result.car_points,result.time_seconds,result.status,result.position))
+    logger.info('Result for session %s of Car No. %s for Round No.- %s was succesfully added to DB.',result.session_type,result.car_number,result.round_number)
+
+def add_results_batch_toDB(sql_connection:sqlite3.Connection,results:list[Result]) -> None:
+    '''Adds all the results of a session into the Results Table of the Database with a single executemany and commit, rolling back the whole batch if any result fails'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.executemany('''INSERT INTO Results (season, car_position, car_number, paddock_number,round_number, session_type,result_time,car_points,time_seconds,status,position) VALUES (?,?,?,?,?,?,?,?,?,?,?)''',[(result.season,result.car_position,result.car_number,result.paddock_number,result.round_number,result.session_type,result.result_time,result.car_points,result.time_seconds,result.status,result.position) for result in results])
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to commit %s results, batch rolled back',e,len(results))
+        raise
+    logger.info('%s results were succesfully added to DB in a single transaction.',len(results))
+
+def replace_session_results_toDB(sql_connection:sqlite3.Connection,round_number:int,session_type:str,results:list[Result],season:int=CURRENT_SEASON) -> None:
+    '''Replaces all the results of a session of a season (e.g. after a correction or a penalty) in the Results Table of the Database in a single transaction, rolling back if any result fails'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.execute('''DELETE FROM Results WHERE season = ? AND round_number = ? AND session_type = ?''',(season,round_number,session_type,))
+            sql_cursor.executemany('''INSERT INTO Results (season, car_position, car_number, paddock_number,round_number, session_type,result_time,car_points,time_seconds,status,position) VALUES (?,?,?,?,?,?,?,?,?,?,?)''',[(result.season,result.car_position,result.car_number,result.paddock_number,result.round_number,result.session_type,result.result_time,result.car_points,result.time_seconds,result.status,result.position) for result in results])
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to replace results of session %s for round No. %s, batch rolled back',e,session_type,round_number)
+        raise
+    logger.info('%s results replaced in DB for session %s of round No. %s.',len(results),session_type,round_number)
+
+def get_points_before_round_by_driver_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> Dict[int,int]:
+    '''Fetches the sum of points (Race and Sprint) of every Driver (by car number) in all the rounds of a season before round_number from the Results Table of the Database'''
     sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''INSERT INTO Results (car_position, car_number, paddock_number,round_number, session_type,result_time,car_points) VALUES (?,?,?,?,?,?,?)''',(result.car_position,result.car_number,result.paddock_number,result.round_number,result.session_type,result.result_time,result.car_points))
-    sql_connection.commit()
-    logger.info(f'Result for session {result.session_type} of Car No. {result.car_number} for Round No.- {result.round_number} was succesfully added to DB.')
+    sql_cursor.execute('''SELECT car_number, SUM(car_points) FROM Results WHERE season = ? AND round_number < ? GROUP BY car_number''',(season,round_number,))
+    points: Dict[int,int] = {int(car_number): int(car_points) for car_number, car_points in sql_cursor.fetchall()}
+    logger.info('Points before round No. %s fetched for %s drivers',round_number,len(points))
+    return points
+
+def get_points_by_round_and_driver_fromDB(sql_connection:sqlite3.Connection,first_round:int,season:int=CURRENT_SEASON) -> Dict[int,Dict[int,int]]:
+    '''Fetches the sum of points (Race and Sprint) of every Driver (by car number) for every round of a season from first_round onwards from the Results Table of the Database, as {round_number: {car_number: points}}'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT round_number, car_number, SUM(car_points) FROM Results WHERE season = ? AND round_number >= ? GROUP BY round_number, car_number''',(season,first_round,))
+    points: Dict[int,Dict[int,int]] = {}
+    for round_number, car_number, car_points in sql_cursor.fetchall():
+        points.setdefault(int(round_number),{})[int(car_number)] = int(car_points)
+    logger.info('Points by driver fetched for %s rounds from round No. %s',len(points),first_round)
+    return points
 
-def get_points_by_driver_round_fromDB(sql_connection:sqlite3.Connection,car_number:int,round_number:int) -> int:
-    '''Fetches the sum of points (Race and Sprint) of a Driver (by car number) and Round (by round number) from the Results Table of the Database'''
+def get_points_before_round_by_constructor_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> Dict[int,int]:
+    '''Fetches the sum of points (Race and Sprint) of every Constructor (by paddock number, both drivers) in all the rounds of a season before round_number from the Results Table of the Database'''
     sql_cursor = sql_connection.cursor()
-    logger.info(f'Fetching points for Driver No. {car_number} by round No. {round_number}')
-    sql_cursor.execute('''SELECT SUM(car_points) FROM Results WHERE round_number = ? and car_number = ?''',(round_number,car_number,))
-    points:int = sql_cursor.fetchone()[0]
-    logger.info(f'Driver No. {car_number} has {points} points by round No. {round_number}')
+    sql_cursor.execute('''SELECT paddock_number, SUM(car_points) FROM Results WHERE season = ? AND round_number < ? GROUP BY paddock_number''',(season,round_number,))
+    points: Dict[int,int] = {int(paddock_number): int(car_points) for paddock_number, car_points in sql_cursor.fetchall()}
+    logger.info('Points before round No. %s fetched for %s constructors',round_number,len(points))
     return points
 
-def get_quali_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int) -> list[Result]:
-    '''Fetches all the results for qualification sessions of a driver based on the car number'''
-    sql_cursor = sql_connection.cursor()
-    results_list: list = list()
-    sql_cursor.execute('''SELECT car_position,paddock_number,round_number,session_type,result_time,car_points FROM Results WHERE car_number = ? AND (session_type = "Q1" OR session_type = "Q2" OR session_type = "Q3") ORDER BY round_number''',(car_number,))
-    sql_results: list = sql_cursor.fetchall()
-    for sql_result in sql_results:
-        car_position: str = sql_result[0]
-        paddock_number: int = sql_result[1]
-        round_number: int = sql_result[2]
-        session_type: str = sql_result[3]
-        result_time: str = sql_result[4]
-        car_points: int = sql_result[5]
-        result: Result = Result(car_position,car_number,paddock_number,round_number,session_type,result_time,car_points)
-        results_list.append(result)
-    logger.info(f'Driver No. {car_number} has {len(results_list)} results for Qualification Sessions')
+def get_points_by_round_and_constructor_fromDB(sql_connection:sqlite3.Connection,first_round:int,season:int=CURRENT_SEASON) -> Dict[int,Dict[int,int]]:
+    '''Fetches the sum of points (Race and Sprint) of every Constructor (by paddock number, both drivers) for every round of a season from first_round onwards from the Results Table of the Database, as {round_number: {paddock_number: points}}'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT round_number, paddock_number, SUM(car_points) FROM Results WHERE season = ? AND round_number >= ? GROUP BY round_number, paddock_number''',(season,first_round,))
+    points: Dict[int,Dict[int,int]] = {}
+    for round_number, paddock_number, car_points in sql_cursor.fetchall():
+        points.setdefault(int(round_number),{})[int(paddock_number)] = int(car_points)
+    logger.info('Points by constructor fetched for %s rounds from round No. %s',len(points),first_round)
+    return points
+
+def get_quali_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int,season:int=CURRENT_SEASON) -> list[Result]:
+    '''Fetches all the results for qualification sessions of a driver in a season based on the car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = result_factory
+    sql_cursor.execute('''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND car_number = ? AND (session_type = "Q1" OR session_type = "Q2" OR session_type = "Q3") ORDER BY round_number''',(season,car_number,))
+    results_list: list[Result] = sql_cursor.fetchall()
+    logger.info('Driver No. %s has %s results for Qualification Sessions',car_number,len(results_list))
     return results_list
 
-def get_sprint_quali_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int) -> list[Result]:
-    '''Fetches all the results for qualification sessions of a driver based on the car number'''
-    sql_cursor = sql_connection.cursor()
-    results_list: list = list()
-    sql_cursor.execute('''SELECT car_position,paddock_number,round_number,session_type,result_time,car_points FROM Results WHERE car_number = ? AND (session_type = "SQ1" OR session_type = "SQ2" OR session_type = "SQ3") ORDER BY round_number''',(car_number,))
-    sql_results: list = sql_cursor.fetchall()
-    for sql_result in sql_results:
-        car_position: str = sql_result[0]
-        paddock_number: int = sql_result[1]
-        round_number: int = sql_result[2]
-        session_type: str = sql_result[3]
-        result_time: str = sql_result[4]
-        car_points: int = sql_result[5]
-        result: Result = Result(car_position,car_number,paddock_number,round_number,session_type,result_time,car_points)
-        results_list.append(result)
-    logger.info(f'Driver No. {car_number} has {len(results_list)} results for Qualification Sessions')
+def get_sprint_quali_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int,season:int=CURRENT_SEASON) -> list[Result]:
+    '''Fetches all the results for sprint qualification sessions of a driver in a season based on the car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = result_factory
+    sql_cursor.execute('''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND car_number = ? AND (session_type = "SQ1" OR session_type = "SQ2" OR session_type = "SQ3") ORDER BY round_number''',(season,car_number,))
+    results_list: list[Result] = sql_cursor.fetchall()
+    logger.info('Driver No. %s has %s results for Sprint Qualification Sessions',car_number,len(results_list))
     return results_list
 
-def get_race_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int) -> list[Result]:
-    '''Fetches all the results for qualification sessions of a driver based on the car number'''
-    sql_cursor = sql_connection.cursor()
-    results_list: list = list()
-    sql_cursor.execute('''SELECT car_position,paddock_number,round_number,session_type,result_time,car_points FROM Results WHERE car_number = ? AND (session_type = "Race") ORDER BY round_number''',(car_number,))
-    sql_results: list = sql_cursor.fetchall()
-    for sql_result in sql_results:
-        car_position: str = sql_result[0]
-        paddock_number: int = sql_result[1]
-        round_number: int = sql_result[2]
-        session_type: str = sql_result[3]
-        result_time: str = sql_result[4]
-        car_points: int = sql_result[5]
-        result: Result = Result(car_position,car_number,paddock_number,round_number,session_type,result_time,car_points)
-        results_list.append(result)
-    logger.info(f'Driver No. {car_number} has {len(results_list)} results for Qualification Sessions')
+def get_race_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int,season:int=CURRENT_SEASON) -> list[Result]:
+    '''Fetches all the results for races of a driver in a season based on the car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = result_factory
+    sql_cursor.execute('''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND car_number = ? AND (session_type = "Race") ORDER BY round_number''',(season,car_number,))
+    results_list: list[Result] = sql_cursor.fetchall()
+    logger.info('Driver No. %s has %s results for Races',car_number,len(results_list))
     return results_list
 
-def get_sprint_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int) -> list[Result]:
-    '''Fetches all the results for qualification sessions of a driver based on the car number'''
-    sql_cursor = sql_connection.cursor()
-    results_list: list = list()
-    sql_cursor.execute('''SELECT car_position,paddock_number,round_number,session_type,result_time,car_points FROM Results WHERE car_number = ? AND (session_type = "Sprint") ORDER BY round_number''',(car_number,))
-    sql_results: list = sql_cursor.fetchall()
-    for sql_result in sql_results:
-        car_position: str = sql_result[0]
-        paddock_number: int = sql_result[1]
-        round_number: int = sql_result[2]
-        session_type: str = sql_result[3]
-        result_time: str = sql_result[4]
-        car_points: int = sql_result[5]
-        result: Result = Result(car_position,car_number,paddock_number,round_number,session_type,result_time,car_points)
-        results_list.append(result)
-    logger.info(f'Driver No. {car_number} has {len(results_list)} results for Qualification Sessions')
+def get_sprint_results_by_driver_fromDB(sql_connection:sqlite3.Connection,car_number:int,season:int=CURRENT_SEASON) -> list[Result]:
+    '''Fetches all the results for sprints of a driver in a season based on the car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = result_factory
+    sql_cursor.execute('''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND car_number = ? AND (session_type = "Sprint") ORDER BY round_number''',(season,car_number,))
+    results_list: list[Result] = sql_cursor.fetchall()
+    logger.info('Driver No. %s has %s results for Sprints',car_number,len(results_list))
     return results_list
 
-def get_points_by_constructors_round_fromDB(sql_connection:sqlite3.Connection,paddock_number:int,round_number:int) -> int:
-    '''Fetches the sum of points (Race and Sprint) of a Constructors (by paddoc number, both drivers) and Round (by round number) from the Results Table of the Database'''
-    logger.info(f'Fetching points for Constructor No. {paddock_number} by round No. {round_number}')
+def get_results_by_session_types_fromDB(sql_connection:sqlite3.Connection,session_types:list[str],season:int=CURRENT_SEASON) -> list[Result]:
+    '''Fetches all the results of all the drivers of a season for a list of session types (e.g. Q1, Q2 and Q3) with a single query'''
     sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''SELECT SUM(car_points) FROM Results WHERE round_number = ? and paddock_number = ?''',(round_number,paddock_number,))
-    points:int = sql_cursor.fetchone()[0]
-    logger.info(f'Constructor No. {paddock_number} has {points} points by round No. {round_number}')
-    return points
+    sql_cursor.row_factory = result_factory
+    placeholders: str = ','.join('?' for _ in session_types)
+    sql_cursor.execute(f'''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND session_type IN ({placeholders}) ORDER BY round_number''',(season,*session_types))
+    results_list: list[Result] = sql_cursor.fetchall()
+    logger.info('%s results fetched for sessions %s',len(results_list),session_types)
+    return results_list
 
-    
+def get_session_results_fromDB(sql_connection:sqlite3.Connection,round_number:int,session_type:str,season:int=CURRENT_SEASON) -> list[Result]:
+    '''Fetches the results of every car in a session of a round of a season, classified cars first by position, then the others by car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = result_factory
+    sql_cursor.execute('''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND round_number = ? AND session_type = ? ORDER BY position IS NULL, position, car_number''',(season,round_number,session_type,))
+    return sql_cursor.fetchall()
+
+def get_gaps_to_winner_fromDB(sql_connection:sqlite3.Connection,round_number:int,session_type:str,season:int=CURRENT_SEASON) -> list[Tuple[int,Optional[int],Optional[float]]]:
+    '''Fetches the classification of a session of a season with the gap in seconds of each car to the fastest time, calculated in the Database from the typed time_seconds column (None for cars without a time)'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT car_number, position, time_seconds - MIN(time_seconds) OVER () FROM Results WHERE season = ? AND round_number = ? AND session_type = ? ORDER BY position IS NULL, position''',(season,round_number,session_type,))
+    gaps: list[Tuple[int,Optional[int],Optional[float]]] = sql_cursor.fetchall()
+    logger.info('Gaps fetched for %s cars for session %s of round No. %s',len(gaps),session_type,round_number)
+    return gaps
 
 #############################################################################
 ####                       Driver's Rankings                             ####
@@ -311,30 +591,74 @@ def get_points_by_constructors_round_fromDB(sql_connection:sqlite3.Connection,pa
 
 def add_drivers_ranking_toDB(sql_connection:sqlite3.Connection,driver_ranking:DriverRanking) -> None:
     '''Adds a new driver's ranking into the Drivers Ranking Table of the Database'''
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''INSERT INTO DriversRanking (round_number,car_number,car_position,car_points,championship_chance) VALUES (?,?,?,?,?)''',(driver_ranking.round_number,driver_ranking.car_number,driver_ranking.car_position,driver_ranking.car_points,driver_ranking.championship_chance,))
-    sql_connection.commit()
-    logger.info(f'Ranking added to DB for car: {driver_ranking.car_number} in position {driver_ranking.car_position} with {driver_ranking.car_points} after round No. {driver_ranking.round_number}. Championship chances: {driver_ranking.championship_chance}.')
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''INSERT INTO DriversRanking (season,round_number,car_number,car_position,car_points,championship_chance) VALUES (?,?,?,?,?,?)''',(driver_ranking.season,driver_ranking.round_number,driver_ranking.car_number,driver_ranking.car_position,driver_ranking.car_points,driver_ranking.championship_chance,))
+    REFERENCE_CACHE.invalidate('DriversRanking')
+    logger.info('Ranking added to DB for car: %s in position %s with %s after round No. %s. Championship chances: %s.',driver_ranking.car_number,driver_ranking.car_position,driver_ranking.car_points,driver_ranking.round_number,driver_ranking.championship_chance)
 
-def get_points_by_driver_ranking_fromDB(sql_connection:sqlite3.Connection,round_number:int,car_number:int) -> int:
-    '''Fetches a drivers points from the ranking for an specific round from the Drivers Ranking Table of the Database'''
+def add_drivers_rankings_batch_toDB(sql_connection:sqlite3.Connection,drivers_rankings:list[DriverRanking]) -> None:
+    '''Adds the drivers' rankings of a whole round into the Drivers Ranking Table of the Database with a single executemany and commit, rolling back the whole batch if any ranking fails'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.executemany('''INSERT INTO DriversRanking (season,round_number,car_number,car_position,car_points,championship_chance) VALUES (?,?,?,?,?,?)''',[(ranking.season,ranking.round_number,ranking.car_number,ranking.car_position,ranking.car_points,ranking.championship_chance) for ranking in drivers_rankings])
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to commit %s drivers rankings, batch rolled back',e,len(drivers_rankings))
+        raise
+    REFERENCE_CACHE.invalidate('DriversRanking')
+    logger.info('%s drivers rankings were succesfully added to DB in a single transaction.',len(drivers_rankings))
+
+def get_drivers_standings_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> list[DriverRanking]:
+    '''Calculates with a single query the standings of every driver of a season in the Drivers Table after a round: cumulative points of the Results of the season up to that round, position (ties ordered by car number) and an upper bound of the chances of winning the championship against the leader, based on the races and sprints still available under the rules of the season (Seasons Table). The chances are made exact by championship_math (see calculate_drivers_rankings). Raises ValueError for a season without rules'''
+    # Without a row in the Seasons Table the join with its rules would silently return no standings
+    get_season_fromDB(sql_connection,season)
     sql_cursor = sql_connection.cursor()
-    logger.info(f'Fetching points for driver No. {car_number} by round No. {round_number}')
-    sql_cursor.execute('''SELECT car_points FROM DriversRanking WHERE round_number = ? and car_number = ?''',(round_number,car_number,))
-    points = sql_cursor.fetchone()[0]
-    logger.info(f'Retrieved {points} for driver No. {car_number} by round No. {round_number}')
-    return points
-    
-def get_points_of_P1_Driver_fromDB(sql_connection:sqlite3.Connection,round_number:int) -> int:
-    '''Fetches the points of the driver in P1 by round number from the Drivers Ranking Table of the Database'''
-    sql_cursor = sql_connection.cursor()
-    logger.info(f'Fetching for driver in P1 by round No. {round_number}')
-    sql_cursor.execute('''SELECT car_points FROM DriversRanking WHERE round_number = ? and car_position = 1''',(round_number,))
-    result = sql_cursor.fetchone()
-    points = result[0]
-    logger.info(f'Retrieved {points} points for driver in P1 by round No. {round_number}')
-    return points
-    
+    sql_cursor.row_factory = driver_ranking_factory
+    sql_cursor.execute('''
+        WITH points AS (
+            SELECT d.id, d.car_number, COALESCE(SUM(r.car_points),0) AS car_points
+            FROM Drivers d LEFT JOIN Results r ON r.season = d.season AND r.car_number = d.car_number AND r.round_number <= :round_number
+            WHERE d.season = :season
+            GROUP BY d.id, d.car_number
+        ),
+        done AS (
+            SELECT COUNT(round_number) AS done_races, COALESCE(SUM(round_type = 'Sprint'),0) AS done_sprints
+            FROM Rounds WHERE season = :season AND round_finished = 1 AND round_number <= :round_number
+        ),
+        rules AS (
+            SELECT total_races, total_sprints, max_points_race_driver AS max_race, max_points_sprint_driver AS max_sprint
+            FROM Seasons WHERE season = :season
+        ),
+        standings AS (
+            SELECT car_number, car_points, ROW_NUMBER() OVER (ORDER BY car_points DESC, car_number) AS car_position, MAX(car_points) OVER () AS leader_points
+            FROM points
+        )
+        SELECT :round_number, car_number, car_position, car_points,
+            :round_number = 1 OR car_position = 1 OR car_points + (total_races - done_races) * max_race + (total_sprints - done_sprints) * max_sprint > leader_points, :season
+        FROM standings, done, rules
+        ORDER BY car_position''',
+        {'round_number':round_number,'season':season})
+    drivers_rankings: list[DriverRanking] = sql_cursor.fetchall()
+    logger.info('Standings calculated for %s drivers after round No. %s of season %s',len(drivers_rankings),round_number,season)
+    return drivers_rankings
+
+def replace_drivers_rankings_toDB(sql_connection:sqlite3.Connection,first_round:int,drivers_rankings:list[DriverRanking],season:int=CURRENT_SEASON) -> None:
+    '''Replaces the drivers' rankings of every round of a season from first_round onwards in the Drivers Ranking Table of the Database in a single transaction, rolling back if any ranking fails'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.execute('''DELETE FROM DriversRanking WHERE season = ? AND round_number >= ?''',(season,first_round,))
+            sql_cursor.executemany('''INSERT INTO DriversRanking (season,round_number,car_number,car_position,car_points,championship_chance) VALUES (?,?,?,?,?,?)''',[(ranking.season,ranking.round_number,ranking.car_number,ranking.car_position,ranking.car_points,ranking.championship_chance) for ranking in drivers_rankings])
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to replace drivers rankings from round No. %s, batch rolled back',e,first_round)
+        raise
+    REFERENCE_CACHE.invalidate('DriversRanking')
+    logger.info('%s drivers rankings replaced in DB from round No. %s.',len(drivers_rankings),first_round)
+
+def get_drivers_ranking_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> list[DriverRanking]:
+    '''Fetches the drivers' rankings stored after a round of a season in the Drivers Ranking Table of the Database, by position'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = driver_ranking_factory
+    sql_cursor.execute('''SELECT round_number,car_number,car_position,car_points,championship_chance,season FROM DriversRanking WHERE season = ? and round_number = ? ORDER BY car_position''',(season,round_number,))
+    return sql_cursor.fetchall()
 
 #############################################################################
 ####                       Constructors's Rankings                       ####
@@ -342,26 +666,187 @@ def get_points_of_P1_Driver_fromDB(sql_connection:sqlite3.Connection,round_numbe
 
 def add_constructor_ranking_toDB(sql_connection:sqlite3.Connection,constructor_ranking:ConstructorRanking) -> None:
     '''Adds a new constructor's ranking into the Constructors Ranking Table of the Database'''
-    logger.info(f'Adding ranking to DB for constructor: {constructor_ranking.paddock_number} in position {constructor_ranking.constructor_position} with {constructor_ranking.constructor_points} after round No. {constructor_ranking.round_number}. Championship chances: {constructor_ranking.championship_chance}.')
-    sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''INSERT INTO ConstructorsRanking (round_number,paddock_number,constructor_position,constructor_points,championship_chance) VALUES (?,?,?,?,?)''',(constructor_ranking.round_number,constructor_ranking.paddock_number,constructor_ranking.constructor_position,constructor_ranking.constructor_points,constructor_ranking.championship_chance,))
-    sql_connection.commit()
-    logger.info(f'Ranking added to DB for constructor: {constructor_ranking.paddock_number} in position {constructor_ranking.constructor_position} with {constructor_ranking.constructor_points} after round No. {constructor_ranking.round_number}. Championship chances: {constructor_ranking.championship_chance}.')
+    logger.info('Adding ranking to DB for constructor: %s in position %s with %s after round No. %s. Championship chances: %s.',constructor_ranking.paddock_number,constructor_ranking.constructor_position,constructor_ranking.constructor_points,constructor_ranking.round_number,constructor_ranking.championship_chance)
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''INSERT INTO ConstructorsRanking (season,round_number,paddock_number,constructor_position,constructor_points,championship_chance) VALUES (?,?,?,?,?,?)''',(constructor_ranking.season,constructor_ranking.round_number,constructor_ranking.paddock_number,constructor_ranking.constructor_position,constructor_ranking.constructor_points,constructor_ranking.championship_chance,))
+    REFERENCE_CACHE.invalidate('ConstructorsRanking')
+    logger.info('Ranking added to DB for constructor: %s in position %s with %s after round No. %s. Championship chances: %s.',constructor_ranking.paddock_number,constructor_ranking.constructor_position,constructor_ranking.constructor_points,constructor_ranking.round_number,constructor_ranking.championship_chance)
     
-def get_points_by_constructors_ranking_fromDB(sql_connection:sqlite3.Connection,round_number:int,paddock_number:int) -> int:
-    '''Fetches a constructors points from the ranking for an specific round from the Constructors Ranking Table of the Database'''
-    logger.info(f'Fetching points for constructor No. {paddock_number} by round No. {round_number}')
+def add_constructors_rankings_batch_toDB(sql_connection:sqlite3.Connection,constructors_rankings:list[ConstructorRanking]) -> None:
+    '''Adds the constructors' rankings of a whole round into the Constructors Ranking Table of the Database with a single executemany and commit, rolling back the whole batch if any ranking fails'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.executemany('''INSERT INTO ConstructorsRanking (season,round_number,paddock_number,constructor_position,constructor_points,championship_chance) VALUES (?,?,?,?,?,?)''',[(ranking.season,ranking.round_number,ranking.paddock_number,ranking.constructor_position,ranking.constructor_points,ranking.championship_chance) for ranking in constructors_rankings])
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to commit %s constructors rankings, batch rolled back',e,len(constructors_rankings))
+        raise
+    REFERENCE_CACHE.invalidate('ConstructorsRanking')
+    logger.info('%s constructors rankings were succesfully added to DB in a single transaction.',len(constructors_rankings))
+
+def get_constructors_standings_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> list[ConstructorRanking]:
+    '''Calculates with a single query the standings of every constructor of a season in the Constructors Table after a round: cumulative points of the Results (both drivers) of the season up to that round, position (ties ordered by paddock number) and an upper bound of the chances of winning the championship against the leader, based on the races and sprints still available under the rules of the season (Seasons Table). The chances are made exact by championship_math (see calculate_constructors_rankings). Raises ValueError for a season without rules'''
+    # Without a row in the Seasons Table the join with its rules would silently return no standings
+    get_season_fromDB(sql_connection,season)
     sql_cursor = sql_connection.cursor()
-    sql_cursor.execute('''SELECT constructor_points FROM ConstructorsRanking WHERE round_number = ? and paddock_number = ?''',(round_number,paddock_number,))
-    points = sql_cursor.fetchone()[0]
-    logger.info(f'Retrieved {points} points for constructor No. {paddock_number} by round No. {round_number}')
-    return points
+    sql_cursor.row_factory = constructor_ranking_factory
+    sql_cursor.execute('''
+        WITH points AS (
+            SELECT c.id, c.paddock_number, COALESCE(SUM(r.car_points),0) AS constructor_points
+            FROM Constructors c LEFT JOIN Results r ON r.season = c.season AND r.paddock_number = c.paddock_number AND r.round_number <= :round_number
+            WHERE c.season = :season
+            GROUP BY c.id, c.paddock_number
+        ),
+        done AS (
+            SELECT COUNT(round_number) AS done_races, COALESCE(SUM(round_type = 'Sprint'),0) AS done_sprints
+            FROM Rounds WHERE season = :season AND round_finished = 1 AND round_number <= :round_number
+        ),
+        rules AS (
+            SELECT total_races, total_sprints, max_points_race_constructor AS max_race, max_points_sprint_constructor AS max_sprint
+            FROM Seasons WHERE season = :season
+        ),
+        standings AS (
+            SELECT paddock_number, constructor_points, ROW_NUMBER() OVER (ORDER BY constructor_points DESC, paddock_number) AS constructor_position, MAX(constructor_points) OVER () AS leader_points
+            FROM points
+        )
+        SELECT :round_number, paddock_number, constructor_position, constructor_points,
+            :round_number = 1 OR constructor_position = 1 OR constructor_points + (total_races - done_races) * max_race + (total_sprints - done_sprints) * max_sprint > leader_points, :season
+        FROM standings, done, rules
+        ORDER BY constructor_position''',
+        {'round_number':round_number,'season':season})
+    constructors_rankings: list[ConstructorRanking] = sql_cursor.fetchall()
+    logger.info('Standings calculated for %s constructors after round No. %s of season %s',len(constructors_rankings),round_number,season)
+    return constructors_rankings
+
+def replace_constructors_rankings_toDB(sql_connection:sqlite3.Connection,first_round:int,constructors_rankings:list[ConstructorRanking],season:int=CURRENT_SEASON) -> None:
+    '''Replaces the constructors' rankings of every round of a season from first_round onwards in the Constructors Ranking Table of the Database in a single transaction, rolling back if any ranking fails'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.execute('''DELETE FROM ConstructorsRanking WHERE season = ? AND round_number >= ?''',(season,first_round,))
+            sql_cursor.executemany('''INSERT INTO ConstructorsRanking (season,round_number,paddock_number,constructor_position,constructor_points,championship_chance) VALUES (?,?,?,?,?,?)''',[(ranking.season,ranking.round_number,ranking.paddock_number,ranking.constructor_position,ranking.constructor_points,ranking.championship_chance) for ranking in constructors_rankings])
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to replace constructors rankings from round No. %s, batch rolled back',e,first_round)
+        raise
+    REFERENCE_CACHE.invalidate('ConstructorsRanking')
+    logger.info('%s constructors rankings replaced in DB from round No. %s.',len(constructors_rankings),first_round)
+
+def get_constructors_ranking_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> list[ConstructorRanking]:
+    '''Fetches the constructors' rankings stored after a round of a season in the Constructors Ranking Table of the Database, by position'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.row_factory = constructor_ranking_factory
+    sql_cursor.execute('''SELECT round_number,paddock_number,constructor_position,constructor_points,championship_chance,season FROM ConstructorsRanking WHERE season = ? and round_number = ? ORDER BY constructor_position''',(season,round_number,))
+    return sql_cursor.fetchall()
+
+#############################################################################
+####                       Title Probabilities                           ####
+#############################################################################
+
+def get_drivers_ranking_points_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> Dict[int,int]:
+    '''Fetches the points of every driver in the Drivers Ranking Table after a round of a season, by car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT car_number, car_points FROM DriversRanking WHERE season = ? and round_number = ?''',(season,round_number,))
+    return {car_number: car_points for car_number, car_points in sql_cursor.fetchall()}
+
+def get_constructors_ranking_points_fromDB(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> Dict[int,int]:
+    '''Fetches the points of every constructor in the Constructors Ranking Table after a round of a season, by paddock number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT paddock_number, constructor_points FROM ConstructorsRanking WHERE season = ? and round_number = ?''',(season,round_number,))
+    return {paddock_number: constructor_points for paddock_number, constructor_points in sql_cursor.fetchall()}
+
+def replace_title_probabilities_toDB(sql_connection:sqlite3.Connection,round_number:int,title_probabilities:list[TitleProbability],season:int=CURRENT_SEASON) -> None:
+    '''Replaces the title probabilities of both championships after a round of a season in the Title Probabilities Table of the Database in a single transaction, rolling back if any probability fails'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.execute('''DELETE FROM TitleProbabilities WHERE season = ? AND round_number = ?''',(season,round_number,))
+            sql_cursor.executemany('''INSERT INTO TitleProbabilities (season,round_number,championship,number,probability,simulations,seed) VALUES (?,?,?,?,?,?,?)''',[(title_probability.season,title_probability.round_number,title_probability.championship,title_probability.number,title_probability.probability,title_probability.simulations,title_probability.seed) for title_probability in title_probabilities])
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to replace the title probabilities of round No. %s, batch rolled back',e,round_number)
+        raise
+    logger.info('%s title probabilities stored in DB for round No. %s.',len(title_probabilities),round_number)
+
+def get_title_probabilities_fromDB(sql_connection:sqlite3.Connection,championship:str,season:int=CURRENT_SEASON) -> Dict[int,Dict[int,float]]:
+    '''Fetches the title probabilities of a championship ('Drivers' or 'Constructors') of a season stored after each round, {round_number: {number: probability}}, to follow their trend'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT round_number, number, probability FROM TitleProbabilities WHERE season = ? AND championship = ? ORDER BY round_number''',(season,championship,))
+    probabilities: Dict[int,Dict[int,float]] = {}
+    for round_number, number, probability in sql_cursor.fetchall():
+        probabilities.setdefault(round_number,{})[number] = probability
+    return probabilities
+
+#############################################################################
+####                                Laps                                 ####
+#############################################################################
+
+def replace_session_laps_toDB(sql_connection:sqlite3.Connection,round_number:int,session_type:str,laps_chunks:Iterable[list[Tuple]],season:int=CURRENT_SEASON) -> int:
+    '''Replaces the laps of a session of a season in the Laps Table by the laps of each chunk (season, round number, session type, car number, lap number, lap time, time in seconds, status, position and pit), with one executemany per chunk in a single transaction.
+    The chunks are written as they are produced (see stream_laps_file), so only one is held in memory, and a failure in any of them rolls back the whole session. Returns the number of laps written'''
+    laps: int = 0
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.execute('''DELETE FROM Laps WHERE season = ? AND round_number = ? AND session_type = ?''',(season,round_number,session_type,))
+            for laps_chunk in laps_chunks:
+                sql_cursor.executemany('''INSERT INTO Laps (season,round_number,session_type,car_number,lap_number,lap_time,time_seconds,status,position,pit) VALUES (?,?,?,?,?,?,?,?,?,?)''',laps_chunk)
+                laps += len(laps_chunk)
+            bump_data_version(sql_cursor)
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to replace the laps of session %s of round No. %s after %s laps, session rolled back',e,session_type,round_number,laps)
+        raise
+    logger.info('%s laps stored in DB for session %s of round No. %s.',laps,session_type,round_number)
+    return laps
+
+def get_session_laps_fromDB(sql_connection:sqlite3.Connection,round_number:int,session_type:str,season:int=CURRENT_SEASON) -> list[Tuple[int,int,Optional[float],bool]]:
+    '''Fetches the laps of a session of a season in the Laps Table: car number, lap number, time in seconds (None without a time) and pit, ordered by car and lap'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT car_number, lap_number, time_seconds, pit FROM Laps WHERE season = ? AND round_number = ? AND session_type = ? ORDER BY car_number, lap_number''',(season,round_number,session_type,))
+    return [(car_number,lap_number,time_seconds,bool(pit)) for car_number, lap_number, time_seconds, pit in sql_cursor.fetchall()]
+
+#############################################################################
+####                            Teammates                                ####
+#############################################################################
+
+def get_teammate_sessions_fromDB(sql_connection:sqlite3.Connection,first_round:int,season:int=CURRENT_SEASON) -> list[Tuple[int,str,int,int,Optional[int],Optional[int],Optional[float],int]]:
+    '''Fetches with a single query the Results of a season from first_round onwards grouped by round, session type and paddock number, so the cars of a constructor in a session (its teammates, see compare_teammates) are consecutive: round number, session type, paddock number, car number, position, status, time in seconds and points, ordered by round, session type, paddock number and car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT round_number, session_type, paddock_number, car_number, position, status, time_seconds, car_points FROM Results WHERE season = ? AND round_number >= ? ORDER BY round_number, session_type, paddock_number, car_number''',(season,first_round,))
+    return sql_cursor.fetchall()
 
-def get_points_of_P1_Constructor_fromDB(sql_connection:sqlite3.Connection,round_number:int) -> int:
-    '''Fetches the points of the constructor in P1 by round number from the Constructors Ranking Table of the Database'''
+def replace_teammate_comparisons_toDB(sql_connection:sqlite3.Connection,first_round:int,comparisons:list[Tuple],season:int=CURRENT_SEASON) -> None:
+    '''Replaces the teammate comparisons of every round of a season from first_round onwards in the Teammate Comparisons Table in a single transaction, rolling back if any comparison fails. Each comparison is (season, round number, session family, paddock number, car number, teammate number, session type, car ahead, time delta, car points, teammate points)'''
+    try:
+        with transaction(sql_connection) as sql_cursor:
+            sql_cursor.execute('''DELETE FROM TeammateComparisons WHERE season = ? AND round_number >= ?''',(season,first_round,))
+            sql_cursor.executemany('''INSERT INTO TeammateComparisons (season,round_number,session_family,paddock_number,car_number,teammate_number,session_type,ahead,time_delta,car_points,teammate_points) VALUES (?,?,?,?,?,?,?,?,?,?,?)''',comparisons)
+    except sqlite3.Error as e:
+        logger.error('Error %s detected when trying to replace the teammate comparisons from round No. %s, batch rolled back',e,first_round)
+        raise
+    logger.info('%s teammate comparisons replaced in DB from round No. %s.',len(comparisons),first_round)
+
+def get_teammate_comparisons_fromDB(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[Tuple[int,int,int,str,Optional[int],Optional[float],int,int]]:
+    '''Fetches the teammate comparisons of a season in the Teammate Comparisons Table: paddock number, car number, teammate number, session family, car ahead (None if not comparable), time delta, car points and teammate points, ordered by paddock number, cars and round'''
     sql_cursor = sql_connection.cursor()
-    logger.info(f'Fetching points for constructor in P1 by round No. {round_number}')
-    sql_cursor.execute('''SELECT constructor_points FROM ConstructorsRanking WHERE round_number = ? and constructor_position = 1''',(round_number,))
-    points = sql_cursor.fetchone()[0]
-    logger.info(f'Retrieved {points} points for constructor in P1 by round No. {round_number}')
-    return points
\ No newline at end of file
+    sql_cursor.execute('''SELECT paddock_number, car_number, teammate_number, session_family, ahead, time_delta, car_points, teammate_points FROM TeammateComparisons WHERE season = ? ORDER BY paddock_number, car_number, teammate_number, round_number''',(season,))
+    return sql_cursor.fetchall()
+
+#############################################################################
+####                          Columnar store                             ####
+#############################################################################
+
+def get_columnar_results_fromDB(sql_connection:sqlite3.Connection,first_round:int,season:int=CURRENT_SEASON) -> list[Tuple]:
+    '''Fetches the results of the finished rounds of a season from first_round onwards for the columnar store (see columnar_store.py): round number, car number, paddock number, session type, position, status, time in seconds and points, ordered by round, session type and car number'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT round_number, car_number, paddock_number, session_type, position, status, time_seconds, car_points FROM Results WHERE season = ? AND round_number >= ? AND round_number IN (SELECT round_number FROM Rounds WHERE season = ? AND round_finished = 1) ORDER BY round_number, session_type, car_number''',(season,first_round,season,))
+    return sql_cursor.fetchall()
+
+def get_columnar_drivers_ranking_fromDB(sql_connection:sqlite3.Connection,first_round:int,season:int=CURRENT_SEASON) -> list[Tuple]:
+    '''Fetches the drivers rankings of a season stored after every round from first_round onwards for the columnar store and the standings history (see get_standings_history): round number, car number, position and points, ordered by round and position'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT round_number, car_number, car_position, car_points FROM DriversRanking WHERE season = ? AND round_number >= ? ORDER BY round_number, car_position''',(season,first_round,))
+    return sql_cursor.fetchall()
+
+def get_columnar_constructors_ranking_fromDB(sql_connection:sqlite3.Connection,first_round:int,season:int=CURRENT_SEASON) -> list[Tuple]:
+    '''Fetches the constructors rankings of a season stored after every round from first_round onwards for the columnar store and the standings history (see get_standings_history): round number, paddock number, position and points, ordered by round and position'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''SELECT round_number, paddock_number, constructor_position, constructor_points FROM ConstructorsRanking WHERE season = ? AND round_number >= ? ORDER BY round_number, constructor_position''',(season,first_round,))
+    return sql_cursor.fetchall()
+
+# Times every *_toDB and *_fromDB function and counts its statements and rows when profiling (--profile)
+instrument_functions(globals(),__name__)
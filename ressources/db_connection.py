@@ -0,0 +1,71 @@
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+from urllib.parse import quote
+from ressources.instrumentation import install_trace
+from ressources.constants import SQLITE_PRAGMAS
+
+logger = logging.getLogger(__name__)
+
+# One read-only connection per thread and database file
+reader_connections: threading.local = threading.local()
+
+def apply_pragmas(sql_connection:sqlite3.Connection,read_only:bool=False) -> None:
+    '''Applies the tuning pragmas of SQLITE_PRAGMAS (constants.py file) to a connection. The journal mode (WAL) is stored in the database file, so it is only set by the writer'''
+    for pragma, value in SQLITE_PRAGMAS.items():
+        if read_only and pragma == 'journal_mode':
+            continue
+        sql_connection.execute(f'PRAGMA {pragma} = {value}')
+    if read_only:
+        sql_connection.execute('PRAGMA query_only = ON')
+
+def open_writer_connection(filename:str) -> sqlite3.Connection:
+    '''Opens the single read-write connection of the program to the database, in WAL mode so readers are not blocked by writes. Its statements are counted when profiling (see install_trace)'''
+    logger.info('Opening writer connection to %s',filename)
+    try:
+        sql_connection: sqlite3.Connection = sqlite3.connect(filename)
+    except sqlite3.OperationalError as e:
+        logger.critical("Error accesing the DB: %s",e)
+        exit()
+    install_trace(sql_connection)
+    apply_pragmas(sql_connection)
+    return sql_connection
+
+def get_reader_connection(filename:str) -> sqlite3.Connection:
+    '''Returns the read-only connection of the current thread to the database, opening it on first use. Readers run alongside the writer without "database is locked" errors thanks to WAL'''
+    connections: dict = reader_connections.__dict__.setdefault('connections',{})
+    if filename not in connections:
+        logger.info('Opening reader connection to %s for thread %s',filename,threading.get_ident())
+        # Imported on first use: only the readers need it, not the startup
+        from pathlib import Path
+        uri: str = f'file:{quote(Path(filename).absolute().as_posix())}?mode=ro'
+        sql_connection: sqlite3.Connection = sqlite3.connect(uri,uri=True)
+        install_trace(sql_connection)
+        apply_pragmas(sql_connection,read_only=True)
+        connections[filename] = sql_connection
+    return connections[filename]
+
+def close_reader_connections() -> None:
+    '''Closes the read-only connections of the current thread'''
+    connections: dict = reader_connections.__dict__.setdefault('connections',{})
+    for sql_connection in connections.values():
+        sql_connection.close()
+    connections.clear()
+
+@contextmanager
+def transaction(sql_connection:sqlite3.Connection) -> Iterator[sqlite3.Cursor]:
+    '''Runs the statements of the block in one transaction and yields its cursor: commits at the end of the block or rolls back if it raises.
+    If the connection is already in a transaction (e.g. a batch import), the block joins it and the outer transaction commits'''
+    sql_cursor: sqlite3.Cursor = sql_connection.cursor()
+    if sql_connection.in_transaction:
+        yield sql_cursor
+        return
+    sql_cursor.execute('BEGIN IMMEDIATE')
+    try:
+        yield sql_cursor
+    except BaseException:
+        sql_connection.rollback()
+        raise
+    sql_connection.commit()
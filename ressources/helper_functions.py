@@ -1,14 +1,18 @@
 import logging
 from datetime import timedelta
-from typing import Tuple, Dict
+from typing import Tuple, Dict, Optional
+import numpy as np
 from ressources.classes.Driver import Driver
 from ressources.classes.Constructor import Constructor
 from ressources.classes.Result import Result
-from ressources.database_functions_sqlite3 import get_points_by_driver_ranking_fromDB, get_points_by_constructors_ranking_fromDB,get_done_races_fromDB,get_done_sprints_fromDB,get_points_of_P1_Driver_fromDB, get_points_of_P1_Constructor_fromDB
-from ressources.constants import RACE_POINTS, SPRINT_POINTS, TOTAL_RACES, TOTAL_SPRINTS, MAX_POINTS_RACE_CONSTRUCTOR, MAX_POINTS_RACE_DRIVER, MAX_POINTS_SPRINT_CONSTRUCTOR, MAX_POINTS_SPRINT_DRIVER, LOG_FILE, LOG_FORMAT
+from ressources.classes.HeadToHead import HeadToHead
+from ressources.classes.HeadToHeadMatrix import HeadToHeadMatrix
+from ressources.classes.Season import Season
+from ressources.classes.StandingsHistory import StandingsHistory
+from ressources.championship_math import championship_chances, remaining_sessions, order_competitors
+from ressources.constants import CURRENT_SEASON
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format=LOG_FORMAT)
 
 def convert_time_to_seconds(time_string:str) -> float:
     """
@@ -52,151 +56,142 @@ def convert_time_to_seconds(time_string:str) -> float:
 
     return total_seconds
 
-def attribute_points(position:str,session_type:str) -> int:
-    '''Returns the points attributed to each position according to the dictionaries RACE_POINTS and SPRINT_POINTS in the constants.py file'''
-    points: int = 0
-    if session_type == 'Race':
-        points = RACE_POINTS[position]
-    elif session_type == 'Sprint':
-        points = SPRINT_POINTS[position]
-    else:
-        points = 0
-    logger.info(f'Position {position} is attributed {points} points for the session type: {session_type}.')
-    return points
-
-def get_previous_points_driver(sql_connection,car_number:int, round_number:int) -> int:
-    '''Returns the number of points accumulated by a driver for the previous rounds'''
-    logger.info(f'Calculating points for driver No. {car_number} before round: {round_number}')
-    points: int = 0
-    if round_number == 1:
-        points = 0
-    else:
-        points = get_points_by_driver_ranking_fromDB(sql_connection,round_number-1,car_number)
-    logger.info(f'Driver No. {car_number} has {points} points before round: {round_number}')
+def attribute_points(position:str,session_type:str,season:Season) -> int:
+    '''Returns the points attributed to each position according to the points tables of the season (Seasons Table), 0 for the positions without points'''
+    points: int = season.points_table(session_type).get(position,0)
+    logger.info('Position %s is attributed %s points for the session type: %s.',position,points,session_type)
     return points
 
-def get_previous_points_constructor(sql_connection,paddock_number:int, round_number:int) -> int:
-    '''Returns the number of points accumulated by a constructor for the previous rounds'''
-    logger.info(f'Calculating points for constructor No. {paddock_number} before round: {round_number}')
-    points: int = 0
-    if round_number == 1:
-        points = 0
-    else:
-        points = get_points_by_constructors_ranking_fromDB(sql_connection,round_number-1,paddock_number)
-    logger.info(f'Constructor No. {paddock_number} has {points} points before round: {round_number}')
-    return points
+def calculate_cascade_standings(previous_points:Dict[int,int],points_by_round:Dict[int,Dict[int,int]],finished_rounds:list[Tuple[int,str]],first_round:int,calendar:list[Tuple[int,str]],season:Season,cars:int) -> Dict[int,list[Tuple[int,int,int,bool]]]:
+    '''Calculates the standings of every finished round from first_round onwards, carrying the running totals forward in memory from previous_points (points of every competitor before first_round, competitors without points included with 0). Competitors are ranked by points, ties ordered by their number, and the championship chances are checked against the sessions of the calendar still to run (see championship_chances), cars being the cars of a competitor in each session.
+    Returns, for each round, a list of (competitor number, position, points, championship chance)'''
+    running_points: Dict[int,int] = dict(previous_points)
+    standings_by_round: Dict[int,list[Tuple[int,int,int,bool]]] = {}
+    for round_number, round_type in finished_rounds:
+        if round_number < first_round:
+            continue
+        for number, points in points_by_round.get(round_number,{}).items():
+            if number in running_points:
+                running_points[number] += points
+        chances: Dict[int,bool] = championship_chances(running_points,remaining_sessions(calendar,round_number,season),cars)
+        standings_by_round[round_number] = [(number,position,points,chances[number]) for position, (number, points) in enumerate(order_competitors(running_points), start=1)]
+    return standings_by_round
 
-def is_driver_championship_chance(sql_connection,points:int,round_number:int) -> bool:
-    '''Returns if the driver has mathematical chances of winning the championship, based on the number of available races and sprints, and the points difference with current P1'''
-    logger.info(f'Calculating chances for WDC with {points} by Round: {round_number}')
-    if round_number == 1:
-        return True
-    done_races:int = get_done_races_fromDB(sql_connection)
-    done_sprints: int = get_done_sprints_fromDB(sql_connection)
-    points_p1: int = get_points_of_P1_Driver_fromDB(sql_connection,round_number)
-    available_races: int = TOTAL_RACES - done_races
-    available_sprints: int = TOTAL_SPRINTS - done_sprints
-    available_points: int = (available_races*MAX_POINTS_RACE_DRIVER) + (available_sprints*MAX_POINTS_SPRINT_DRIVER)
-    if (points+available_points) > points_p1:
-        logger.info(f'With {points} by Round: {round_number} is still possible to win the WDC')
-        return True
-    else:
-        logger.info(f'With {points} by Round: {round_number} is no longer possible to win the WDC')
-        return False
-
-def is_constructor_championship_chance(sql_connection,points:int,round_number:int) -> bool:
-    '''Returns if the constructor has mathematical chances of winning the championship, based on the number of available races and sprints, and the points difference with current P1'''
-    logger.info(f'Calculating chances for WCC with {points} by Round: {round_number}')
-    if round_number == 1:
-        return True
-    done_races:int = get_done_races_fromDB(sql_connection)
-    done_sprints: int = get_done_sprints_fromDB(sql_connection)
-    # Get points of P1
-    points_p1: int = get_points_of_P1_Constructor_fromDB(sql_connection,round_number)
-    available_races: int = TOTAL_RACES - done_races
-    available_sprints: int = TOTAL_SPRINTS - done_sprints
-    available_points: int = (available_races*MAX_POINTS_RACE_CONSTRUCTOR) + (available_sprints*MAX_POINTS_SPRINT_CONSTRUCTOR)
-    if (points+available_points) > points_p1:
-        logger.info(f'With {points} by Round: {round_number} is still possible to win the WCC')
+def is_not_time_result(result:str) -> bool:
+    if result == 'DNS' or result == 'DNF' or result == 'DSQ':
         return True
     else:
-        logger.info(f'With {points} by Round: {round_number} is no longer possible to win the WCC')
         return False
 
-def is_not_time_result(result:str) -> bool:
-    if result == 'DNS' or result == 'DNF' or result == 'DSQ':
+def is_timed_result(result:str) -> bool:
+    '''Returns if a result has a time in seconds, as classified drivers can also have no time (e.g. Lapped)'''
+    try:
+        float(result)
         return True
-    else:
+    except ValueError:
         return False
 
-def compare_results_H2H(driver1: Driver,driver2: Driver,results_driver1: list[Result],results_driver2: list[Result]) -> Tuple[
-    Dict[str, int],
-    Dict[str, int],
-    Dict[str, int],
-    float]:
+def compare_results_H2H(driver1: Driver,driver2: Driver,results_driver1: list[Result],results_driver2: list[Result]) -> HeadToHead:
     '''Compares the results of two drivers Head to Head, giving results by each type of session, only taking into account comparable sessions (e.g. Q1 with Q1, not Q1 and Q3).
-    Returns three dictionaries: driver1 counter, driver 2 counter, comparable sessions counter, and the average delta time as a float'''
-    driver1_ahead_counter: Dict[str,int] = dict()
-    driver2_ahead_counter: Dict[str,int] = dict()
-    comparable_sessions_counter: Dict[str,int] = dict()
-    time_delta: float = 0
-    time_delta_count: int = 0
-    time_delta_sum: float = 0
-    
+    The results of driver 2 are indexed by (season, round_number, session_type) so each result of driver 1 is joined with its comparable session in constant time.
+    Returns a HeadToHead with the driver 1 counter, driver 2 counter, comparable sessions counter, and the average delta time (None if no timed session is comparable)'''
+    head_to_head: HeadToHead = HeadToHead(driver1,driver2)
+    results_driver2_index: Dict[Tuple[int,str],Result] = {}
+    for d2 in results_driver2:
+        head_to_head.add_session_type(d2.session_type)
+        results_driver2_index[(d2.season,d2.round_number,d2.session_type)] = d2
+
     for d1 in results_driver1:
-        for d2 in results_driver2:
-            driver1_ahead_counter[d1.session_type] = driver1_ahead_counter.get(d1.session_type,0)
-            driver2_ahead_counter[d2.session_type] = driver2_ahead_counter.get(d2.session_type,0)
-            driver1_ahead_counter[d2.session_type] = driver1_ahead_counter.get(d2.session_type,0)
-            driver2_ahead_counter[d1.session_type] = driver2_ahead_counter.get(d1.session_type,0)
-            comparable_sessions_counter[d1.session_type] = comparable_sessions_counter.get(d1.session_type,0)
-            
-            #Checks that both drivers qualified for the session
-            if not (hasattr(d1, 'session_type') and d1.session_type == d2.session_type and hasattr(d2, 'session_type') and d2.session_type == d1.session_type and hasattr(d1, 'round_number') and d1.round_number == d2.round_number and hasattr(d2, 'round_number') and d2.round_number == d1.round_number):
-                logger.info(f'Drivers do not have common session')
-                continue
-            #Checks if both drivers had a DNF, DNS or DSQ
-            if is_not_time_result(d1.result_time) and is_not_time_result(d2.result_time):
-                logger.info(f'Both drivers had a DNF, DNS or DSQ')
-                continue
-            #Checks that driver 1 had a DNF, DNS or DSQ but driver 2 finished the session
-            if is_not_time_result(d1.result_time) and not is_not_time_result(d2.result_time):
-                logger.info(f'For round {d1.round_number} and session {d1.session_type}, {driver1.name} had a {d1.result_time}, but {driver2.name} finished with a time {d2.result_time}')
-                driver2_ahead_counter[d2.session_type] = driver2_ahead_counter.get(d2.session_type,0) + 1
-                comparable_sessions_counter[d1.session_type] = comparable_sessions_counter.get(d1.session_type,0) + 1
-                logger.info(f'# {driver2.name} ahead #')
-                continue
-            #Checks that driver 2 had a DNF, DNS or DSQ but driver 1 finished the session
-            if not is_not_time_result(d1.result_time) and is_not_time_result(d2.result_time):
-                logger.info(f'For round {d1.round_number} and session {d1.session_type}, {driver2.name} had a {d2.result_time}, but {driver1.name} finished with a time {d1.result_time}')
-                driver1_ahead_counter[d1.session_type] = driver1_ahead_counter.get(d1.session_type,0) + 1
-                comparable_sessions_counter[d1.session_type] = comparable_sessions_counter.get(d1.session_type,0) + 1
-                logger.info(f'# {driver1.name} ahead #')
-                continue
-            
-            d1_result_time = float(d1.result_time)
-            d2_result_time = float(d2.result_time)
-
-            #Checks if driver 1 finished ahead of driver 2
-            if int(d1.car_position) < int(d2.car_position):
-                logger.info(f'For round {d1.round_number} and session {d1.session_type}, {driver1.name} finished in {d1.car_position}, while {driver2.name} finished in {d2.car_position}')
-                driver1_ahead_counter[d1.session_type] = driver1_ahead_counter.get(d1.session_type,0) + 1
-                comparable_sessions_counter[d1.session_type] = comparable_sessions_counter.get(d1.session_type,0) + 1
-                time_delta = d1_result_time - d2_result_time
-                time_delta_sum += time_delta
-                time_delta_count += 1
-                logger.info(f'# {driver1.name} ahead #')
-                
-            #Checks if driver 2 finished ahead of driver 1
-            else:
-                logger.info(f'For round {d1.round_number} and session {d1.session_type}, {driver1.name} finished in {d1.car_position}, while {driver2.name} finished in {d2.car_position}')
-                driver2_ahead_counter[d2.session_type] = driver2_ahead_counter.get(d2.session_type,0) + 1
-                comparable_sessions_counter[d1.session_type] = comparable_sessions_counter.get(d1.session_type,0) + 1
-                time_delta = d1_result_time - d2_result_time
-                time_delta_sum += time_delta
-                time_delta_count += 1
-                logger.info(f'# {driver2.name} ahead #')
-                
-    time_delta_average: float = time_delta_sum / time_delta_count
-
-    return driver1_ahead_counter, driver2_ahead_counter, comparable_sessions_counter, time_delta_average
\ No newline at end of file
+        session_type: str = d1.session_type
+        head_to_head.add_session_type(session_type)
+        #Checks that both drivers qualified for the session
+        d2: Optional[Result] = results_driver2_index.get((d1.season,d1.round_number,session_type))
+        if d2 is None:
+            continue
+        d1_not_time: bool = is_not_time_result(d1.result_time)
+        d2_not_time: bool = is_not_time_result(d2.result_time)
+        #Checks if both drivers had a DNF, DNS or DSQ
+        if d1_not_time and d2_not_time:
+            continue
+        head_to_head.comparable_sessions[session_type] += 1
+        #Checks that driver 1 had a DNF, DNS or DSQ but driver 2 finished the session
+        if d1_not_time:
+            head_to_head.driver2_ahead[session_type] += 1
+            continue
+        #Checks that driver 2 had a DNF, DNS or DSQ but driver 1 finished the session
+        if d2_not_time:
+            head_to_head.driver1_ahead[session_type] += 1
+            continue
+        #Checks which driver finished ahead
+        if int(d1.car_position) < int(d2.car_position):
+            head_to_head.driver1_ahead[session_type] += 1
+        else:
+            head_to_head.driver2_ahead[session_type] += 1
+        #Lapped drivers are classified but have no time to compare
+        if not (is_timed_result(d1.result_time) and is_timed_result(d2.result_time)):
+            continue
+        head_to_head.time_delta_sum += float(d1.result_time) - float(d2.result_time)
+        head_to_head.time_delta_count += 1
+
+    logger.info('%s vs %s: %s comparable sessions out of %s and %s results',driver1.name,driver2.name,sum(head_to_head.comparable_sessions.values()),len(results_driver1),len(results_driver2),extra={'summary': True})
+    return head_to_head
+
+
+def calculate_h2h_matrix(session_family:str,results:list[Result],car_numbers:list[int],trigrammes:Dict[int,str]) -> HeadToHeadMatrix:
+    '''Compares the results of every pair of drivers Head to Head at once, with the same rules as compare_results_H2H.
+    The results are pivoted into arrays of one row per session (season, round_number, session_type) and one column per car: in each session the cars are ordered with the finishers by position first, then the DNF, DNS or DSQ. Each finisher is ahead of every car after it, and the time delta is only counted between finishers with a time (not Lapped).
+    Returns a HeadToHeadMatrix with the wins, comparable sessions and time deltas of every pair of car_numbers'''
+    matrix: HeadToHeadMatrix = HeadToHeadMatrix(session_family,car_numbers,trigrammes)
+    sessions: Dict[Tuple[int,int,str],int] = {}
+    rows: list[int] = []
+    columns: list[int] = []
+    places: list[int] = []
+    finished: list[bool] = []
+    times: list[float] = []
+    for result in results:
+        if result.car_number not in matrix.index:
+            continue
+        rows.append(sessions.setdefault((result.season,result.round_number,result.session_type),len(sessions)))
+        columns.append(matrix.index[result.car_number])
+        # Classified by position, the others after, in the order of the results
+        places.append((int(result.car_position) if result.car_position.isdigit() else len(results)+1)*len(results) + len(places))
+        finished.append(not is_not_time_result(result.result_time))
+        times.append(float(result.result_time) if finished[-1] and is_timed_result(result.result_time) else np.nan)
+
+    shape: Tuple[int,int] = (len(sessions),len(car_numbers))
+    present: np.ndarray = np.zeros(shape,dtype=bool)
+    present[rows,columns] = True
+    finisher: np.ndarray = np.zeros(shape,dtype=bool)
+    finisher[rows,columns] = finished
+    place: np.ndarray = np.zeros(shape,dtype=np.int64)
+    place[rows,columns] = places
+    time: np.ndarray = np.full(shape,np.nan)
+    time[rows,columns] = times
+
+    # ahead[s, i, j]: in session s, car i finished and car j is after it (a later finisher, or did not finish)
+    ahead: np.ndarray = finisher[:,:,None] & present[:,None,:] & (~finisher[:,None,:] | (place[:,:,None] < place[:,None,:]))
+    matrix.wins = ahead.sum(axis=0,dtype=np.int64)
+    matrix.comparable_sessions = matrix.wins + matrix.wins.T
+    delta: np.ndarray = time[:,:,None] - time[:,None,:]
+    timed: np.ndarray = ~np.isnan(delta)
+    timed[:,np.arange(len(car_numbers)),np.arange(len(car_numbers))] = False
+    matrix.time_delta_sum = np.where(timed,delta,0.0).sum(axis=0)
+    matrix.time_delta_count = timed.sum(axis=0,dtype=np.int64)
+
+    logger.info('Head to Head matrix for %s calculated for %s drivers over %s sessions',session_family,len(car_numbers),len(sessions),extra={'summary': True})
+    return matrix
+
+def calculate_standings_history(championship:str,rankings:list[Tuple[int,int,int,int]],numbers:list[int],season:int=CURRENT_SEASON) -> StandingsHistory:
+    '''Pivots the rankings of a championship stored after every round (round number, number, position and points, ordered by round) into the dense matrices of a StandingsHistory, with a column for every competitor of numbers and of the rankings.
+    A round without rankings, or a competitor without a ranking after a round, keeps the points of the previous round without position'''
+    rankings_by_round: Dict[int,list[Tuple[int,int,int]]] = {}
+    for round_number, number, position, points in rankings:
+        rankings_by_round.setdefault(round_number,[]).append((number,position,points))
+    history: StandingsHistory = StandingsHistory(championship,sorted(set(numbers) | {number for round_number, number, position, points in rankings}),max(rankings_by_round,default=0),season)
+    for round_number in range(1,history.last_round+1):
+        history.points[round_number] = history.points[round_number-1][:]
+        for number, position, points in rankings_by_round.get(round_number,[]):
+            history.points[round_number][history.index[number]] = points
+            history.positions[round_number][history.index[number]] = position
+    logger.info('Standings history of the %s championship of season %s pivoted for %s competitors over %s rounds',championship,season,len(history.numbers),history.last_round)
+    return history
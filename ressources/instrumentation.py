@@ -0,0 +1,130 @@
+import time
+import sqlite3
+import logging
+import functools
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+from ressources.classes.Profiler import PROFILER, FunctionProfile
+
+logger = logging.getLogger(__name__)
+
+QUERY_KEYWORDS: tuple[str,...] = ('SELECT','WITH','PRAGMA','EXPLAIN')
+TRANSACTION_KEYWORDS: tuple[str,...] = ('BEGIN','COMMIT','ROLLBACK','SAVEPOINT','RELEASE','END')
+
+class QueryBudgetExceeded(AssertionError):
+    '''Raised by query_budget when a block executes more SQL statements than allowed'''
+
+#### Statements ####
+
+def trace_statement(statement:str) -> None:
+    '''Trace callback of the connections (see install_trace): counts each executed statement of the current thread as a query (SELECT, WITH, PRAGMA) or a write (INSERT, UPDATE, DELETE, schema changes). Transaction control statements are not counted. executemany counts one write per row'''
+    keyword: str = statement.lstrip().split(' ',1)[0].upper()
+    if keyword in TRANSACTION_KEYWORDS:
+        return
+    counters = PROFILER.counters()
+    if keyword in QUERY_KEYWORDS:
+        counters.queries += 1
+    else:
+        counters.writes += 1
+
+def install_trace(sql_connection:sqlite3.Connection,enabled:Optional[bool]=None) -> None:
+    '''Counts the statements executed on a connection, through sqlite3 set_trace_callback, when enabled (by default when PROFILER is enabled, --profile); removes the callback otherwise.
+    sqlite3 calls the callback for every row of an executemany, so an untraced connection keeps the bulk writes at full speed'''
+    if enabled is None:
+        enabled = PROFILER.enabled
+    sql_connection.set_trace_callback(trace_statement if enabled else None)
+
+#### Functions ####
+
+def count_rows(result:Any) -> int:
+    '''Returns the rows read by a function from its result: the length of a list, dict or tuple, 0 for None and 1 for a single record'''
+    if result is None:
+        return 0
+    if isinstance(result,(list,dict,tuple,set)):
+        return len(result)
+    return 1
+
+def instrumented(name:str,function:Callable) -> Callable:
+    '''Wraps a function to time it and count its statements and rows when PROFILER is enabled (--profile), at the cost of a single check otherwise'''
+    @functools.wraps(function)
+    def wrapper(*args,**kwargs):
+        if not PROFILER.enabled:
+            return function(*args,**kwargs)
+        counters = PROFILER.counters()
+        queries: int = counters.queries
+        writes: int = counters.writes
+        start: float = time.perf_counter()
+        result: Any = function(*args,**kwargs)
+        elapsed_ms: float = (time.perf_counter() - start)*1000
+        rows: int = count_rows(result)
+        counters.rows += rows
+        PROFILER.record(name,counters.queries - queries,counters.writes - writes,rows,elapsed_ms)
+        return result
+    return wrapper
+
+def instrument_functions(namespace:Dict[str,Any],module_name:str) -> None:
+    '''Replaces every public *_toDB and *_fromDB function of a module namespace (globals()) by its instrumented version. Called at the end of the module, so every caller importing the functions gets the instrumented ones'''
+    for name, function in list(namespace.items()):
+        if callable(function) and getattr(function,'__module__',None) == module_name and (name.endswith('_toDB') or name.endswith('_fromDB')):
+            namespace[name] = instrumented(name,function)
+
+#### Actions ####
+
+@contextmanager
+def profile_action(name:str) -> Iterator[Optional[FunctionProfile]]:
+    '''Profiles an action (e.g. a menu option) when PROFILER is enabled: yields the profile of the action, which holds its statements, rows and time once the block is done, with the breakdown by function kept in PROFILER.actions'''
+    if not PROFILER.enabled:
+        yield None
+        return
+    counters = PROFILER.counters()
+    action: FunctionProfile = FunctionProfile(name)
+    breakdown: Dict[str,FunctionProfile] = {}
+    counters.actions.append((action,breakdown))
+    queries: int = counters.queries
+    writes: int = counters.writes
+    rows: int = counters.rows
+    start: float = time.perf_counter()
+    try:
+        yield action
+    finally:
+        counters.actions.remove((action,breakdown))
+        action.add(counters.queries - queries,counters.writes - writes,counters.rows - rows,(time.perf_counter() - start)*1000)
+        with PROFILER.lock:
+            PROFILER.actions.append((action,breakdown))
+        logger.info('Action %s: %s queries, %s writes, %s rows in %.2f ms',name,action.queries,action.writes,action.rows,action.total_ms,extra={'summary': True})
+
+@contextmanager
+def query_budget(sql_connection:sqlite3.Connection,max_queries:int,max_writes:Optional[int]=None,label:str='block') -> Iterator[None]:
+    '''Asserts that a block executes at most max_queries queries (and max_writes writes if given) on a connection, traced for the block whether PROFILER is enabled or not, e.g. to keep a calculation from issuing one query per driver. Raises QueryBudgetExceeded otherwise'''
+    counters = PROFILER.counters()
+    queries: int = counters.queries
+    writes: int = counters.writes
+    install_trace(sql_connection,True)
+    try:
+        yield
+    finally:
+        install_trace(sql_connection)
+    queries = counters.queries - queries
+    writes = counters.writes - writes
+    if queries > max_queries:
+        raise QueryBudgetExceeded(f'{label} executed {queries} queries, budget is {max_queries}')
+    if max_writes is not None and writes > max_writes:
+        raise QueryBudgetExceeded(f'{label} executed {writes} writes, budget is {max_writes}')
+
+#### Reports ####
+
+def format_action_report(action:FunctionProfile,breakdown:Dict[str,FunctionProfile]) -> list[str]:
+    '''Formats the profile of an action and its breakdown by function, slowest first'''
+    lines: list[str] = [f'#### Profile of {action.name}: {action.queries} queries, {action.writes} writes, {action.rows} rows, {action.total_ms:.2f} ms ####']
+    for profile in sorted(breakdown.values(),key=lambda x: x.total_ms,reverse=True):
+        lines.append(f'{profile.name:>45}: {profile.calls:>6} calls {profile.queries:>6} queries {profile.writes:>6} writes {profile.rows:>7} rows {profile.total_ms:>10.2f} ms')
+    return lines
+
+def format_functions_report() -> list[str]:
+    '''Formats the totals of every instrumented function since the start, with the median, 95th percentile and slowest call'''
+    lines: list[str] = ['#### Profile of the database functions (p50 and p95 are histogram bucket bounds) ####']
+    with PROFILER.lock:
+        profiles: list[FunctionProfile] = sorted(PROFILER.functions.values(),key=lambda x: x.total_ms,reverse=True)
+    for profile in profiles:
+        lines.append(f'{profile.name:>45}: {profile.calls:>6} calls {profile.queries:>6} queries {profile.writes:>6} writes {profile.rows:>7} rows {profile.total_ms:>10.2f} ms p50 <= {profile.percentile_ms(0.5)} ms p95 <= {profile.percentile_ms(0.95)} ms max {profile.max_ms:.2f} ms')
+    return lines
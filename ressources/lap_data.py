@@ -0,0 +1,114 @@
+import os
+import re
+import csv
+import logging
+from itertools import groupby, islice
+from typing import Iterable, Iterator, Optional, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from ressources.classes.StintPace import StintPace
+from ressources.time_parsing import parse_time_column, format_result_time
+from ressources.constants import LAPS_COLUMNS, LAPS_FOLDER, LAPS_CHUNK_ROWS, LAPS_PIT_FLAGS, STINT_PACE_WINDOW, VALID_SESSION_TYPES, CURRENT_SEASON
+
+logger = logging.getLogger(__name__)
+
+# A lap file is read through a pipeline of generators (rows, chunks of rows, chunks of laps): only one chunk of rows is held in memory,
+# written to the Laps Table (see replace_session_laps_toDB) before the next one is read, whatever the size of the file
+
+#############################################################################
+####                          Ingestion                                  ####
+#############################################################################
+
+def find_laps_files(folder:str=LAPS_FOLDER) -> list[Tuple[int,str,str]]:
+    '''Finds every lap file named "ROUND n - <session> laps.csv" in folder (LAPS_FOLDER in the constants.py file by default) and returns them as (round_number, session_type, filename), ordered by round and by session as listed in VALID_SESSION_TYPES'''
+    pattern: str = r"^ROUND (\d+) - (\w+) laps\.csv$"
+    laps_files: list[Tuple[int,str,str]] = []
+    for filename in os.listdir(folder):
+        match = re.match(pattern,filename)
+        if not match:
+            continue
+        if match.group(2) not in VALID_SESSION_TYPES:
+            logger.warning('File %s has an invalid session type, skipping it',filename)
+            continue
+        laps_files.append((int(match.group(1)),match.group(2),filename))
+    laps_files.sort(key=lambda x: (x[0],VALID_SESSION_TYPES.index(x[1])))
+    logger.info('%s lap files found in %s',len(laps_files),folder)
+    return laps_files
+
+def read_lap_rows(filename:str) -> Iterator[list[str]]:
+    '''Yields the rows of a lap file one at a time, after validating its columns against LAPS_COLUMNS. Empty lines are skipped'''
+    with open(filename,"r",newline="") as laps_file:
+        rows = csv.reader(laps_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, skipinitialspace=True)
+        header: list[str] = next(rows,[])
+        if header != LAPS_COLUMNS:
+            logger.error('File %s has columns %s instead of %s',filename,header,LAPS_COLUMNS)
+            raise ValueError(f'Invalid columns in file {filename}')
+        for row in rows:
+            if row:
+                yield row
+
+def chunked(rows:Iterable[list[str]],chunk_rows:int=LAPS_CHUNK_ROWS) -> Iterator[list[list[str]]]:
+    '''Yields the rows in lists of chunk_rows rows, the last one shorter'''
+    iterator: Iterator[list[str]] = iter(rows)
+    while True:
+        chunk: list[list[str]] = list(islice(iterator,chunk_rows))
+        if not chunk:
+            return
+        yield chunk
+
+def parse_laps_chunk(rows:list[list[str]],round_number:int,session_type:str,season:int=CURRENT_SEASON) -> list[Tuple]:
+    '''Converts rows of a lap file into rows of the Laps Table (see replace_session_laps_toDB), the Time column of the whole chunk being parsed in one pass by the time parser of the results files (see parse_time_column).
+    A lap without a time keeps its cell as lap time (e.g. DNF) with its status; a cell of LAPS_PIT_FLAGS in the Pit column marks an in-lap'''
+    lap_column, number_column, time_column, position_column, pit_column = (LAPS_COLUMNS.index(column) for column in ['Lap','No','Time','Pos','Pit'])
+    time_strings: list[str] = [row[time_column].strip() for row in rows]
+    times, statuses = parse_time_column(time_strings)
+    return [(season,round_number,session_type,int(row[number_column]),int(row[lap_column]),format_result_time(time_seconds,time_string),None if time_seconds != time_seconds else time_seconds,status,int(row[position_column]) if row[position_column].strip().isdigit() else None,row[pit_column].strip().upper() in LAPS_PIT_FLAGS) for row, time_string, time_seconds, status in zip(rows,time_strings,times.tolist(),statuses.tolist())]
+
+def stream_laps_file(filename:str,round_number:int,session_type:str,season:int=CURRENT_SEASON,chunk_rows:int=LAPS_CHUNK_ROWS) -> Iterator[list[Tuple]]:
+    '''Yields the laps of a lap file as rows of the Laps Table, chunk_rows laps at a time, reading the file as the chunks are consumed'''
+    chunks: int = 0
+    for rows in chunked(read_lap_rows(filename),chunk_rows):
+        chunks += 1
+        yield parse_laps_chunk(rows,round_number,session_type,season)
+    logger.info('%s chunks of at most %s laps read for session %s of round %s from %s',chunks,chunk_rows,session_type,round_number,filename)
+
+#############################################################################
+####                          Stint pace                                 ####
+#############################################################################
+
+def rolling_averages(times:np.ndarray,window:int=STINT_PACE_WINDOW) -> list[float]:
+    '''Averages of every window of consecutive times, the windows being a view over the times averaged in one operation'''
+    if len(times) < window:
+        return []
+    return sliding_window_view(times,window).mean(axis=1).tolist()
+
+def calculate_stint_pace(laps:list[Tuple[int,int,Optional[float],bool]],window:int=STINT_PACE_WINDOW) -> list[StintPace]:
+    '''Splits the laps of a session (car number, lap number, time in seconds or None, pit; ordered by car and lap, see get_session_laps_fromDB) into the stints of each car, a stint ending with its in-lap, and calculates the pace of each stint over its pace laps (neither the in-lap, nor the out-lap after a pit, nor a lap without a time): average, best lap and rolling averages over window laps.
+    Returns the pace of every stint, by car and stint'''
+    stints: list[StintPace] = []
+    for car_number, car_laps in groupby(laps,key=lambda x: x[0]):
+        stint_laps: list[Tuple[int,int,Optional[float],bool]] = []
+        stint: int = 1
+        for lap in car_laps:
+            stint_laps.append(lap)
+            if lap[3]:
+                stints.append(stint_pace(car_number,stint,stint_laps,window))
+                stint += 1
+                stint_laps = []
+        if stint_laps:
+            stints.append(stint_pace(car_number,stint,stint_laps,window))
+    logger.info('Pace calculated for %s stints over %s laps',len(stints),len(laps))
+    return stints
+
+def stint_pace(car_number:int,stint:int,stint_laps:list[Tuple[int,int,Optional[float],bool]],window:int=STINT_PACE_WINDOW) -> StintPace:
+    '''Pace of a stint of a car from its laps (see calculate_stint_pace), the first stint having no out-lap'''
+    times: np.ndarray = np.array([time_seconds for index, (car, lap_number, time_seconds, pit) in enumerate(stint_laps) if time_seconds is not None and not pit and (index > 0 or stint == 1)],dtype=np.float64)
+    pace: StintPace = StintPace(car_number,stint,stint_laps[0][1],stint_laps[-1][1],len(stint_laps),len(times))
+    if len(times):
+        pace.average = float(times.mean())
+        pace.best_lap = float(times.min())
+        pace.rolling_pace = rolling_averages(times,window)
+    if pace.rolling_pace:
+        pace.best_window = min(pace.rolling_pace)
+        pace.fade = pace.rolling_pace[-1] - pace.rolling_pace[0]
+    return pace
@@ -0,0 +1,74 @@
+import os
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+from ressources.constants import LOG_FILE, LOG_FORMAT, LOG_LEVEL_ENV, LOG_LEVELS_ENV, QUIET_HOT_PATH_ENV, HOT_PATH_LOGGERS
+
+logger = logging.getLogger(__name__)
+
+# Background writer of the log records, started by configure_logging
+log_listener: Optional[QueueListener] = None
+
+class InProcessQueueHandler(QueueHandler):
+    '''QueueHandler for a queue read in the same process: the records are enqueued as they are, leaving the formatting of the message to the background writer'''
+    def prepare(self,record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class HotPathFilter(logging.Filter):
+    '''Quiet hot path mode: drops the per-call and per-row records below WARNING of the hot path loggers (HOT_PATH_LOGGERS in the constants.py file), keeping only the summary line of each operation, logged with extra={"summary": True}'''
+    def filter(self,record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record,'summary',False):
+            return True
+        return not any(record.name == name or record.name.startswith(name + '.') for name in HOT_PATH_LOGGERS)
+
+def parse_log_levels(log_levels:str) -> Dict[str,str]:
+    '''Parses per subsystem levels written as "subsystem=LEVEL,subsystem=LEVEL" (e.g. "database_functions_sqlite3=WARNING,main_functions=DEBUG"), subsystems being the modules of ressources'''
+    levels: Dict[str,str] = {}
+    for item in log_levels.split(','):
+        if '=' not in item:
+            continue
+        subsystem, level = item.split('=',1)
+        subsystem = subsystem.strip()
+        if not subsystem.startswith('ressources') and subsystem != '__main__':
+            subsystem = f'ressources.{subsystem}'
+        levels[subsystem] = level.strip().upper()
+    return levels
+
+def configure_logging(level:Optional[str]=None,log_levels:Optional[str]=None,quiet_hot_path:Optional[bool]=None,filename:str=LOG_FILE) -> QueueListener:
+    '''Configures the logging of the whole program once: the records are put in a queue by the callers and written to the log file by a background QueueListener, so formatting and file I/O are out of the hot paths.
+    Each argument not given is read from the environment: LOG_LEVEL_ENV (global level, INFO by default), LOG_LEVELS_ENV (per subsystem levels, see parse_log_levels) and QUIET_HOT_PATH_ENV (1 for the quiet hot path mode)'''
+    global log_listener
+    if log_listener is not None:
+        return log_listener
+    level = (level or os.environ.get(LOG_LEVEL_ENV,'INFO')).upper()
+    log_levels = log_levels if log_levels is not None else os.environ.get(LOG_LEVELS_ENV,'')
+    if quiet_hot_path is None:
+        quiet_hot_path = os.environ.get(QUIET_HOT_PATH_ENV,'0') == '1'
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    queue_handler: QueueHandler = InProcessQueueHandler(log_queue)
+    if quiet_hot_path:
+        queue_handler.addFilter(HotPathFilter())
+    file_handler: logging.FileHandler = logging.FileHandler(filename)
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root_logger: logging.Logger = logging.getLogger()
+    root_logger.setLevel(level)
+    root_logger.addHandler(queue_handler)
+    for subsystem, subsystem_level in parse_log_levels(log_levels).items():
+        logging.getLogger(subsystem).setLevel(subsystem_level)
+
+    log_listener = QueueListener(log_queue,file_handler,respect_handler_level=True)
+    log_listener.start()
+    atexit.register(stop_logging)
+    logger.info('Logging configured with level %s, subsystem levels "%s" and quiet hot path %s',level,log_levels,quiet_hot_path)
+    return log_listener
+
+def stop_logging() -> None:
+    '''Writes the pending log records and stops the background writer'''
+    global log_listener
+    if log_listener is not None:
+        log_listener.stop()
+        log_listener = None
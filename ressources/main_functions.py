@@ -1,51 +1,149 @@
 import sqlite3
 import logging
 import os
+import re
 import csv
-from typing import Dict
+import shutil
+from typing import Callable, Dict, Optional, Tuple, Union
+from ressources.classes.Season import Season
 from ressources.classes.Driver import Driver
 from ressources.classes.Constructor import Constructor
 from ressources.classes.Round import Round
 from ressources.classes.Result import Result
 from ressources.classes.DriverRanking import DriverRanking
 from ressources.classes.ConstructorRanking import ConstructorRanking
-from ressources.helper_functions import convert_time_to_seconds, is_driver_championship_chance, is_constructor_championship_chance,get_previous_points_driver,get_previous_points_constructor, compare_results_H2H
-from ressources.database_functions_sqlite3 import initialize_db,get_constructor_by_resultname_fromDB, mark_round_done_toDB, get_all_drivers_carnumber_fromDB,get_all_constructors_paddocknumber_fromDB,get_points_by_driver_round_fromDB,get_points_by_constructors_round_fromDB, get_driver_by_trigramme_fromDB,get_last_round_fromDB, get_quali_results_by_driver_fromDB,get_sprint_quali_results_by_driver_fromDB, get_race_results_by_driver_fromDB, get_sprint_results_by_driver_fromDB
-from ressources.constants import LOG_FILE, LOG_FORMAT, DRIVERS_FILE, DRIVERS_COLUMNS, CONSTRUCTORS_FILE, CONSTRUCTORS_COLUMNS, ROUNDS_FILE, ROUNDS_COLUMNS, RESULTS_FOLDER, RESULTS_COLUMNS
+from ressources.classes.HeadToHead import HeadToHead
+from ressources.classes.HeadToHeadMatrix import HeadToHeadMatrix
+from ressources.classes.ChampionshipOutlook import ChampionshipOutlook
+from ressources.classes.TitleProbability import TitleProbability
+from ressources.classes.StandingsHistory import StandingsHistory
+from ressources.classes.StintPace import StintPace
+from ressources.classes.TeammateBattle import TeammateBattle
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.championship_math import championship_chances, remaining_sessions, championship_outlook
+from ressources.migrations import apply_migrations, get_schema_version, SCHEMA_VERSION
+from ressources.db_connection import open_writer_connection, transaction
+from ressources.time_parsing import parse_time_column, format_result_time
+from ressources.helper_functions import compare_results_H2H, calculate_cascade_standings, calculate_h2h_matrix, calculate_standings_history
+from ressources.columnar_store import refresh_columnar_season, open_columnar_season, columnar_h2h
+from ressources.lap_data import find_laps_files, stream_laps_file, calculate_stint_pace
+from ressources.teammate_battles import compare_teammates, summarize_teammate_battles
+from ressources.database_functions_sqlite3 import initialize_db,add_season_toDB,add_driver_toDB,get_season_fromDB,get_calendar_fromDB,get_constructor_by_paddocknumber_fromDB,get_constructors_paddock_map_fromDB,add_results_batch_toDB,get_all_drivers_trigramme_fromDB,get_results_by_session_types_fromDB,get_drivers_standings_fromDB,get_constructors_standings_fromDB,add_drivers_rankings_batch_toDB,add_constructors_rankings_batch_toDB,replace_session_results_toDB,replace_drivers_rankings_toDB,replace_constructors_rankings_toDB,get_finished_rounds_fromDB,get_points_before_round_by_driver_fromDB,get_points_by_round_and_driver_fromDB,get_points_before_round_by_constructor_fromDB,get_points_by_round_and_constructor_fromDB, mark_round_done_toDB, get_all_drivers_carnumber_fromDB,get_all_constructors_paddocknumber_fromDB, get_driver_by_trigramme_fromDB,get_last_round_fromDB, get_quali_results_by_driver_fromDB,get_sprint_quali_results_by_driver_fromDB, get_race_results_by_driver_fromDB, get_sprint_results_by_driver_fromDB, get_drivers_ranking_points_fromDB, get_constructors_ranking_points_fromDB, replace_title_probabilities_toDB, get_title_probabilities_fromDB, get_drivers_ranking_fromDB, get_constructors_ranking_fromDB, add_drivers_batch_toDB, add_constructors_batch_toDB, add_rounds_batch_toDB, create_snapshot_fromDB, get_columnar_drivers_ranking_fromDB, get_columnar_constructors_ranking_fromDB, replace_session_laps_toDB, get_session_laps_fromDB, get_teammate_sessions_fromDB, replace_teammate_comparisons_toDB, get_teammate_comparisons_fromDB
+from ressources.constants import DRIVERS_FILE, DRIVERS_COLUMNS, CONSTRUCTORS_FILE, CONSTRUCTORS_COLUMNS, ROUNDS_FILE, ROUNDS_COLUMNS, RESULTS_FOLDER, RESULTS_COLUMNS, VALID_SESSION_TYPES, SESSION_FAMILIES, EXPORTS_FOLDER, SEASONS_FILE, SEASONS_COLUMNS, CURRENT_SEASON, CARS_PER_CONSTRUCTOR, SIMULATIONS, SEED_FILES, SEED_SNAPSHOT_FILE, COLUMNAR_FOLDER, LAPS_FOLDER, LAPS_CHUNK_ROWS, STINT_PACE_WINDOW
 
 logger = logging.getLogger(__name__)
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format=LOG_FORMAT)
 
-def check_and_initialize_db(filename:str) -> sqlite3.Connection:
-    """Check if DATABASE_FILE exists, and call initialize_db() if it doesn't."""
+# Results of a driver for each session family of a head to head (see calculate_drivers_h2h)
+H2H_RESULTS_FETCHERS: Dict[str,Callable[[sqlite3.Connection,int,int],list[Result]]] = {'Q': get_quali_results_by_driver_fromDB,'SQ': get_sprint_quali_results_by_driver_fromDB,'Race': get_race_results_by_driver_fromDB,'Sprint': get_sprint_results_by_driver_fromDB}
+
+def check_and_initialize_db(filename:str,snapshot:Optional[str]=SEED_SNAPSHOT_FILE) -> sqlite3.Connection:
+    """Check if DATABASE_FILE exists, and create it if it doesn't: copied from the seed snapshot (snapshot) when it is up to date with the seed files and the schema, otherwise initialized with initialize_db() and seeded from the seed files in one transaction. Then applies the pending schema migrations."""
 
     if not os.path.isfile(filename):  # Check if DATABASE_FILE exists
-        logger.info(f"The {filename} does not exist. Initializing...")
-        
+        logger.info("The %s does not exist. Initializing...",filename)
+        if snapshot is not None and is_seed_snapshot_fresh(snapshot):
+            shutil.copyfile(snapshot,filename)
+            logger.info("Successfully copied the seed snapshot %s to %s.",snapshot,filename)
+            sql_connection = open_writer_connection(filename)
+            apply_migrations(sql_connection)
+            return sql_connection
+
         sql_connection = initialize_db(filename)
 
-        logger.info(f"Successfully initialized {filename}.")
-        import_drivers(sql_connection)
-        import_constructors(sql_connection)
-        import_rounds(sql_connection)
+        logger.info("Successfully initialized %s.",filename)
+        apply_migrations(sql_connection)
+        seed_reference_data(sql_connection)
         return sql_connection
     else:
-        logger.info(f"{filename} already exists. Continuing with regular operations...")
-        return sqlite3.connect(filename)
-        
-
-def create_new_driver(name:str, trigramme:str,car_number:int,nationality:str,sql_connection:sqlite3.Connection) -> Driver:
-    '''Creates a new driver class and writes it in the Database and in the CSV file and returns the driver in the Driver class'''
-    logger.info(f'Creating driver with name: {name}, trigramme: {trigramme}, car_number: {car_number}, and nationality: {nationality}')
-    driver: Driver = Driver(name,trigramme,car_number,nationality)
-    driver.add_to_csv()
-    driver.add_to_db(sql_connection)
+        logger.info("%s already exists. Continuing with regular operations...",filename)
+        sql_connection = open_writer_connection(filename)
+        apply_migrations(sql_connection)
+        return sql_connection
+
+def seed_reference_data(sql_connection:sqlite3.Connection,paths:Dict[str,str]=SEED_FILES,season:int=CURRENT_SEASON) -> None:
+    '''Imports the seasons, and the drivers, constructors and rounds of a season, from the seed files (paths by kind, SEED_FILES in the constants.py file by default) in a single transaction, so a new Database is seeded with one commit'''
+    with transaction(sql_connection):
+        import_seasons(sql_connection,paths['seasons'])
+        import_drivers(sql_connection,paths['drivers'],season)
+        import_constructors(sql_connection,paths['constructors'],season)
+        import_rounds(sql_connection,paths['rounds'],season)
+    logger.info('Reference data of season %s seeded in one transaction',season,extra={'summary': True})
+
+def build_seed_snapshot(filename:str=SEED_SNAPSHOT_FILE,paths:Dict[str,str]=SEED_FILES) -> str:
+    '''Builds a new Database in memory with every migration applied and the reference data of the seed files (see seed_reference_data), and writes it to filename with VACUUM INTO, so a missing Database can be copied from it instead of being seeded. Returns filename'''
+    sql_connection = initialize_db(':memory:')
+    try:
+        apply_migrations(sql_connection)
+        seed_reference_data(sql_connection,paths)
+        create_snapshot_fromDB(sql_connection,filename)
+    finally:
+        sql_connection.close()
+    logger.info('Seed snapshot written to %s',filename,extra={'summary': True})
+    return filename
+
+def is_seed_snapshot_fresh(filename:str,paths:Dict[str,str]=SEED_FILES) -> bool:
+    '''Checks that a seed snapshot exists, is newer than every seed file (e.g. a driver added to the CSV file since) and has the current schema version. A stale snapshot is ignored'''
+    if not os.path.isfile(filename):
+        return False
+    snapshot_time: float = os.path.getmtime(filename)
+    if any(os.path.isfile(path) and os.path.getmtime(path) > snapshot_time for path in paths.values()):
+        logger.warning('Seed snapshot %s is older than the seed files, ignoring it',filename)
+        return False
+    snapshot_connection = sqlite3.connect(filename)
+    try:
+        schema_version: int = get_schema_version(snapshot_connection)
+    finally:
+        snapshot_connection.close()
+    if schema_version != SCHEMA_VERSION:
+        logger.warning('Seed snapshot %s has schema version %s instead of %s, ignoring it',filename,schema_version,SCHEMA_VERSION)
+        return False
+    return True
+
+def import_seasons(sql_connection:sqlite3.Connection,filename:str=SEASONS_FILE) -> None:
+    '''Imports the rules of each season from a CSV file (filename, "SEASONS_FILE" in the constants.py file by default), with the columns of SEASONS_COLUMNS (points by position separated by spaces), creates the seasons in the class Season and stores them to the DB, replacing the rules of a season already stored'''
+    try:
+        with open(filename,"r") as seasons_file:
+            seasons_list = csv.reader(seasons_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, skipinitialspace=True)
+            for row_index, season_item in enumerate(seasons_list):
+                if row_index == 0:
+                    continue
+                season_year: int = int(season_item[SEASONS_COLUMNS.index("season")])
+                total_races: int = int(season_item[SEASONS_COLUMNS.index("total_races")])
+                total_sprints: int = int(season_item[SEASONS_COLUMNS.index("total_sprints")])
+                race_points: str = season_item[SEASONS_COLUMNS.index("race_points")]
+                sprint_points: str = season_item[SEASONS_COLUMNS.index("sprint_points")]
+                max_points: list[int] = [int(season_item[SEASONS_COLUMNS.index(column)]) for column in ["max_points_race_driver","max_points_sprint_driver","max_points_race_constructor","max_points_sprint_constructor"]]
+                logger.info('Importing season %s: %s races, %s sprints',season_year,total_races,total_sprints)
+                season: Season = Season(season_year,total_races,total_sprints,race_points,sprint_points,*max_points)
+                add_season_toDB(sql_connection,season)
+    except FileNotFoundError:
+        logger.critical("File %s not found",filename)
+        exit()
+
+def create_new_driver(name:str, trigramme:str,car_number:int,nationality:str,sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> Driver:
+    '''Creates a new driver class for a season and writes it in the Database and in the CSV file and returns the driver in the Driver class'''
+    logger.info('Creating driver with name: %s, trigramme: %s, car_number: %s, and nationality: %s',name,trigramme,car_number,nationality)
+    driver: Driver = Driver(name,trigramme,car_number,nationality,season)
+    add_driver_to_csv(driver)
+    add_driver_toDB(sql_connection,driver)
     return driver
 
-def import_drivers(sql_connection:sqlite3.Connection) -> None:
-    '''Imports drivers from a SCV file ("DRIVERS_FILE" in the constants.py file), with the columns "name", "trigramme","car_number", "nationality", creates the driver in the class Driver and stores it to the DB'''
+def add_driver_to_csv(driver:Driver,filename:str=DRIVERS_FILE) -> None:
+    '''Appends a driver to the CSV file of the drivers (filename, "DRIVERS_FILE" in the constants.py file by default), so it is imported at the next startup'''
+    try:
+        with open(filename,"a",newline="") as csvfile:
+            writer = csv.DictWriter(csvfile,fieldnames=DRIVERS_COLUMNS)
+            writer.writerow({'name': driver.name,'trigramme': driver.trigramme,'car_number': driver.car_number,'nationality': driver.nationality})
+        logger.info('Driver No. %s - %s was succesfully added to CSV File.',driver.car_number,driver.name)
+    except FileNotFoundError:
+        logger.critical("File %s not found",filename)
+        exit()
+
+def import_drivers(sql_connection:sqlite3.Connection,filename:str=DRIVERS_FILE,season:int=CURRENT_SEASON) -> None:
+    '''Imports the drivers of a season from a SCV file (filename, "DRIVERS_FILE" in the constants.py file by default), with the columns "name", "trigramme","car_number", "nationality", creates the drivers in the class Driver and stores them to the DB in one batch'''
+    drivers: list[Driver] = []
     try:
-        with open(DRIVERS_FILE,"r") as drivers_file:
+        with open(filename,"r") as drivers_file:
             drivers_list = csv.reader(drivers_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, skipinitialspace=True)
             for row_index, driver_item in enumerate(drivers_list):
                 if row_index == 0:
@@ -54,17 +152,18 @@ def import_drivers(sql_connection:sqlite3.Connection) -> None:
                 driver_trigramme: str = driver_item[DRIVERS_COLUMNS.index("trigramme")]
                 driver_car_number: int = int(driver_item[DRIVERS_COLUMNS.index("car_number")])
                 driver_nationality: str = driver_item[DRIVERS_COLUMNS.index("nationality")]
-                logger.info(f'Importing driver with name: {driver_name}, trigramme: {driver_trigramme}, car_number: {driver_car_number}, and nationality: {driver_nationality}')
-                driver: Driver = Driver(driver_name,driver_trigramme,driver_car_number,driver_nationality)
-                driver.add_to_db(sql_connection)
+                logger.info('Importing driver with name: %s, trigramme: %s, car_number: %s, and nationality: %s',driver_name,driver_trigramme,driver_car_number,driver_nationality)
+                drivers.append(Driver(driver_name,driver_trigramme,driver_car_number,driver_nationality,season))
+        add_drivers_batch_toDB(sql_connection,drivers)
     except FileNotFoundError:
-        logger.critical(f"File {DRIVERS_FILE} not found")
+        logger.critical("File %s not found",filename)
         exit()
 
-def import_constructors(sql_connection:sqlite3.Connection) -> None:
-    '''Imports Constructors from a SCV file ("CONSTRUCTORS_FILE" in the constants.py file), with the columns "short_name", "full_name","result_name", "paddock_number", creates the constructors in the class Constructor and stores it to the DB'''
+def import_constructors(sql_connection:sqlite3.Connection,filename:str=CONSTRUCTORS_FILE,season:int=CURRENT_SEASON) -> None:
+    '''Imports the Constructors of a season from a SCV file (filename, "CONSTRUCTORS_FILE" in the constants.py file by default), with the columns "short_name", "full_name","result_name", "paddock_number", creates the constructors in the class Constructor and stores them to the DB in one batch'''
+    constructors: list[Constructor] = []
     try:
-        with open(CONSTRUCTORS_FILE,"r") as constructor_file:
+        with open(filename,"r") as constructor_file:
             constructor_list = csv.reader(constructor_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, skipinitialspace=True)
             for row_index, constructor_item in enumerate(constructor_list):
                 if row_index == 0:
@@ -73,17 +172,18 @@ def import_constructors(sql_connection:sqlite3.Connection) -> None:
                 constructor_full_name: str = constructor_item[CONSTRUCTORS_COLUMNS.index("full_name")]
                 constructor_result_name: str = constructor_item[CONSTRUCTORS_COLUMNS.index("result_name")]
                 constructor_paddock_number: int = int(constructor_item[CONSTRUCTORS_COLUMNS.index("paddock_number")])
-                logger.info(f'Importing constructor : {constructor_short_name}, paddock_number: {constructor_paddock_number}')
-                constructor: Constructor = Constructor(constructor_full_name,constructor_result_name,constructor_short_name,constructor_paddock_number)
-                constructor.add_to_db(sql_connection)
+                logger.info('Importing constructor : %s, paddock_number: %s',constructor_short_name,constructor_paddock_number)
+                constructors.append(Constructor(constructor_full_name,constructor_result_name,constructor_short_name,constructor_paddock_number,season))
+        add_constructors_batch_toDB(sql_connection,constructors)
     except FileNotFoundError:
-        logger.critical(f"File {CONSTRUCTORS_FILE} not found")
+        logger.critical("File %s not found",filename)
         exit()
 
-def import_rounds(sql_connection:sqlite3.Connection) -> None:
-    '''Imports Rounds from a SCV file ("ROUNDS_FILE" in the constants.py file), with the columns "round_number", "round_name","country", "circuit","round_date", "round_type", creates the constructors in the class Constructor and stores it to the DB'''
+def import_rounds(sql_connection:sqlite3.Connection,filename:str=ROUNDS_FILE,season:int=CURRENT_SEASON) -> None:
+    '''Imports the Rounds of a season from a SCV file (filename, "ROUNDS_FILE" in the constants.py file by default), with the columns "round_number", "round_name","country", "circuit","round_date", "round_type", creates the rounds in the class Round and stores them to the DB in one batch'''
+    rounds: list[Round] = []
     try:
-        with open(ROUNDS_FILE,"r") as rounds_file:
+        with open(filename,"r") as rounds_file:
             rounds_list = csv.reader(rounds_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, skipinitialspace=True)
             for row_index, round_item in enumerate(rounds_list):
                 if row_index == 0:
@@ -94,186 +194,339 @@ def import_rounds(sql_connection:sqlite3.Connection) -> None:
                 circuit: str = round_item[ROUNDS_COLUMNS.index("circuit")]
                 round_date: str = round_item[ROUNDS_COLUMNS.index("round_date")]
                 round_type: str = round_item[ROUNDS_COLUMNS.index("round_type")]
-                logger.info(f'Importing Round No. : {round_number} - {round_name}')
-                round: Round = Round(round_name,round_number,country,circuit,round_date,round_type)
-                round.add_to_db(sql_connection)
+                logger.info('Importing Round No. : %s - %s',round_number,round_name)
+                rounds.append(Round(round_name,round_number,country,circuit,round_date,round_type,season))
+        add_rounds_batch_toDB(sql_connection,rounds)
     except FileNotFoundError:
-        logger.critical(f"File {ROUNDS_FILE} not found")
+        logger.critical("File %s not found",filename)
         exit()
 
-def add_results(filename:str,round_number:int, session_type:str ,sql_connection:sqlite3.Connection) -> None:
-    '''For each of the results in a result_file, stored in the path RESULTS_FOLDER (specified in the constants.py file), reads the file, extract the result for each car, calculates the time for each position based on the deltas, adds the constructors paddock_number and the calculated points, and stores them in the Results Database'''
-    result_file: str = RESULTS_FOLDER + filename
+def read_results_file(filename:str,round_number:int,session_type:str,paddock_map:Dict[str,int],folder:str=RESULTS_FOLDER,season:int=CURRENT_SEASON) -> list[Result]:
+    '''Reads a result_file, stored in folder (RESULTS_FOLDER in the constants.py file by default), validates its columns against RESULTS_COLUMNS, extracts the result for each car, calculates the time for each position based on the deltas and resolves the constructors paddock_number from paddock_map (result name -> paddock number of the season). Returns the results of the season of the session without touching the Database'''
+    result_file: str = folder + filename
+    session_results: list[Result] = []
+    with open(result_file,"r") as results:
+        results_list = csv.reader(results, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, skipinitialspace=True)
+        header: list[str] = next(results_list,[])
+        if header != RESULTS_COLUMNS:
+            logger.error('File %s has columns %s instead of %s',filename,header,RESULTS_COLUMNS)
+            raise ValueError(f'Invalid columns in file {filename}')
+        rows: list[list[str]] = list(results_list)
+    car_positions: list[str] = [result_item[RESULTS_COLUMNS.index('Pos')] for result_item in rows]
+    time_strings: list[str] = [result_item[RESULTS_COLUMNS.index('Time')] for result_item in rows]
+    times, statuses = parse_time_column(time_strings,car_positions,session_type in ['Race','Sprint'])
+    for result_item, car_position, time_string, time_seconds, status in zip(rows,car_positions,time_strings,times.tolist(),statuses.tolist()):
+        car_number:int = int(result_item[RESULTS_COLUMNS.index('No')])
+        constructor_result_name:str = result_item[RESULTS_COLUMNS.index('Car')]
+        car_points: int = int(result_item[RESULTS_COLUMNS.index('Points')])
+        if constructor_result_name not in paddock_map:
+            logger.error('Constructor %s of Driver No. %s in file %s is not in Constructors Table',constructor_result_name,car_number,filename)
+            raise ValueError(f'Unknown constructor {constructor_result_name} in file {filename}')
+        position: Optional[int] = int(car_position) if car_position.isdigit() else None
+        session_results.append(Result(car_position,car_number,paddock_map[constructor_result_name],round_number,session_type,format_result_time(time_seconds,time_string),car_points,None if time_seconds != time_seconds else time_seconds,status,position,season))
+    logger.info('%s results read for session %s of round %s from %s',len(session_results),session_type,round_number,filename)
+    return session_results
+
+def add_results(filename:str,round_number:int, session_type:str ,sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> bool:
+    '''For each of the results in a result_file, stored in the path RESULTS_FOLDER (specified in the constants.py file), reads the file, extract the result for each car, calculates the time for each position based on the deltas, adds the constructors paddock_number and the calculated points, and stores the whole session in the Results Database in a single transaction.
+    A session already stored is left as it is (see correct_results to replace it). Returns if the session was imported'''
+    paddock_map: Dict[str,int] = get_constructors_paddock_map_fromDB(sql_connection,season)
     try:
-        with open(result_file,"r") as results:
-            top_result: float = 0
-            results_list = csv.reader(results, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL, skipinitialspace=True)
-            for row_index, result_item in enumerate(results_list):
-                if row_index == 0:
-                    continue
-                car_position:str = result_item[RESULTS_COLUMNS.index('Pos')]
-                car_number:int = int(result_item[RESULTS_COLUMNS.index('No')])
-                constructor_result_name:str = result_item[RESULTS_COLUMNS.index('Car')]
-                result_time_str:str = result_item[RESULTS_COLUMNS.index('Time')]
-                car_points: int = int(result_item[RESULTS_COLUMNS.index('Points')])
-                try:
-                    result_time_float: float = convert_time_to_seconds(result_time_str)
-                    result_time_final: str 
-                    if session_type in ['Race','Sprint']:
-                        if row_index == 1:
-                            top_result = result_time_float
-                            result_time_final = str(result_time_float)
-                        else:
-                            result_time_float = top_result + result_time_float
-                            result_time_final = str(result_time_float)
-                    else:
-                        result_time_final = str(result_time_float)
-                except ValueError as e:
-                    logger.info(f'Driver {car_number} did not finish: {result_time_str}')
-                    result_time_final = result_time_str
-                constructor: Constructor = get_constructor_by_resultname_fromDB(sql_connection,constructor_result_name)
-                logger.info(f'Driver No. {car_number} finishing in position {car_position} has been attributed {car_points} points for session {session_type} of round {round_number}')
-                result: Result = Result(car_position,car_number,constructor.paddock_number,round_number,session_type,result_time_final,car_points)
-                result.add_to_db(sql_connection)
+        session_results: list[Result] = read_results_file(filename,round_number,session_type,paddock_map,season=season)
     except FileNotFoundError:
-        logger.critical(f"File {filename} not found")
+        logger.critical("File %s not found",filename)
         exit()
+    try:
+        add_results_batch_toDB(sql_connection,session_results)
+    except sqlite3.IntegrityError as e:
+        logger.error('Session %s of round %s of season %s is already stored (%s), nothing imported from %s: use correct_results to replace it',session_type,round_number,season,e,filename)
+        return False
+    refresh_teammate_comparisons(sql_connection,round_number,season)
+    logger.info('%s results imported for session %s of round %s from %s',len(session_results),session_type,round_number,filename,extra={'summary': True})
+    return True
 
-def mark_round_done(sql_connection:sqlite3.Connection,round_number:int) -> None:
-    '''Adds the flag round_done to the round in the Rounds Database'''
-    mark_round_done_toDB(sql_connection,round_number)
-
-def calculate_drivers_rankings(sql_connection:sqlite3.Connection,round_number:int) -> None:
-    '''Calculates the driver's ranking according to the points of the sessions (and the accumulated points in the previous session) for all the cars stored in the Drivers Table, then orders the rankings and adds the position, and finally calculates if the driver has mathematical chances to win the championship. After all calculations are stored, the ranking is stored in the Drivers Ranking Table of the DB for that round.'''
-    cars: list[int] = get_all_drivers_carnumber_fromDB(sql_connection)
-    
-    # Calculate points for each Driver for previous and current round
-    drivers_points: Dict[int,int] = {}
-    for car_number in cars:
-        points:int = get_previous_points_driver(sql_connection,car_number,round_number) + get_points_by_driver_round_fromDB(sql_connection,car_number,round_number)
-        logger.info(f'Car number {car_number} has {points} points after round No. {round_number}')
-        drivers_points[car_number] = points
-    
-    # Generate standings list with driver positions based on points
-    standings: list = [] 
-    for position, (car_number, points) in enumerate(sorted(drivers_points.items(), key=lambda x: x[1], reverse=True), start=1):
-        standings.append({
-            'car_position': position,
-            'car_number': car_number,
-            'points': points
-        })
-
-    # Insert rankings into DriversRanking table    
-    for ranking in standings:
-        championship_chance:bool = True
-        if ranking["car_position"] == 1:
-            championship_chance = True
-        else:
-            championship_chance = is_driver_championship_chance(sql_connection,ranking["points"],round_number)
-        logger.info(f'Adding Ranking for car: {ranking["car_number"]} in position {ranking["car_position"]} with {ranking["points"]} after round No. {round_number}. Championship chances: {championship_chance}.')
-        driver_ranking:DriverRanking = DriverRanking(round_number,ranking["car_number"],ranking["car_position"],ranking["points"],championship_chance)
-        driver_ranking.add_to_db(sql_connection)
-
-def calculate_constructors_rankings(sql_connection:sqlite3.Connection,round_number:int) -> None:
-    '''Calculates the constructors's ranking according to the points of the sessions (and the accumulated points in the previous session) for all the constructors stored in the Constructors Table, then orders the rankings and adds the position, and finally calculates if the constructor has mathematical chances to win the championship. After all calculations are stored, the ranking is stored in the Constructors Ranking Table of the DB for that round.'''
-    constructors: list[int] = get_all_constructors_paddocknumber_fromDB(sql_connection)
-
-    # Calculate points for each Constructors for each and previous round
-    constructors_points: Dict[int,int] = {}
-    for paddock_number in constructors:
-        points: int = get_previous_points_constructor(sql_connection,paddock_number,round_number) + get_points_by_constructors_round_fromDB(sql_connection,paddock_number,round_number)
-        logger.info(f'Constructor No. {paddock_number} has {points} points after round No. {round_number}')
-        constructors_points[paddock_number] = points
-    
-    # Generate standing list with constructors position based on points
-    logger.info(f'Generating constructors standing')
-    standings: list = []
-    for position, (paddock_number,points) in enumerate(sorted(constructors_points.items(), key=lambda x: x[1], reverse=True), start=1):
-        logger.info(f'Constructor no. {paddock_number} is in {position} position with {points} by round {round_number}')
-        standings.append({
-            'constructor_position':position,
-            'paddock_number': paddock_number,
-            'points':points
-        })
-    logger.info(f'Final standings by round {round_number}: {standings}')
-        
-    # Insert rankings into Constructors Table
-    for ranking in standings:
-        championship_chance:bool = True
-        if ranking["constructor_position"] > 1:
-            championship_chance = is_constructor_championship_chance(sql_connection,ranking["points"],round_number)
-        logger.info(f'Adding Ranking for constructor: {ranking["paddock_number"]} in position {ranking["constructor_position"]} with {ranking["points"]} after round No. {round_number}. Championship chances: {championship_chance}.')
-        constructor_ranking:ConstructorRanking = ConstructorRanking(round_number,ranking["paddock_number"],ranking["constructor_position"],ranking["points"],championship_chance)
-        constructor_ranking.add_to_db(sql_connection)
-
-def calculate_drivers_h2h_quali(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str) -> None:
-    '''Calculates a head to head comparison between two drivers (input by trigramme, eg: VER, NOR), and returns the number of times driver 1 qualified ahead of driver 2 (and viceversa), and the average delta time between both.'''
+def correct_results(filename:str,round_number:int,session_type:str,sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> None:
+    '''Re-imports the results of a session that was already stored (e.g. after a penalty or a correction), replacing the previous results of that session in a single transaction, and recalculates the rankings of that round and every later round'''
+    paddock_map: Dict[str,int] = get_constructors_paddock_map_fromDB(sql_connection,season)
+    try:
+        session_results: list[Result] = read_results_file(filename,round_number,session_type,paddock_map,season=season)
+    except FileNotFoundError:
+        logger.critical("File %s not found",filename)
+        exit()
+    replace_session_results_toDB(sql_connection,round_number,session_type,session_results,season)
+    recalculate_rankings_from_round(sql_connection,round_number,season)
+    refresh_season_store(sql_connection,round_number,season)
+    refresh_teammate_comparisons(sql_connection,round_number,season)
+
+def find_results_files(folder:str=RESULTS_FOLDER) -> list[Tuple[int,str,str]]:
+    '''Finds every result file named "ROUND n - <session>.csv" in folder (RESULTS_FOLDER in the constants.py file by default) and returns them as (round_number, session_type, filename), ordered by round and by session as listed in VALID_SESSION_TYPES'''
+    pattern: str = r"^ROUND (\d+) - (\w+)\.csv$"
+    results_files: list[Tuple[int,str,str]] = []
+    for filename in os.listdir(folder):
+        match = re.match(pattern,filename)
+        if not match:
+            continue
+        if match.group(2) not in VALID_SESSION_TYPES:
+            logger.warning('File %s has an invalid session type, skipping it',filename)
+            continue
+        results_files.append((int(match.group(1)),match.group(2),filename))
+    results_files.sort(key=lambda x: (x[0],VALID_SESSION_TYPES.index(x[1])))
+    logger.info('%s result files found in %s',len(results_files),folder)
+    return results_files
+
+def import_season(sql_connection:sqlite3.Connection,folder:str=RESULTS_FOLDER,max_workers:Optional[int]=None,season:int=CURRENT_SEASON,store_folder:str=COLUMNAR_FOLDER) -> list[int]:
+    '''Rebuilds a whole season (CURRENT_SEASON in the constants.py file by default) from the result files in folder: parses and validates every file in parallel in a process pool, then, through this single connection, stores the sessions in round order, marks each round with a Race as done and calculates the rankings once per round, refreshes the columnar store of the season in store_folder and logs the championship outlook (see calculate_championship_outlook). Nothing is written if any of the files is invalid. Returns the rounds imported'''
+    paddock_map: Dict[str,int] = get_constructors_paddock_map_fromDB(sql_connection,season)
+    results_files: list[Tuple[int,str,str]] = find_results_files(folder)
+    # Imported on first use: multiprocessing is the slowest import of the program and is not needed to reach the menu
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(read_results_file,filename,round_number,session_type,paddock_map,folder,season) for round_number, session_type, filename in results_files]
+        sessions_results: list[list[Result]] = [future.result() for future in futures]
+    logger.info('%s sessions parsed and validated from %s',len(sessions_results),folder,extra={'summary': True})
+
+    rounds: Dict[int,list[Tuple[str,list[Result]]]] = {}
+    for (round_number, session_type, filename), session_results in zip(results_files,sessions_results):
+        rounds.setdefault(round_number,[]).append((session_type,session_results))
+    for round_number, sessions in rounds.items():
+        for session_type, session_results in sessions:
+            add_results_batch_toDB(sql_connection,session_results)
+        if 'Race' in [session_type for session_type, session_results in sessions]:
+            mark_round_done(sql_connection,round_number,season)
+            calculate_drivers_rankings(sql_connection,round_number,season)
+            calculate_constructors_rankings(sql_connection,round_number,season)
+        logger.info('Round No. %s imported with %s sessions',round_number,len(sessions),extra={'summary': True})
+    refresh_season_store(sql_connection,min(rounds,default=None),season,store_folder)
+    if rounds:
+        refresh_teammate_comparisons(sql_connection,min(rounds),season)
+    for outlook in calculate_championship_outlook(sql_connection,season):
+        for line in outlook.summary()[:1]:
+            logger.info('%s',line,extra={'summary': True})
+    return list(rounds.keys())
+
+def refresh_teammate_comparisons(sql_connection:sqlite3.Connection,first_round:int=1,season:int=CURRENT_SEASON) -> None:
+    '''Recalculates the comparisons of every pair of teammates of a season from first_round onwards in the Teammate Comparisons Table, after results of that round were imported or corrected: the pairs of every session are fetched with a single query (see compare_teammates)'''
+    replace_teammate_comparisons_toDB(sql_connection,first_round,compare_teammates(get_teammate_sessions_fromDB(sql_connection,first_round,season),season),season)
+
+def calculate_teammate_battles(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[TeammateBattle]:
+    '''Returns the battle of every pair of teammates of every constructor of a season (see summarize_teammate_battles), from the Teammate Comparisons Table fetched with a single query'''
+    return summarize_teammate_battles(get_teammate_comparisons_fromDB(sql_connection,season),season)
+
+def import_laps(sql_connection:sqlite3.Connection,filename:str,round_number:int,session_type:str,folder:str=LAPS_FOLDER,season:int=CURRENT_SEASON,chunk_rows:int=LAPS_CHUNK_ROWS) -> int:
+    '''Streams a lap file of a session, stored in folder (LAPS_FOLDER in the constants.py file by default), into the Laps Table, replacing the laps of that session: the file is read, parsed and written chunk_rows laps at a time in a single transaction (see stream_laps_file and replace_session_laps_toDB), so its size does not matter. Returns the number of laps'''
+    laps: int = replace_session_laps_toDB(sql_connection,round_number,session_type,stream_laps_file(folder + filename,round_number,session_type,season,chunk_rows),season)
+    logger.info('%s laps imported for session %s of round %s from %s',laps,session_type,round_number,filename,extra={'summary': True})
+    return laps
+
+def import_season_laps(sql_connection:sqlite3.Connection,folder:str=LAPS_FOLDER,season:int=CURRENT_SEASON,chunk_rows:int=LAPS_CHUNK_ROWS) -> list[Tuple[int,str,int]]:
+    '''Imports every lap file of a folder (see find_laps_files) into the Laps Table, one session after the other. Returns the round, session type and number of laps of each file'''
+    return [(round_number,session_type,import_laps(sql_connection,filename,round_number,session_type,folder,season,chunk_rows)) for round_number, session_type, filename in find_laps_files(folder)]
+
+def calculate_session_stint_pace(sql_connection:sqlite3.Connection,round_number:int,session_type:str='Race',window:int=STINT_PACE_WINDOW,season:int=CURRENT_SEASON) -> list[StintPace]:
+    '''Returns the pace of every stint of every car in a session, from its laps in the Laps Table fetched with a single query (see calculate_stint_pace)'''
+    return calculate_stint_pace(get_session_laps_fromDB(sql_connection,round_number,session_type,season),window)
+
+def mark_round_done(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> None:
+    '''Adds the flag round_done to the round of a season in the Rounds Database'''
+    mark_round_done_toDB(sql_connection,round_number,season)
+
+def refresh_season_store(sql_connection:sqlite3.Connection,from_round:Optional[int]=None,season:int=CURRENT_SEASON,folder:str=COLUMNAR_FOLDER) -> None:
+    '''Refreshes the columnar store of a season after rounds were marked as done and their rankings calculated, reading again the rounds from from_round if they were re-imported (see refresh_columnar_season). The store is only a cache of the Database: a failure to write it is logged, and the next refresh rebuilds it'''
+    try:
+        refresh_columnar_season(sql_connection,season,folder,from_round)
+    except OSError as e:
+        logger.error('Error %s detected when refreshing the columnar store of season %s in %s',e,season,folder)
+
+def calculate_championship_chances(sql_connection:sqlite3.Connection,points:Dict[int,int],round_number:int,season:int=CURRENT_SEASON,cars:int=1) -> Dict[int,bool]:
+    '''Checks if each competitor (number: points after round_number) can still win the championship with the sessions of the calendar of the season still to run, cars being the cars of a competitor in each session (1 for a driver, CARS_PER_CONSTRUCTOR for a constructor). The rules and the calendar come from the reference data cache, so no query is run once they are loaded'''
+    season_rules: Season = get_season_fromDB(sql_connection,season)
+    return championship_chances(points,remaining_sessions(get_calendar_fromDB(sql_connection,season),round_number,season_rules),cars)
+
+def calculate_drivers_rankings(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> None:
+    '''Calculates the driver's ranking according to the points of the sessions (accumulated up to that round) for all the cars stored in the Drivers Table, orders the rankings and adds the position, and calculates if the driver has mathematical chances to win the championship, all in a single query, the chances being then checked exactly in memory (see calculate_championship_chances). The whole ranking is then stored in the Drivers Ranking Table of the DB for that round in one batch, so the number of queries per round does not depend on the number of drivers.'''
+    drivers_rankings: list[DriverRanking] = get_drivers_standings_fromDB(sql_connection,round_number,season)
+    chances: Dict[int,bool] = calculate_championship_chances(sql_connection,{ranking.car_number: ranking.car_points for ranking in drivers_rankings},round_number,season,1)
+    for ranking in drivers_rankings:
+        ranking.championship_chance = chances[ranking.car_number]
+    add_drivers_rankings_batch_toDB(sql_connection,drivers_rankings)
+    logger.info('Drivers Ranking stored for %s drivers after round No. %s',len(drivers_rankings),round_number,extra={'summary': True})
+
+def calculate_constructors_rankings(sql_connection:sqlite3.Connection,round_number:int,season:int=CURRENT_SEASON) -> None:
+    '''Calculates the constructors's ranking according to the points of the sessions (accumulated up to that round) for all the constructors stored in the Constructors Table, orders the rankings and adds the position, and calculates if the constructor has mathematical chances to win the championship, all in a single query, the chances being then checked exactly in memory (see calculate_championship_chances). The whole ranking is then stored in the Constructors Ranking Table of the DB for that round in one batch, so the number of queries per round does not depend on the number of constructors.'''
+    constructors_rankings: list[ConstructorRanking] = get_constructors_standings_fromDB(sql_connection,round_number,season)
+    chances: Dict[int,bool] = calculate_championship_chances(sql_connection,{ranking.paddock_number: ranking.constructor_points for ranking in constructors_rankings},round_number,season,CARS_PER_CONSTRUCTOR)
+    for ranking in constructors_rankings:
+        ranking.championship_chance = chances[ranking.paddock_number]
+    add_constructors_rankings_batch_toDB(sql_connection,constructors_rankings)
+    logger.info('Constructors Ranking stored for %s constructors after round No. %s',len(constructors_rankings),round_number,extra={'summary': True})
+
+def recalculate_rankings_from_round(sql_connection:sqlite3.Connection,first_round:int,season:int=CURRENT_SEASON) -> None:
+    '''Recalculates the drivers and constructors rankings of every finished round of a season from first_round onwards, with the rules of the season (Seasons Table), after the results of first_round were re-imported or corrected. The points before first_round and the points of each later round are fetched once and the running totals are carried forward in memory, so the cost only depends on the number of rounds after first_round. The stale rankings are replaced in a single transaction per table.'''
+    season_rules: Season = get_season_fromDB(sql_connection,season)
+    calendar: list[Tuple[int,str]] = get_calendar_fromDB(sql_connection,season)
+    finished_rounds: list[Tuple[int,str]] = get_finished_rounds_fromDB(sql_connection,season)
+
+    drivers_points: Dict[int,int] = {car_number: 0 for car_number in get_all_drivers_carnumber_fromDB(sql_connection,season)}
+    for car_number, points in get_points_before_round_by_driver_fromDB(sql_connection,first_round,season).items():
+        if car_number in drivers_points:
+            drivers_points[car_number] = points
+    drivers_standings = calculate_cascade_standings(drivers_points,get_points_by_round_and_driver_fromDB(sql_connection,first_round,season),finished_rounds,first_round,calendar,season_rules,1)
+    drivers_rankings: list[DriverRanking] = [DriverRanking(round_number,car_number,car_position,car_points,championship_chance,season) for round_number, standings in drivers_standings.items() for car_number, car_position, car_points, championship_chance in standings]
+    replace_drivers_rankings_toDB(sql_connection,first_round,drivers_rankings,season)
+
+    constructors_points: Dict[int,int] = {paddock_number: 0 for paddock_number in get_all_constructors_paddocknumber_fromDB(sql_connection,season)}
+    for paddock_number, points in get_points_before_round_by_constructor_fromDB(sql_connection,first_round,season).items():
+        if paddock_number in constructors_points:
+            constructors_points[paddock_number] = points
+    constructors_standings = calculate_cascade_standings(constructors_points,get_points_by_round_and_constructor_fromDB(sql_connection,first_round,season),finished_rounds,first_round,calendar,season_rules,CARS_PER_CONSTRUCTOR)
+    constructors_rankings: list[ConstructorRanking] = [ConstructorRanking(round_number,paddock_number,constructor_position,constructor_points,championship_chance,season) for round_number, standings in constructors_standings.items() for paddock_number, constructor_position, constructor_points, championship_chance in standings]
+    replace_constructors_rankings_toDB(sql_connection,first_round,constructors_rankings,season)
+    logger.info('Rankings of season %s recalculated for %s rounds from round No. %s',season,len(drivers_standings),first_round,extra={'summary': True})
+
+def get_stored_rankings(sql_connection:sqlite3.Connection,championship:str,round_number:Optional[int]=None,season:int=CURRENT_SEASON) -> list[Union[DriverRanking,ConstructorRanking]]:
+    '''Returns the rankings of a championship ('Drivers' or 'Constructors') stored after round_number (the last finished round by default), by position'''
+    if round_number is None:
+        round_number = get_last_round_fromDB(sql_connection,season)
+    if championship == 'Drivers':
+        return get_drivers_ranking_fromDB(sql_connection,round_number,season)
+    return get_constructors_ranking_fromDB(sql_connection,round_number,season)
+
+def get_standings_history(sql_connection:sqlite3.Connection,championship:str,season:int=CURRENT_SEASON) -> StandingsHistory:
+    '''Returns the points and positions of every competitor of a championship ('Drivers' or 'Constructors') of a season after every round (see StandingsHistory), pivoted from the rankings fetched with a single query.
+    The history is kept in the reference data cache until the next round is marked as done or the rankings of the championship are written'''
+    if championship == 'Drivers':
+        return REFERENCE_CACHE.get(sql_connection,f'DriversRanking/{season}',lambda sql_connection: calculate_standings_history('Drivers',get_columnar_drivers_ranking_fromDB(sql_connection,1,season),get_all_drivers_carnumber_fromDB(sql_connection,season),season))
+    return REFERENCE_CACHE.get(sql_connection,f'ConstructorsRanking/{season}',lambda sql_connection: calculate_standings_history('Constructors',get_columnar_constructors_ranking_fromDB(sql_connection,1,season),get_all_constructors_paddocknumber_fromDB(sql_connection,season),season))
+
+def get_championship_labels(sql_connection:sqlite3.Connection,championship:str,season:int=CURRENT_SEASON) -> Dict[int,str]:
+    '''Returns the label of each competitor of a championship of a season by number: the trigramme of each driver ('Drivers') or the short name of each constructor ('Constructors'), from the reference data cache'''
+    if championship == 'Drivers':
+        return get_all_drivers_trigramme_fromDB(sql_connection,season)
+    return {paddock_number: get_constructor_by_paddocknumber_fromDB(sql_connection,paddock_number,season).short_name for paddock_number in get_all_constructors_paddocknumber_fromDB(sql_connection,season)}
+
+def calculate_championship_outlook(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> Tuple[ChampionshipOutlook,ChampionshipOutlook]:
+    '''Replays the finished rounds of a season to find the round after which each driver and each constructor was eliminated from the championship, and the round each championship was clinched. The points of every round are fetched with one query per championship, the rest comes from the reference data cache'''
+    season_rules: Season = get_season_fromDB(sql_connection,season)
+    calendar: list[Tuple[int,str]] = get_calendar_fromDB(sql_connection,season)
+    finished_rounds: list[int] = [round_number for round_number, round_type in get_finished_rounds_fromDB(sql_connection,season)]
+    drivers: Dict[int,str] = get_championship_labels(sql_connection,'Drivers',season)
+    constructors: Dict[int,str] = get_championship_labels(sql_connection,'Constructors',season)
+    drivers_outlook: ChampionshipOutlook = championship_outlook('Drivers',get_points_by_round_and_driver_fromDB(sql_connection,1,season),drivers,calendar,finished_rounds,season_rules,1)
+    constructors_outlook: ChampionshipOutlook = championship_outlook('Constructors',get_points_by_round_and_constructor_fromDB(sql_connection,1,season),constructors,calendar,finished_rounds,season_rules,CARS_PER_CONSTRUCTOR)
+    return drivers_outlook, constructors_outlook
+
+def simulate_title_probabilities(sql_connection:sqlite3.Connection,round_number:Optional[int]=None,simulations:int=SIMULATIONS,seed:int=0,max_workers:Optional[int]=None,season:int=CURRENT_SEASON) -> Tuple[Dict[int,float],Dict[int,float]]:
+    '''Simulates the rest of a season from the Drivers and Constructors Rankings after round_number (the last finished round by default) and returns the probability of each driver and each constructor to win the title, which are also stored in the Title Probabilities Table for that round.
+    The drivers of the last round with a Race or Sprint result race every remaining session of the calendar for the constructor they last drove for, their finishing orders sampled from their form in the Races and Sprints so far (see season_simulator.py). The same seed always gives the same probabilities'''
+    # Imported on first use, with the process pool of the simulation (see import_season)
+    from ressources.season_simulator import calculate_form, form_strengths, simulate_title_chances
+    if round_number is None:
+        round_number = get_last_round_fromDB(sql_connection,season)
+    season_rules: Season = get_season_fromDB(sql_connection,season)
+    drivers_points: Dict[int,int] = get_drivers_ranking_points_fromDB(sql_connection,round_number,season)
+    constructors_points: Dict[int,int] = get_constructors_ranking_points_fromDB(sql_connection,round_number,season)
+    if not drivers_points or not constructors_points:
+        logger.warning('No rankings stored after round No. %s of season %s, title probabilities not simulated',round_number,season)
+        return {}, {}
+    results: list[Result] = [result for result in get_results_by_session_types_fromDB(sql_connection,['Race','Sprint'],season) if result.round_number <= round_number]
+    form: Dict[int,float] = calculate_form(results,round_number)
+    last_raced_round: int = max((result.round_number for result in results),default=0)
+    # Results ordered by round: the last constructor of each driver is kept
+    current_teams: Dict[int,int] = {result.car_number: result.paddock_number for result in results}
+    # Indices ordered by number, so a tie on points goes to the lowest number as in the rankings
+    drivers: list[int] = sorted(drivers_points)
+    constructors: list[int] = sorted(constructors_points)
+    driver_index: Dict[int,int] = {car_number: index for index, car_number in enumerate(drivers)}
+    constructor_index: Dict[int,int] = {paddock_number: index for index, paddock_number in enumerate(constructors)}
+    starters: list[int] = sorted({result.car_number for result in results if result.round_number == last_raced_round and result.car_number in driver_index and current_teams[result.car_number] in constructor_index})
+    strengths: Dict[int,float] = form_strengths({car_number: form[car_number] for car_number in starters})
+    driver_probabilities, constructor_probabilities = simulate_title_chances([driver_index[car_number] for car_number in starters],[strengths[car_number] for car_number in starters],[constructor_index[current_teams[car_number]] for car_number in starters],[drivers_points[car_number] for car_number in drivers],[constructors_points[paddock_number] for paddock_number in constructors],remaining_sessions(get_calendar_fromDB(sql_connection,season),round_number,season_rules),simulations,seed,max_workers)
+    drivers_probabilities: Dict[int,float] = dict(zip(drivers,driver_probabilities))
+    constructors_probabilities: Dict[int,float] = dict(zip(constructors,constructor_probabilities))
+    title_probabilities: list[TitleProbability] = [TitleProbability(round_number,championship,number,probability,simulations,seed,season) for championship, probabilities in (('Drivers',drivers_probabilities),('Constructors',constructors_probabilities)) for number, probability in probabilities.items()]
+    replace_title_probabilities_toDB(sql_connection,round_number,title_probabilities,season)
+    logger.info('Title probabilities of season %s simulated after round No. %s for %s drivers and %s constructors',season,round_number,len(drivers_probabilities),len(constructors_probabilities),extra={'summary': True})
+    return drivers_probabilities, constructors_probabilities
+
+def get_title_probabilities_trend(sql_connection:sqlite3.Connection,championship:str,round_number:int,season:int=CURRENT_SEASON) -> Dict[int,Tuple[float,Optional[float]]]:
+    '''Returns the title probability of each competitor of a championship ('Drivers' or 'Constructors') stored after round_number, with its change since the previous round with stored probabilities (None if there is none)'''
+    probabilities_by_round: Dict[int,Dict[int,float]] = get_title_probabilities_fromDB(sql_connection,championship,season)
+    probabilities: Dict[int,float] = probabilities_by_round.get(round_number,{})
+    previous_rounds: list[int] = [stored_round for stored_round in probabilities_by_round if stored_round < round_number]
+    previous: Optional[Dict[int,float]] = probabilities_by_round[max(previous_rounds)] if previous_rounds else None
+    return {number: (probability,None if previous is None else probability - previous.get(number,0.0)) for number, probability in probabilities.items()}
+
+def print_time_delta_average(head_to_head:HeadToHead) -> None:
+    '''Prints the average delta time of a head to head comparison, if any timed session was comparable'''
+    if head_to_head.time_delta_average is None:
+        print('No comparable timed session to calculate an average delta')
+    else:
+        print(f'With an average delta of {head_to_head.time_delta_average:.3f}s')
+
+def calculate_drivers_h2h(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str,session_family:str,season:int=CURRENT_SEASON) -> HeadToHead:
+    '''Calculates a head to head comparison between two drivers (input by trigramme, eg: VER, NOR) for a session family (Q, SQ, Race or Sprint, see SESSION_FAMILIES in the constants.py file): the number of sessions of each type driver 1 finished ahead of driver 2 (and viceversa), and the average delta time between both.'''
     #Get Drivers
-    driver1: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_1_trigramme)
-    driver2: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_2_trigramme)
-    #Get results for Quali up to last round
-    results_driver1: list[Result] = get_quali_results_by_driver_fromDB(sql_connection,driver1.car_number)
-    results_driver2: list[Result] = get_quali_results_by_driver_fromDB(sql_connection,driver2.car_number)
-        
+    driver1: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_1_trigramme,season)
+    driver2: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_2_trigramme,season)
+    #Get results of the session family up to last round
+    results_driver1: list[Result] = H2H_RESULTS_FETCHERS[session_family](sql_connection,driver1.car_number,season)
+    results_driver2: list[Result] = H2H_RESULTS_FETCHERS[session_family](sql_connection,driver2.car_number,season)
+
     #Compare results
-    driver1_ahead_counter, driver2_ahead_counter, comparable_sessions_counter, time_delta_average = compare_results_H2H(driver1,driver2,results_driver1,results_driver2)
-    
-    print('#### Qualification Head to Head ####')
-    print(f'{driver1.name} vs {driver2.name}')
-    print(f'Q1: {driver1_ahead_counter["Q1"]} - {driver2_ahead_counter["Q1"]} / {comparable_sessions_counter["Q1"]}')
-    print(f'Q2: {driver1_ahead_counter["Q2"]} - {driver2_ahead_counter["Q2"]} / {comparable_sessions_counter["Q2"]}')
-    print(f'Q3: {driver1_ahead_counter["Q3"]} - {driver2_ahead_counter["Q3"]} / {comparable_sessions_counter["Q3"]}')
-    print(f'With an average delta of {time_delta_average:.3f}s')
-
-def calculate_drivers_h2h_sprint_quali(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str) -> None:
+    return compare_results_H2H(driver1,driver2,results_driver1,results_driver2)
+
+def calculate_drivers_h2h_from_store(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str,session_family:str,season:int=CURRENT_SEASON,folder:str=COLUMNAR_FOLDER) -> HeadToHead:
+    '''Calculates the head to head comparison of calculate_drivers_h2h from the columnar store of the season in folder instead of the Results Table, the drivers coming from the reference data cache'''
+    driver1: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_1_trigramme,season)
+    driver2: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_2_trigramme,season)
+    with open_columnar_season(season,folder) as store:
+        return columnar_h2h(store,driver1,driver2,session_family)
+
+def print_drivers_h2h(head_to_head:HeadToHead,title:str,session_types:Dict[str,str]) -> None:
+    '''Prints a head to head comparison: the sessions each driver finished ahead out of the comparable ones for each session type (session type: label), and the average delta time'''
+    print(f'#### {title} Head to Head ####')
+    print(f'{head_to_head.driver1.name} vs {head_to_head.driver2.name}')
+    for session_type, label in session_types.items():
+        print(f'{label}: {head_to_head.driver1_ahead.get(session_type,0)} - {head_to_head.driver2_ahead.get(session_type,0)} / {head_to_head.comparable_sessions.get(session_type,0)}')
+    print_time_delta_average(head_to_head)
+
+def calculate_drivers_h2h_quali(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str,season:int=CURRENT_SEASON) -> None:
     '''Calculates a head to head comparison between two drivers (input by trigramme, eg: VER, NOR), and returns the number of times driver 1 qualified ahead of driver 2 (and viceversa), and the average delta time between both.'''
-    #Get Drivers
-    driver1: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_1_trigramme)
-    driver2: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_2_trigramme)
-    #Get results for Quali up to last round
-    results_driver1: list[Result] = get_sprint_quali_results_by_driver_fromDB(sql_connection,driver1.car_number)
-    results_driver2: list[Result] = get_sprint_quali_results_by_driver_fromDB(sql_connection,driver2.car_number)
-        
-    #Compare results
-    driver1_ahead_counter, driver2_ahead_counter, comparable_sessions_counter, time_delta_average = compare_results_H2H(driver1,driver2,results_driver1,results_driver2)
-    
-    print('#### Sprint Qualification Head to Head ####')
-    print(f'{driver1.name} vs {driver2.name}')
-    print(f'SQ1: {driver1_ahead_counter["SQ1"]} - {driver2_ahead_counter["SQ1"]} / {comparable_sessions_counter["SQ1"]}')
-    print(f'SQ2: {driver1_ahead_counter["SQ2"]} - {driver2_ahead_counter["SQ2"]} / {comparable_sessions_counter["SQ2"]}')
-    print(f'SQ3: {driver1_ahead_counter["SQ3"]} - {driver2_ahead_counter["SQ3"]} / {comparable_sessions_counter["SQ3"]}')
-    print(f'With an average delta of {time_delta_average:.3f}s')
-
-def calculate_drivers_h2h_race(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str) -> None:
+    print_drivers_h2h(calculate_drivers_h2h(sql_connection,driver_1_trigramme,driver_2_trigramme,'Q',season),'Qualification',{'Q1': 'Q1','Q2': 'Q2','Q3': 'Q3'})
+
+def calculate_drivers_h2h_sprint_quali(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str,season:int=CURRENT_SEASON) -> None:
     '''Calculates a head to head comparison between two drivers (input by trigramme, eg: VER, NOR), and returns the number of times driver 1 qualified ahead of driver 2 (and viceversa), and the average delta time between both.'''
-    #Get Drivers
-    driver1: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_1_trigramme)
-    driver2: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_2_trigramme)
-    #Get results for Quali up to last round
-    results_driver1: list[Result] = get_race_results_by_driver_fromDB(sql_connection,driver1.car_number)
-    results_driver2: list[Result] = get_race_results_by_driver_fromDB(sql_connection,driver2.car_number)
-        
-    #Compare results
-    driver1_ahead_counter, driver2_ahead_counter, comparable_sessions_counter, time_delta_average = compare_results_H2H(driver1,driver2,results_driver1,results_driver2)
-    
-    print('#### Races Head to Head ####')
-    print(f'{driver1.name} vs {driver2.name}')
-    print(f'Races: {driver1_ahead_counter["Race"]} - {driver2_ahead_counter["Race"]} / {comparable_sessions_counter["Race"]}')
-    print(f'With an average delta of {time_delta_average:.3f}s')
-
-def calculate_drivers_h2h_sprint(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str) -> None:
+    print_drivers_h2h(calculate_drivers_h2h(sql_connection,driver_1_trigramme,driver_2_trigramme,'SQ',season),'Sprint Qualification',{'SQ1': 'SQ1','SQ2': 'SQ2','SQ3': 'SQ3'})
+
+def calculate_drivers_h2h_race(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str,season:int=CURRENT_SEASON) -> None:
     '''Calculates a head to head comparison between two drivers (input by trigramme, eg: VER, NOR), and returns the number of times driver 1 qualified ahead of driver 2 (and viceversa), and the average delta time between both.'''
-    #Get Drivers
-    driver1: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_1_trigramme)
-    driver2: Driver = get_driver_by_trigramme_fromDB(sql_connection,driver_2_trigramme)
-    #Get results for Quali up to last round
-    results_driver1: list[Result] = get_sprint_results_by_driver_fromDB(sql_connection,driver1.car_number)
-    results_driver2: list[Result] = get_sprint_results_by_driver_fromDB(sql_connection,driver2.car_number)
-        
-    #Compare results
-    driver1_ahead_counter, driver2_ahead_counter, comparable_sessions_counter, time_delta_average = compare_results_H2H(driver1,driver2,results_driver1,results_driver2)
-    
-    print('#### Sprints Head to Head ####')
-    print(f'{driver1.name} vs {driver2.name}')
-    print(f'Sprints: {driver1_ahead_counter["Sprint"]} - {driver2_ahead_counter["Sprint"]} / {comparable_sessions_counter["Sprint"]}')
-    print(f'With an average delta of {time_delta_average:.3f}s')
+    print_drivers_h2h(calculate_drivers_h2h(sql_connection,driver_1_trigramme,driver_2_trigramme,'Race',season),'Races',{'Race': 'Races'})
+
+def calculate_drivers_h2h_sprint(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str,season:int=CURRENT_SEASON) -> None:
+    '''Calculates a head to head comparison between two drivers (input by trigramme, eg: VER, NOR), and returns the number of times driver 1 qualified ahead of driver 2 (and viceversa), and the average delta time between both.'''
+    print_drivers_h2h(calculate_drivers_h2h(sql_connection,driver_1_trigramme,driver_2_trigramme,'Sprint',season),'Sprints',{'Sprint': 'Sprints'})
+
+def build_drivers_h2h_matrix(sql_connection:sqlite3.Connection,session_family:str,season:int=CURRENT_SEASON) -> HeadToHeadMatrix:
+    '''Calculates the head to head comparison of every pair of drivers of a season of the Drivers Table for a session family (Q, SQ, Race or Sprint, see SESSION_FAMILIES in the constants.py file), loading the results of the family with a single query'''
+    trigrammes: Dict[int,str] = get_all_drivers_trigramme_fromDB(sql_connection,season)
+    results: list[Result] = get_results_by_session_types_fromDB(sql_connection,SESSION_FAMILIES[session_family],season)
+    return calculate_h2h_matrix(session_family,results,sorted(trigrammes.keys()),trigrammes)
+
+def export_drivers_h2h_matrix(matrix:HeadToHeadMatrix,folder:str=EXPORTS_FOLDER) -> list[str]:
+    '''Writes the wins and mean delta time matrices of a head to head matrix as CSV files in folder. Returns the paths of the files'''
+    os.makedirs(folder,exist_ok=True)
+    return matrix.export_to_csv(folder)
+
+def calculate_drivers_h2h_matrix(sql_connection:sqlite3.Connection,session_family:str,export:bool=False,season:int=CURRENT_SEASON) -> HeadToHeadMatrix:
+    '''Calculates the head to head matrix of every pair of drivers of a season for a session family (see build_drivers_h2h_matrix). Prints the wins matrix and, if export is set, writes the wins and mean delta time matrices as CSV files in EXPORTS_FOLDER'''
+    matrix: HeadToHeadMatrix = build_drivers_h2h_matrix(sql_connection,session_family,season)
+
+    labels: list[str] = matrix.labels()
+    print(f'#### {session_family} Head to Head matrix (sessions row driver finished ahead of column driver) ####')
+    print('    ' + ' '.join(f'{label:>4}' for label in labels))
+    for label, row in zip(labels, matrix.wins.tolist()):
+        print(f'{label:>4}' + ' '.join(f'{wins:>4}' for wins in row))
+    if export:
+        for exported_file in export_drivers_h2h_matrix(matrix):
+            print(f'Exported to {exported_file}')
+    return matrix
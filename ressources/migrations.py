@@ -0,0 +1,121 @@
+import sqlite3
+import logging
+from typing import Callable, Dict, Tuple
+from ressources.database_functions_sqlite3 import migrate_results_typed_columns, migrate_season_dimension, load_seasons_fromDB, TABLES_SCHEMA, create_data_version_triggers, get_teammate_sessions_fromDB, replace_teammate_comparisons_toDB
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.teammate_battles import compare_teammates
+from ressources.db_connection import transaction
+from ressources.constants import CARS_PER_CONSTRUCTOR
+
+logger = logging.getLogger(__name__)
+
+#############################################################################
+####                          Migrations                                 ####
+#############################################################################
+
+def migration_results_indexes(sql_connection:sqlite3.Connection) -> None:
+    '''Adds covering indexes to the Results Table for the results of a driver by session type (Head to Head fetchers) and for the points of a constructor by round'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''CREATE INDEX IF NOT EXISTS idx_results_car_session ON Results (car_number, session_type, round_number, car_position, paddock_number, result_time, car_points, time_seconds, status, position)''')
+        sql_cursor.execute('''CREATE INDEX IF NOT EXISTS idx_results_round_paddock ON Results (round_number, paddock_number, car_points)''')
+
+def migration_season_indexes(sql_connection:sqlite3.Connection) -> None:
+    '''Replaces the covering indexes of the Results Table by indexes including the season, so the lookups of a season (results of a driver by session type, points of a constructor by round, results by session type) stay on an index range whatever the number of seasons'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute('''DROP INDEX IF EXISTS idx_results_car_session''')
+        sql_cursor.execute('''DROP INDEX IF EXISTS idx_results_round_paddock''')
+        sql_cursor.execute('''CREATE INDEX idx_results_car_session ON Results (season, car_number, session_type, round_number, car_position, paddock_number, result_time, car_points, time_seconds, status, position)''')
+        # Led by the round: an index led by the season and ordered by round would be preferred to idx_results_car_session for the results of a driver on a Database without statistics
+        sql_cursor.execute('''CREATE INDEX idx_results_round_paddock ON Results (round_number, paddock_number, season, car_points)''')
+        sql_cursor.execute('''CREATE INDEX IF NOT EXISTS idx_results_season_session ON Results (season, session_type, round_number)''')
+
+def migration_seasons_max_points(sql_connection:sqlite3.Connection) -> None:
+    '''Recalculates the maximum points per Race and per Sprint of every season of the Seasons Table from its points tables: the winner for a driver, the first two places for a constructor (a driver was allowed 25 points per sprint instead of 8)'''
+    with transaction(sql_connection) as sql_cursor:
+        for season in load_seasons_fromDB(sql_connection).values():
+            sql_cursor.execute('''UPDATE Seasons SET max_points_race_driver = ?, max_points_sprint_driver = ?, max_points_race_constructor = ?, max_points_sprint_constructor = ? WHERE season = ?''',(season.max_points('Race',1),season.max_points('Sprint',1),season.max_points('Race',CARS_PER_CONSTRUCTOR),season.max_points('Sprint',CARS_PER_CONSTRUCTOR),season.season))
+    REFERENCE_CACHE.invalidate('Seasons')
+
+def migration_title_probabilities(sql_connection:sqlite3.Connection) -> None:
+    '''Creates the Title Probabilities Table, where the probabilities of winning the titles simulated after each round are kept for their trend'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute(f'''CREATE TABLE IF NOT EXISTS TitleProbabilities ({TABLES_SCHEMA['TitleProbabilities']})''')
+
+def migration_laps(sql_connection:sqlite3.Connection) -> None:
+    '''Creates the Laps Table for the lap by lap data of the sessions (see lap_data.py). Written in bulk, it has no data version triggers: its writer bumps the data version once per session (see BULK_TABLES)'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute(f'''CREATE TABLE IF NOT EXISTS Laps ({TABLES_SCHEMA['Laps']})''')
+
+def migration_teammate_comparisons(sql_connection:sqlite3.Connection) -> None:
+    '''Creates the Teammate Comparisons Table, where the comparison of each pair of teammates in each round is kept (see teammate_battles.py), with the triggers of the data version, and fills it from the Results of every season'''
+    with transaction(sql_connection) as sql_cursor:
+        sql_cursor.execute(f'''CREATE TABLE IF NOT EXISTS TeammateComparisons ({TABLES_SCHEMA['TeammateComparisons']})''')
+        create_data_version_triggers(sql_connection)
+        for season in load_seasons_fromDB(sql_connection):
+            replace_teammate_comparisons_toDB(sql_connection,1,compare_teammates(get_teammate_sessions_fromDB(sql_connection,1,season),season),season)
+
+# Each migration is applied once, in order, and the Database keeps the last one applied in PRAGMA user_version
+MIGRATIONS: list[Tuple[int,str,Callable[[sqlite3.Connection],None]]] = [
+    (1,'Typed time_seconds, status and position columns in Results',migrate_results_typed_columns),
+    (2,'Covering indexes on Results for Head to Head and constructors points',migration_results_indexes),
+    (3,'Season dimension: Seasons Table with the rules of each season, season column in every table',migrate_season_dimension),
+    (4,'Covering indexes on Results led by the season',migration_season_indexes),
+    (5,'Maximum points per session of each season recalculated from its points tables',migration_seasons_max_points),
+    (6,'Title Probabilities Table for the simulated chances of winning the titles',migration_title_probabilities),
+    (7,'Data version in the Metadata Table, bumped by triggers on every write',create_data_version_triggers),
+    (8,'Laps Table for the lap by lap data of the sessions',migration_laps),
+    (9,'Teammate Comparisons Table, filled from the Results',migration_teammate_comparisons),
+]
+# Version of the schema once every migration is applied
+SCHEMA_VERSION: int = MIGRATIONS[-1][0]
+
+def get_schema_version(sql_connection:sqlite3.Connection) -> int:
+    '''Fetches the version of the schema of the Database, i.e. the last migration applied'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute('''PRAGMA user_version''')
+    return int(sql_cursor.fetchone()[0])
+
+def apply_migrations(sql_connection:sqlite3.Connection) -> int:
+    '''Applies, in order, every migration newer than the version of the schema of the Database, each one in its own transaction together with the new version. Returns the version of the schema'''
+    schema_version: int = get_schema_version(sql_connection)
+    for version, description, migration in MIGRATIONS:
+        if version <= schema_version:
+            continue
+        logger.info('Applying migration %s: %s',version,description)
+        try:
+            with transaction(sql_connection) as sql_cursor:
+                migration(sql_connection)
+                sql_cursor.execute(f'''PRAGMA user_version = {version}''')
+        except sqlite3.Error as e:
+            logger.critical('Error %s detected when applying migration %s: %s',e,version,description)
+            raise
+        schema_version = version
+    logger.info('Database schema at version %s',schema_version)
+    return schema_version
+
+#############################################################################
+####                          Query plans                                ####
+#############################################################################
+
+# Access pattern: (query, parameters, index expected in the query plan)
+QUERY_PLAN_CHECKS: Dict[str,Tuple[str,tuple,str]] = {
+    'results_by_driver_and_session': ('''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND car_number = ? AND (session_type = "Q1" OR session_type = "Q2" OR session_type = "Q3") ORDER BY round_number''',(2025,1),'idx_results_car_session'),
+    'race_results_by_driver': ('''SELECT car_position,car_number,paddock_number,round_number,session_type,result_time,car_points,time_seconds,status,position,season FROM Results WHERE season = ? AND car_number = ? AND (session_type = "Race") ORDER BY round_number''',(2025,1),'idx_results_car_session'),
+    'points_by_constructor_and_round': ('''SELECT SUM(car_points) FROM Results WHERE season = ? and round_number = ? and paddock_number = ?''',(2025,1,1),'idx_results_round_paddock'),
+}
+
+def get_query_plan_fromDB(sql_connection:sqlite3.Connection,query:str,parameters:tuple) -> list[str]:
+    '''Fetches the details of the EXPLAIN QUERY PLAN of a query'''
+    sql_cursor = sql_connection.cursor()
+    sql_cursor.execute(f'''EXPLAIN QUERY PLAN {query}''',parameters)
+    return [str(row[3]) for row in sql_cursor.fetchall()]
+
+def check_query_plans(sql_connection:sqlite3.Connection) -> Dict[str,bool]:
+    '''Checks with EXPLAIN QUERY PLAN that each access pattern of QUERY_PLAN_CHECKS is answered from its covering index only. Returns the result by access pattern'''
+    checks: Dict[str,bool] = {}
+    for name, (query, parameters, index) in QUERY_PLAN_CHECKS.items():
+        query_plan: list[str] = get_query_plan_fromDB(sql_connection,query,parameters)
+        checks[name] = any(f'COVERING INDEX {index}' in detail for detail in query_plan)
+        if not checks[name]:
+            logger.warning('Access pattern %s does not use index %s: %s',name,index,query_plan)
+    return checks
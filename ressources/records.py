@@ -0,0 +1,65 @@
+import sqlite3
+import logging
+from typing import Any, Dict, Optional
+from ressources.classes.HeadToHead import HeadToHead
+from ressources.classes.DriverRanking import DriverRanking
+from ressources.classes.Result import Result
+from ressources.classes.StandingsHistory import StandingsHistory
+from ressources.database_functions_sqlite3 import get_session_results_fromDB
+from ressources.main_functions import get_stored_rankings, get_standings_history, calculate_teammate_battles, get_championship_labels, calculate_drivers_h2h
+from ressources.constants import CURRENT_SEASON, SESSION_FAMILIES
+
+logger = logging.getLogger(__name__)
+
+# Records are the rows (one dictionary each) shared by the command line (see cli.py) and the HTTP API (see api_server.py)
+
+def rankings_records(sql_connection:sqlite3.Connection,championship:str,round_number:Optional[int]=None,season:int=CURRENT_SEASON) -> list[Dict[str,Any]]:
+    '''Stored rankings of a championship ('Drivers' or 'Constructors') after a round (the last finished round by default). One record per competitor, by position'''
+    labels: Dict[int,str] = get_championship_labels(sql_connection,championship,season)
+    records: list[Dict[str,Any]] = []
+    for ranking in get_stored_rankings(sql_connection,championship,round_number,season):
+        if isinstance(ranking,DriverRanking):
+            number, position, points = ranking.car_number, ranking.car_position, ranking.car_points
+        else:
+            number, position, points = ranking.paddock_number, ranking.constructor_position, ranking.constructor_points
+        records.append({'season': ranking.season,'round_number': ranking.round_number,'position': position,'number': number,'label': labels.get(number,str(number)),'points': points,'championship_chance': ranking.championship_chance})
+    return records
+
+def standings_history_records(sql_connection:sqlite3.Connection,championship:str,first_round:int=1,last_round:Optional[int]=None,season:int=CURRENT_SEASON) -> list[Dict[str,Any]]:
+    '''Standings of a championship ('Drivers' or 'Constructors') after every round from first_round to last_round (the last stored round by default), with the points scored in each round and since first_round. One record per round and competitor, by round and position'''
+    labels: Dict[int,str] = get_championship_labels(sql_connection,championship,season)
+    history: StandingsHistory = get_standings_history(sql_connection,championship,season)
+    records: list[Dict[str,Any]] = []
+    for round_number in range(max(first_round,1),(history.last_round if last_round is None else min(last_round,history.last_round))+1):
+        for number, position, points in history.standings_as_of(round_number):
+            records.append({'season': season,'round_number': round_number,'position': position,'number': number,'label': labels.get(number,str(number)),'points': points,'round_points': history.points_between(number,round_number-1,round_number),'points_since_first_round': history.points_between(number,first_round-1,round_number)})
+    return records
+
+def session_results_records(sql_connection:sqlite3.Connection,round_number:int,session_type:str,season:int=CURRENT_SEASON) -> list[Dict[str,Any]]:
+    '''Results of a session of a round, classified cars first by position. One record per car'''
+    drivers: Dict[int,str] = get_championship_labels(sql_connection,'Drivers',season)
+    constructors: Dict[int,str] = get_championship_labels(sql_connection,'Constructors',season)
+    results: list[Result] = get_session_results_fromDB(sql_connection,round_number,session_type,season)
+    return [{'season': result.season,'round_number': result.round_number,'session_type': result.session_type,'position': result.car_position,'number': result.car_number,'label': drivers.get(result.car_number,str(result.car_number)),'constructor': constructors.get(result.paddock_number,str(result.paddock_number)),'time': result.result_time,'time_seconds': result.time_seconds,'points': result.car_points,'status': result.status} for result in results]
+
+def h2h_records(sql_connection:sqlite3.Connection,driver_1_trigramme:str,driver_2_trigramme:str,session_family:str,season:int=CURRENT_SEASON) -> list[Dict[str,Any]]:
+    '''Head to head between two drivers for a session family. One record per session type, with the average delta time of the whole family'''
+    return head_to_head_records(calculate_drivers_h2h(sql_connection,driver_1_trigramme,driver_2_trigramme,session_family,season),season)
+
+def head_to_head_records(head_to_head:HeadToHead,season:int=CURRENT_SEASON) -> list[Dict[str,Any]]:
+    '''Records of a head to head already calculated. One record per session type, with the average delta time of the whole family'''
+    return [{'season': season,'session_type': session_type,'driver1': head_to_head.driver1.trigramme,'driver2': head_to_head.driver2.trigramme,'driver1_ahead': head_to_head.driver1_ahead.get(session_type,0),'driver2_ahead': head_to_head.driver2_ahead.get(session_type,0),'comparable_sessions': comparable_sessions,'time_delta_average': head_to_head.time_delta_average} for session_type, comparable_sessions in head_to_head.comparable_sessions.items()]
+
+def teammate_battles_records(sql_connection:sqlite3.Connection,season:int=CURRENT_SEASON) -> list[Dict[str,Any]]:
+    '''Battle of every pair of teammates of every constructor of a season: for each session family (q, sq, race, sprint) the sessions won by each car and the median gap, and the share of the points of the pair scored by each car. One record per pair, by constructor'''
+    drivers: Dict[int,str] = get_championship_labels(sql_connection,'Drivers',season)
+    constructors: Dict[int,str] = get_championship_labels(sql_connection,'Constructors',season)
+    records: list[Dict[str,Any]] = []
+    for battle in calculate_teammate_battles(sql_connection,season):
+        record: Dict[str,Any] = {'season': battle.season,'constructor': constructors.get(battle.paddock_number,str(battle.paddock_number)),'driver': drivers.get(battle.car_number,str(battle.car_number)),'teammate': drivers.get(battle.teammate_number,str(battle.teammate_number))}
+        for session_family in SESSION_FAMILIES:
+            prefix: str = session_family.lower()
+            record.update({f'{prefix}_driver_ahead': battle.car_ahead[session_family],f'{prefix}_teammate_ahead': battle.teammate_ahead[session_family],f'{prefix}_median_gap': battle.median_gap[session_family]})
+        record.update({'driver_points': battle.car_points,'teammate_points': battle.teammate_points,'points_share': battle.points_share})
+        records.append(record)
+    return records
@@ -0,0 +1,80 @@
+import math
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+import numpy as np
+from ressources.classes.Result import Result
+from ressources.constants import SIMULATION_FORM_DECAY, SIMULATION_FORM_SCALE, SIMULATION_CHUNK
+
+logger = logging.getLogger(__name__)
+
+#### Form ####
+
+def calculate_form(results:list[Result],round_number:int) -> Dict[int,float]:
+    '''Returns the form of every driver with a Race or Sprint result up to round_number, between 0 (always last or not classified) and 1 (always winning): the average share of the field beaten in each session, the older rounds weighing SIMULATION_FORM_DECAY times less per round'''
+    field_size: Dict[Tuple[int,str],int] = {}
+    for result in results:
+        if result.round_number <= round_number:
+            field_size[(result.round_number,result.session_type)] = field_size.get((result.round_number,result.session_type),0) + 1
+    weighted_sum: Dict[int,float] = {}
+    weight_sum: Dict[int,float] = {}
+    for result in results:
+        if result.round_number > round_number:
+            continue
+        size: int = field_size[(result.round_number,result.session_type)]
+        beaten: float = (size - result.position)/(size - 1) if result.position is not None and size > 1 else 0.0
+        weight: float = SIMULATION_FORM_DECAY**(round_number - result.round_number)
+        weighted_sum[result.car_number] = weighted_sum.get(result.car_number,0.0) + weight*beaten
+        weight_sum[result.car_number] = weight_sum.get(result.car_number,0.0) + weight
+    return {car_number: weighted_sum[car_number]/weight_sum[car_number] for car_number in weighted_sum}
+
+def form_strengths(form:Dict[int,float]) -> Dict[int,float]:
+    '''Converts the form of each driver into its Plackett-Luce strength, exp(SIMULATION_FORM_SCALE x form): the chance of a driver to finish ahead of the rest of the field is proportional to its strength'''
+    return {car_number: math.exp(SIMULATION_FORM_SCALE*driver_form) for car_number, driver_form in form.items()}
+
+#### Simulation ####
+
+def simulate_seasons(grid:list[int],strengths:list[float],teams:list[int],driver_points:list[int],team_points:list[int],sessions:list[list[int]],simulations:int,seed:Tuple[int,int]) -> Tuple[list[int],list[int]]:
+    '''Simulates the remaining sessions of a season simulations times and returns the titles won by each driver and by each team (indices of driver_points and team_points, the current points, ties going to the lowest index as in the rankings).
+    The drivers of grid (indices of driver_points) race with their strengths and teams (indices of team_points): each session samples a Plackett-Luce finishing order and scores it with the points table of the session (points by position, best first).
+    The order is sampled as an exponential race: a driver of strength w finishes after an exponential time of rate w, i.e. ahead of the others in order of U**(1/w) for U uniform. Every session is sampled for all the simulations at once, one row per simulation'''
+    generator: np.random.Generator = np.random.default_rng(seed)
+    starters: int = len(grid)
+    inverse_strengths: np.ndarray = 1/np.asarray(strengths,dtype=np.float64)
+    # Points scored by each starter in each simulation, added to the championships once the season is over
+    scored: np.ndarray = np.zeros((simulations,starters),dtype=np.int64)
+    session_scored: np.ndarray = np.empty((simulations,starters),dtype=np.int64)
+    for points_table in sessions:
+        points: np.ndarray = np.zeros(starters,dtype=np.int64)
+        points[:min(len(points_table),starters)] = points_table[:starters]
+        keys: np.ndarray = generator.random((simulations,starters))**inverse_strengths
+        # Finishing order of every simulation, the highest key first, each position scoring its points
+        np.put_along_axis(session_scored,np.argsort(-keys,axis=1),points[np.newaxis,:],axis=1)
+        scored += session_scored
+    # Each starter scores for its driver and for its team
+    starter_drivers: np.ndarray = np.zeros((starters,len(driver_points)),dtype=np.int64)
+    starter_drivers[np.arange(starters),grid] = 1
+    starter_teams: np.ndarray = np.zeros((starters,len(team_points)),dtype=np.int64)
+    starter_teams[np.arange(starters),teams] = 1
+    driver_totals: np.ndarray = np.asarray(driver_points,dtype=np.int64) + scored @ starter_drivers
+    team_totals: np.ndarray = np.asarray(team_points,dtype=np.int64) + scored @ starter_teams
+    # argmax keeps the first of the tied competitors
+    driver_titles: np.ndarray = np.bincount(driver_totals.argmax(axis=1),minlength=len(driver_points))
+    team_titles: np.ndarray = np.bincount(team_totals.argmax(axis=1),minlength=len(team_points))
+    return driver_titles.tolist(), team_titles.tolist()
+
+def simulate_title_chances(grid:list[int],strengths:list[float],teams:list[int],driver_points:list[int],team_points:list[int],sessions:list[list[int]],simulations:int,seed:int=0,max_workers:Optional[int]=None) -> Tuple[list[float],list[float]]:
+    '''Runs simulations seasons (see simulate_seasons) in chunks of SIMULATION_CHUNK, each chunk with its own seed derived from seed, split across a process pool of max_workers. The chunks and their seeds do not depend on the number of workers, so the same seed always gives the same probabilities.
+    Returns the probability of each driver and of each team to win the title'''
+    chunks: list[Tuple[int,Tuple[int,int]]] = [(min(SIMULATION_CHUNK,simulations - start),(seed,index)) for index, start in enumerate(range(0,simulations,SIMULATION_CHUNK))]
+    arguments: Tuple = (grid,strengths,teams,driver_points,team_points,sessions)
+    if max_workers == 1 or len(chunks) <= 1:
+        chunks_titles: list[Tuple[list[int],list[int]]] = [simulate_seasons(*arguments,chunk_simulations,chunk_seed) for chunk_simulations, chunk_seed in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(simulate_seasons,*arguments,chunk_simulations,chunk_seed) for chunk_simulations, chunk_seed in chunks]
+            chunks_titles = [future.result() for future in futures]
+    driver_titles: list[int] = [sum(titles[0][driver] for titles in chunks_titles) for driver in range(len(driver_points))]
+    team_titles: list[int] = [sum(titles[1][team] for titles in chunks_titles) for team in range(len(team_points))]
+    logger.info('%s seasons simulated in %s chunks with seed %s',simulations,len(chunks),seed,extra={'summary': True})
+    return [titles/simulations for titles in driver_titles], [titles/simulations for titles in team_titles]
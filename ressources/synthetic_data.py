@@ -0,0 +1,173 @@
+import os
+import csv
+import logging
+import random
+from typing import Iterable, Iterator, Tuple
+from ressources.constants import DRIVERS_COLUMNS, CONSTRUCTORS_COLUMNS, ROUNDS_COLUMNS, RESULTS_COLUMNS, LAPS_COLUMNS, SEASONS_COLUMNS, RACE_POINTS, SPRINT_POINTS, MAX_POINTS_RACE_DRIVER, MAX_POINTS_SPRINT_DRIVER, MAX_POINTS_RACE_CONSTRUCTOR, MAX_POINTS_SPRINT_CONSTRUCTOR
+
+logger = logging.getLogger(__name__)
+
+# Share of the grid going through to the next part of the qualification (20 cars: 15 in Q2, 10 in Q3)
+QUALIFICATION_CUTS: list[float] = [1.0, 0.75, 0.5]
+DNS_RATE: float = 0.01
+DNF_RATE: float = 0.06
+DSQ_RATE: float = 0.01
+# Lap by lap races: time lost by a lap per lap of the tyres, gained per lap of fuel burnt, lost in the pit lane (in-lap) and on the out-lap
+TYRE_DEGRADATION: float = 0.06
+FUEL_EFFECT: float = 0.03
+PIT_LOSS: float = 20.0
+OUT_LAP_LOSS: float = 2.0
+
+#### Grid ####
+
+def generate_trigramme(index:int) -> str:
+    '''Returns a unique three letter trigramme for a driver index (AAA, AAB, ...)'''
+    return ''.join(chr(65 + (index // 26**power) % 26) for power in (2,1,0))
+
+def generate_grid(drivers:int,seed:int=0) -> Tuple[list[list],list[list],dict[int,float]]:
+    '''Generates the drivers (two per constructor) and the constructors of a synthetic grid, in the DRIVERS_COLUMNS and CONSTRUCTORS_COLUMNS formats, with the performance of each car (lower is faster) keyed by car_number'''
+    generator: random.Random = random.Random(seed)
+    constructors: list[list] = []
+    drivers_rows: list[list] = []
+    pace: dict[int,float] = {}
+    for paddock_number in range(1,(drivers + 1)//2 + 1):
+        constructors.append([f'Synthetic Team {paddock_number} F1 Team',f'Synthetic {paddock_number} Racing',f'Team {paddock_number}',paddock_number])
+    for index in range(drivers):
+        car_number: int = index + 1
+        constructor: list = constructors[index//2]
+        drivers_rows.append([f'Driver {generate_trigramme(index)}',generate_trigramme(index),car_number,'Synthetic',constructor[CONSTRUCTORS_COLUMNS.index('result_name')]])
+        pace[car_number] = (index//2)*0.15 + generator.gauss(0,0.2)
+    return drivers_rows, constructors, pace
+
+#### Sessions ####
+
+def format_lap_time(seconds:float) -> str:
+    '''Formats a qualification lap time as m:ss.sss'''
+    return f'{int(seconds//60)}:{seconds%60:06.3f}'
+
+def format_race_time(seconds:float) -> str:
+    '''Formats the total time of the winner of a race as h:mm:ss.sss'''
+    return f'{int(seconds//3600)}:{int(seconds%3600//60):02d}:{seconds%60:06.3f}'
+
+def generate_qualification(grid:list[list],pace:dict[int,float],session_types:list[str],generator:random.Random) -> dict[str,list[list]]:
+    '''Generates the three parts of a qualification (Q1-Q3 or SQ1-SQ3): the slowest cars of each part are eliminated from the next one, and a few cars do not set a time (DNS)'''
+    sessions: dict[str,list[list]] = {}
+    base_lap: float = generator.uniform(75,95)
+    remaining: list[list] = grid
+    for session_type, cut in zip(session_types,QUALIFICATION_CUTS):
+        remaining = remaining[:max(1,round(len(grid)*cut))]
+        timed: list[Tuple[float,list]] = []
+        not_timed: list[list] = []
+        for driver in remaining:
+            if session_type == session_types[0] and generator.random() < DNS_RATE:
+                not_timed.append(driver)
+            else:
+                timed.append((base_lap + pace[driver[2]] + generator.gauss(0,0.25),driver))
+        timed.sort(key=lambda x: x[0])
+        rows: list[list] = [[position,driver[2],driver[0],driver[4],format_lap_time(lap_time),0] for position, (lap_time, driver) in enumerate(timed,1)]
+        rows += [['NC',driver[2],driver[0],driver[4],'DNS',0] for driver in not_timed]
+        sessions[session_type] = rows
+        remaining = [driver for lap_time, driver in timed]
+    return sessions
+
+def generate_race(grid:list[list],pace:dict[int,float],laps:int,points:dict[str,int],generator:random.Random) -> list[list]:
+    '''Generates a Race or a Sprint: the winner has the total race time and the other finishers the gap to the winner, the cars more than a lap behind are Lapped, and a few cars do not finish (DNF) or are disqualified (DSQ)'''
+    base_lap: float = generator.uniform(80,100)
+    finishers: list[Tuple[float,list]] = []
+    retired: list[list] = []
+    disqualified: list[list] = []
+    for driver in grid:
+        draw: float = generator.random()
+        if draw < DNF_RATE:
+            retired.append(driver)
+        elif draw < DNF_RATE + DSQ_RATE:
+            disqualified.append(driver)
+        else:
+            finishers.append((laps*(base_lap + pace[driver[2]]) + generator.gauss(0,laps*0.3),driver))
+    finishers.sort(key=lambda x: x[0])
+    rows: list[list] = []
+    for position, (race_time, driver) in enumerate(finishers,1):
+        gap: float = race_time - finishers[0][0]
+        if position == 1:
+            time_string: str = format_race_time(race_time)
+        elif gap > base_lap:
+            time_string = 'Lapped'
+        else:
+            time_string = f'{gap:.3f}'
+        rows.append([position,driver[2],driver[0],driver[4],time_string,points.get(str(position),0)])
+    rows += [['NC',driver[2],driver[0],driver[4],'DNF',0] for driver in retired]
+    rows += [['DQ',driver[2],driver[0],driver[4],'DSQ',0] for driver in disqualified]
+    return rows
+
+def generate_race_laps(grid:list[list],pace:dict[int,float],laps:int,generator:random.Random) -> Iterator[list]:
+    '''Yields the laps of a Race lap after lap in the LAPS_COLUMNS format, without holding the race in memory: each car stops once or twice (its in-lap flagged PIT), its lap time growing with the age of its tyres and falling with its fuel, the positions following the total times, and a few cars do not finish (a last lap DNF)'''
+    base_lap: float = generator.uniform(80,100)
+    total_times: dict[int,float] = {driver[2]: 0.0 for driver in grid}
+    tyres_age: dict[int,int] = {driver[2]: 0 for driver in grid}
+    pit_laps: dict[int,set[int]] = {driver[2]: set(generator.sample(range(10,laps - 5),generator.choice([1,2]))) if laps > 20 else set() for driver in grid}
+    retirements: dict[int,int] = {driver[2]: generator.randint(1,laps) for driver in grid if generator.random() < DNF_RATE}
+    for lap_number in range(1,laps + 1):
+        lap_times: dict[int,float] = {}
+        for car_number in total_times:
+            if retirements.get(car_number,laps + 1) <= lap_number:
+                continue
+            tyres_age[car_number] += 1
+            lap_time: float = base_lap + pace[car_number] + TYRE_DEGRADATION*tyres_age[car_number] - FUEL_EFFECT*lap_number + generator.gauss(0,0.3)
+            if lap_number in pit_laps[car_number]:
+                lap_time += PIT_LOSS
+                tyres_age[car_number] = 0
+            elif lap_number - 1 in pit_laps[car_number]:
+                lap_time += OUT_LAP_LOSS
+            total_times[car_number] += lap_time
+            lap_times[car_number] = lap_time
+        for position, car_number in enumerate(sorted(lap_times,key=lambda x: total_times[x]),1):
+            yield [lap_number,car_number,format_lap_time(lap_times[car_number]),position,'PIT' if lap_number in pit_laps[car_number] else '']
+        for car_number, retirement_lap in retirements.items():
+            if retirement_lap == lap_number:
+                yield [lap_number,car_number,'DNF','','']
+
+#### Files ####
+
+def write_csv(filename:str,columns:list[str],rows:Iterable[list]) -> None:
+    '''Writes rows (any iterable, e.g. a generator written as it yields) with the given header to a CSV file'''
+    with open(filename,'w',newline='') as csv_file:
+        writer = csv.writer(csv_file, delimiter=',', quotechar='"', quoting=csv.QUOTE_MINIMAL)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+def generate_season(folder:str,rounds:int=24,drivers:int=20,sprint_every:int=4,year:int=2025,seed:int=0) -> dict[str,str]:
+    '''Writes a synthetic season in folder, in the formats of the real data: Seasons.csv (rules of the season year), Constructors.csv, Rounds.csv and a results folder with one "ROUND n - <session>.csv" file per session (RESULTS_COLUMNS), with a sprint weekend every sprint_every rounds.
+    The laps of every Race are written to a laps folder, one "ROUND n - Race laps.csv" file per round (LAPS_COLUMNS), from their own random generator so the results do not depend on them.
+    Returns the paths of the files to import, keyed "seasons", "drivers", "constructors", "rounds", "results" and "laps" (folders)'''
+    generator: random.Random = random.Random(seed)
+    results_folder: str = os.path.join(folder,'results','')
+    os.makedirs(results_folder,exist_ok=True)
+    laps_folder: str = os.path.join(folder,'laps','')
+    os.makedirs(laps_folder,exist_ok=True)
+    laps_generator: random.Random = random.Random(f'laps-{seed}')
+    grid, constructors, pace = generate_grid(drivers,seed)
+    paths: dict[str,str] = {'seasons': os.path.join(folder,'Seasons.csv'),'drivers': os.path.join(folder,'Drivers.csv'),'constructors': os.path.join(folder,'Constructors.csv'),'rounds': os.path.join(folder,'Rounds.csv'),'results': results_folder,'laps': laps_folder}
+    write_csv(paths['drivers'],DRIVERS_COLUMNS,[driver[:len(DRIVERS_COLUMNS)] for driver in grid])
+    write_csv(paths['constructors'],CONSTRUCTORS_COLUMNS,constructors)
+
+    rounds_rows: list[list] = []
+    for round_number in range(1,rounds + 1):
+        round_type: str = 'Sprint' if sprint_every and round_number % sprint_every == 2 else 'GP'
+        rounds_rows.append([f'{round_number:02d}',f'FORMULA 1 SYNTHETIC GRAND PRIX {round_number} {year}',f'Country {round_number}',f'Circuit {round_number}',f'{year}-{(round_number - 1)//3 % 12 + 1:02d}-{(round_number - 1) % 3*7 + 1:02d}',round_type])
+        sessions: dict[str,list[list]] = generate_qualification(grid,pace,['Q1','Q2','Q3'],generator)
+        sessions['Race'] = generate_race(grid,pace,generator.randint(50,70),RACE_POINTS,generator)
+        if round_type == 'Sprint':
+            sessions.update(generate_qualification(grid,pace,['SQ1','SQ2','SQ3'],generator))
+            sessions['Sprint'] = generate_race(grid,pace,generator.randint(17,24),SPRINT_POINTS,generator)
+        for session_type, rows in sessions.items():
+            write_csv(f'{results_folder}ROUND {round_number} - {session_type}.csv',RESULTS_COLUMNS,rows)
+        write_csv(f'{laps_folder}ROUND {round_number} - Race laps.csv',LAPS_COLUMNS,generate_race_laps(grid,pace,laps_generator.randint(50,70),laps_generator))
+    write_csv(paths['rounds'],ROUNDS_COLUMNS,rounds_rows)
+    sprints: int = sum(1 for round_row in rounds_rows if round_row[-1] == 'Sprint')
+    write_csv(paths['seasons'],SEASONS_COLUMNS,[[year,rounds,sprints,' '.join(str(points) for points in RACE_POINTS.values()),' '.join(str(points) for points in SPRINT_POINTS.values()),MAX_POINTS_RACE_DRIVER,MAX_POINTS_SPRINT_DRIVER,MAX_POINTS_RACE_CONSTRUCTOR,MAX_POINTS_SPRINT_CONSTRUCTOR]])
+    logger.info('Synthetic season %s generated in %s with %s rounds and %s drivers',year,folder,rounds,drivers)
+    return paths
+
+def generate_seasons(folder:str,seasons:int=1,rounds:int=24,drivers:int=20,sprint_every:int=4,first_year:int=2025,seed:int=0) -> list[dict[str,str]]:
+    '''Writes several synthetic seasons, one sub folder of folder per year (see generate_season). Returns the paths of the files of each season'''
+    return [generate_season(os.path.join(folder,str(first_year + index)),rounds,drivers,sprint_every,first_year + index,seed + index) for index in range(seasons)]
@@ -0,0 +1,84 @@
+import logging
+from statistics import median
+from itertools import combinations, groupby
+from typing import Dict, Optional, Tuple
+from ressources.classes.TeammateBattle import TeammateBattle
+from ressources.constants import SESSION_FAMILIES, STATUS_DNF, STATUS_DNS, STATUS_DSQ, CURRENT_SEASON
+
+logger = logging.getLogger(__name__)
+
+# Session family of each session type, and order of the session types in their family (Q1 < Q2 < Q3)
+FAMILY_BY_SESSION: Dict[str,str] = {session_type: session_family for session_family, session_types in SESSION_FAMILIES.items() for session_type in session_types}
+SESSION_ORDER: Dict[str,int] = {session_type: order for session_types in SESSION_FAMILIES.values() for order, session_type in enumerate(session_types)}
+# Status of the results without any time (DNF, DNS, DSQ), behind every other result
+NOT_TIME_STATUS: Tuple[int,...] = (STATUS_DNF,STATUS_DNS,STATUS_DSQ)
+
+#############################################################################
+####                          Comparisons                                ####
+#############################################################################
+
+def teammate_ahead(car:Tuple[int,Optional[int],Optional[int],Optional[float]],teammate:Tuple[int,Optional[int],Optional[int],Optional[float]]) -> Optional[int]:
+    '''Returns the car number of the car ahead of the two (car number, position, status, time in seconds) in a session, with the rules of compare_results_H2H (helper_functions.py): a car without a time is behind, and neither is ahead (not comparable) if both had no time. A classified car without a position is behind'''
+    car_not_time: bool = car[2] in NOT_TIME_STATUS
+    teammate_not_time: bool = teammate[2] in NOT_TIME_STATUS
+    if car_not_time and teammate_not_time:
+        return None
+    if car_not_time:
+        return teammate[0]
+    if teammate_not_time:
+        return car[0]
+    if car[1] is not None and (teammate[1] is None or car[1] < teammate[1]):
+        return car[0]
+    return teammate[0]
+
+def compare_teammates(sessions:list[Tuple[int,str,int,int,Optional[int],Optional[int],Optional[float],int]],season:int=CURRENT_SEASON) -> list[Tuple]:
+    '''Compares every pair of teammates in every round from the results grouped by session and constructor (see get_teammate_sessions_fromDB), the paddock number of each result giving the pairs, so a driver swap during the season gives a new pair from the round it happens.
+    Each pair is compared once per session family: a Race or a Sprint is decided by its result, a qualification (Q or SQ) by the last part both cars took part in, where the car eliminated earlier is behind.
+    Returns the rows of the Teammate Comparisons Table: (season, round number, session family, paddock number, car number, teammate number, deciding session type, car ahead or None, time delta or None, car points, teammate points)'''
+    # (round, family, paddock number, car, teammate) -> session type deciding the comparison, with the results of both cars
+    deciding_sessions: Dict[Tuple[int,str,int,int,int],Tuple[str,Tuple,Tuple]] = {}
+    for (round_number, session_type, paddock_number), constructor_results in groupby(sessions,key=lambda x: x[:3]):
+        session_family: Optional[str] = FAMILY_BY_SESSION.get(session_type)
+        if session_family is None:
+            continue
+        for car, teammate in combinations(constructor_results,2):
+            key: Tuple[int,str,int,int,int] = (round_number,session_family,paddock_number,car[3],teammate[3])
+            deciding_session: Optional[Tuple[str,Tuple,Tuple]] = deciding_sessions.get(key)
+            if deciding_session is None or SESSION_ORDER[session_type] > SESSION_ORDER[deciding_session[0]]:
+                deciding_sessions[key] = (session_type,car,teammate)
+    comparisons: list[Tuple] = []
+    for (round_number, session_family, paddock_number, car_number, teammate_number), (session_type, car, teammate) in deciding_sessions.items():
+        time_delta: Optional[float] = car[6] - teammate[6] if car[6] is not None and teammate[6] is not None else None
+        comparisons.append((season,round_number,session_family,paddock_number,car_number,teammate_number,session_type,teammate_ahead(car[3:7],teammate[3:7]),time_delta,car[7],teammate[7]))
+    logger.info('%s teammate comparisons of season %s from %s results',len(comparisons),season,len(sessions))
+    return comparisons
+
+#############################################################################
+####                          Battles                                    ####
+#############################################################################
+
+def summarize_teammate_battles(comparisons:list[Tuple[int,int,int,str,Optional[int],Optional[float],int,int]],season:int=CURRENT_SEASON) -> list[TeammateBattle]:
+    '''Summarizes the teammate comparisons of a season (see get_teammate_comparisons_fromDB) into the battle of each pair of teammates of each constructor: sessions won by each car and comparable sessions by session family, median gap of the comparisons with a time on both cars, and points of each car. Returns the battles by paddock number and cars'''
+    battles: Dict[Tuple[int,int,int],TeammateBattle] = {}
+    gaps: Dict[Tuple[int,int,int],Dict[str,list[float]]] = {}
+    for paddock_number, car_number, teammate_number, session_family, ahead, time_delta, car_points, teammate_points in comparisons:
+        key: Tuple[int,int,int] = (paddock_number,car_number,teammate_number)
+        battle: Optional[TeammateBattle] = battles.get(key)
+        if battle is None:
+            battle = battles[key] = TeammateBattle(paddock_number,car_number,teammate_number,season,{session_family: 0 for session_family in SESSION_FAMILIES},{session_family: 0 for session_family in SESSION_FAMILIES},{session_family: 0 for session_family in SESSION_FAMILIES})
+            gaps[key] = {session_family: [] for session_family in SESSION_FAMILIES}
+        battle.car_points += car_points or 0
+        battle.teammate_points += teammate_points or 0
+        if ahead is None:
+            continue
+        battle.comparable_sessions[session_family] += 1
+        if ahead == car_number:
+            battle.car_ahead[session_family] += 1
+        else:
+            battle.teammate_ahead[session_family] += 1
+        if time_delta is not None:
+            gaps[key][session_family].append(time_delta)
+    for key, battle in battles.items():
+        battle.median_gap = {session_family: median(family_gaps) if family_gaps else None for session_family, family_gaps in gaps[key].items()}
+    logger.info('%s teammate battles of season %s summarized from %s comparisons',len(battles),season,len(comparisons))
+    return list(battles.values())
@@ -0,0 +1,90 @@
+import re
+import logging
+import random
+import time
+from typing import Optional, Tuple
+import numpy as np
+from ressources.constants import STATUS_FINISHED, STATUS_NC, RESULT_STATUS
+
+logger = logging.getLogger(__name__)
+
+# 'h:mm:ss.sss', 'm:ss.sss' or 'ss.sss', with an optional '+' and 's' for gaps (e.g. '+9.748s')
+TIME_PATTERN = re.compile(r'^\+?(?:(?:(\d+):)?(\d+):)?(\d+(?:\.\d+)?)s?$')
+
+def parse_time_column(time_strings:list[str],car_positions:Optional[list[str]]=None,gaps:bool=False) -> Tuple[np.ndarray,np.ndarray]:
+    '''Parses a whole Time column of a result file in one pass, without relying on exceptions.
+    Returns an array of float64 with the time in seconds (NaN when there is no time) and an array of int8 status codes (STATUS_FINISHED, STATUS_DNF, STATUS_DNS, STATUS_DSQ, STATUS_NC or STATUS_LAPPED in the constants.py file).
+    The status is taken from the Time cell (e.g. DNF) and, if car_positions is given, from the Pos cell (NC, DQ) of classified cars.
+    If gaps is set (Race and Sprint), the first time is the total time of the winner and the following ones are gaps to the winner, so they are converted into total times.'''
+    times: list[float] = []
+    statuses: list[int] = []
+    nan: float = float('nan')
+    match = TIME_PATTERN.match
+    for i, time_string in enumerate(time_strings):
+        time_string = time_string.strip()
+        parsed = match(time_string)
+        if parsed is None:
+            times.append(nan)
+            statuses.append(RESULT_STATUS.get(time_string,STATUS_NC))
+            continue
+        hours, minutes, seconds = parsed.groups()
+        total_seconds: float = float(seconds)
+        if minutes is not None:
+            total_seconds += int(minutes)*60
+        if hours is not None:
+            total_seconds += int(hours)*3600
+        times.append(total_seconds)
+        if car_positions is not None and not car_positions[i].isdigit():
+            statuses.append(RESULT_STATUS.get(car_positions[i],STATUS_NC))
+        else:
+            statuses.append(STATUS_FINISHED)
+    times_array: np.ndarray = np.array(times,dtype=np.float64)
+    if gaps and len(times) > 1 and times[0] == times[0]:
+        times_array[1:] += times[0]
+    return times_array, np.array(statuses,dtype=np.int8)
+
+def format_result_time(time_seconds:float,time_string:str) -> str:
+    '''Returns the result_time stored in the Results Table: the time in seconds for a timed result, the original string (e.g. DNF, Lapped) otherwise'''
+    if time_seconds != time_seconds:
+        return time_string
+    return str(time_seconds)
+
+def generate_time_column(rows:int,seed:int=0) -> list[str]:
+    '''Generates a synthetic Time column with qualification style times, race style gaps and non timed results (DNF, DNS, DSQ, Lapped)'''
+    generator: random.Random = random.Random(seed)
+    time_strings: list[str] = []
+    for _ in range(rows):
+        kind: float = generator.random()
+        if kind < 0.45:
+            time_strings.append(f'1:{generator.randint(10,35)}.{generator.randint(0,999):03d}')
+        elif kind < 0.9:
+            time_strings.append(f'{generator.uniform(0.1,90):.3f}')
+        elif kind < 0.92:
+            time_strings.append(f'1:{generator.randint(25,45)}:{generator.randint(0,59):02d}')
+        else:
+            time_strings.append(generator.choice(['DNF','DNS','DSQ','Lapped']))
+    return time_strings
+
+def benchmark_time_parsing(rows:int=500000,seed:int=0) -> Tuple[float,float]:
+    '''Times convert_time_to_seconds (one call per cell, catching the exceptions of non timed results) against parse_time_column on the same synthetic column. Returns both durations in seconds'''
+    from ressources.helper_functions import convert_time_to_seconds
+    time_strings: list[str] = generate_time_column(rows,seed)
+
+    start: float = time.perf_counter()
+    for time_string in time_strings:
+        try:
+            convert_time_to_seconds(time_string)
+        except ValueError:
+            pass
+    row_by_row: float = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parse_time_column(time_strings)
+    batch: float = time.perf_counter() - start
+    logger.info('Time parsing of %s cells: convert_time_to_seconds %.3fs, parse_time_column %.3fs',rows,row_by_row,batch)
+    return row_by_row, batch
+
+if __name__ == "__main__":
+    row_by_row, batch = benchmark_time_parsing()
+    print(f'convert_time_to_seconds: {row_by_row:.3f}s')
+    print(f'parse_time_column: {batch:.3f}s ({row_by_row/batch:.1f}x faster)')
@@ -0,0 +1,65 @@
+import os
+import sys
+import shutil
+import sqlite3
+from typing import Dict, Iterator
+import pytest
+
+# The tests run from any folder: the repository root is where the ressources package is
+ROOT_FOLDER: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0,ROOT_FOLDER)
+
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.database_functions_sqlite3 import initialize_db
+from ressources.migrations import apply_migrations
+from ressources.main_functions import seed_reference_data, import_season
+
+DATA_FOLDER: str = os.path.join(ROOT_FOLDER,'data')
+RESULTS_FOLDER: str = os.path.join(DATA_FOLDER,'results','')
+# The seed files of the repository, by kind (see SEED_FILES in the constants.py file)
+SEED_PATHS: Dict[str,str] = {'seasons': os.path.join(DATA_FOLDER,'Seasons.csv'),'drivers': os.path.join(DATA_FOLDER,'Drivers.csv'),'constructors': os.path.join(DATA_FOLDER,'Constructors.csv'),'rounds': os.path.join(DATA_FOLDER,'Rounds.csv')}
+
+def pytest_addoption(parser):
+    parser.addoption('--startup-budgets',action='store_true',default=False,help='Also asserts the startup times against STARTUP_BUDGETS_MS, which depends on the speed of the machine')
+
+def pytest_configure(config):
+    config.addinivalue_line('markers','startup_budget: timing test against STARTUP_BUDGETS_MS, run with --startup-budgets')
+
+def pytest_collection_modifyitems(config,items):
+    if config.getoption('--startup-budgets'):
+        return
+    skip_timing = pytest.mark.skip(reason='timing test, run with --startup-budgets')
+    for item in items:
+        if 'startup_budget' in item.keywords:
+            item.add_marker(skip_timing)
+
+@pytest.fixture(autouse=True)
+def working_folder(tmp_path,monkeypatch) -> str:
+    '''Runs each test in its own empty folder, where the files of the relative paths of the constants.py file are written, with an empty reference data cache'''
+    monkeypatch.chdir(tmp_path)
+    REFERENCE_CACHE.clear()
+    yield str(tmp_path)
+    REFERENCE_CACHE.clear()
+
+@pytest.fixture
+def seeded_connection() -> Iterator[sqlite3.Connection]:
+    '''In-memory Database with every migration applied, seeded from the seed files of the repository'''
+    sql_connection: sqlite3.Connection = initialize_db(':memory:')
+    apply_migrations(sql_connection)
+    seed_reference_data(sql_connection,SEED_PATHS)
+    yield sql_connection
+    sql_connection.close()
+
+def copy_results(folder:str,rounds:list[int]) -> str:
+    '''Copies the result files of some rounds of the repository to folder. Returns folder as a results folder'''
+    os.makedirs(folder,exist_ok=True)
+    for filename in os.listdir(RESULTS_FOLDER):
+        if any(filename.startswith(f'ROUND {round_number} - ') for round_number in rounds):
+            shutil.copyfile(os.path.join(RESULTS_FOLDER,filename),os.path.join(folder,filename))
+    return os.path.join(folder,'')
+
+@pytest.fixture
+def season_connection(seeded_connection,working_folder) -> sqlite3.Connection:
+    '''Seeded in-memory Database with the season of the result files of the repository imported'''
+    import_season(seeded_connection,RESULTS_FOLDER,1,store_folder=os.path.join(working_folder,'columnar',''))
+    return seeded_connection
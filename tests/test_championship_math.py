@@ -0,0 +1,16 @@
+from ressources.championship_math import bound_chances, championship_chances
+
+RACE: list[int] = [25,18,15,12,10,8,6,4,2,1]
+
+def test_bound_chances():
+    points = {1: 100,4: 100,16: 76,44: 75,81: 10}
+    # Tie on points: the lowest number leads and keeps the chance, a tie with the leader is lost
+    assert bound_chances(points,[RACE],1) == {1: True,4: True,16: True,44: False,81: False}
+    assert bound_chances(points,[],1) == {1: True,4: False,16: False,44: False,81: False}
+    assert bound_chances({7: 0},[RACE],1) == {7: True}
+
+def test_exact_check_eliminates_what_the_bound_keeps():
+    # 16 can only catch 1 and 4 if both score nothing, but one of them takes at least 18 points
+    points = {1: 100,4: 100,16: 60}
+    assert bound_chances(points,[RACE,RACE],1)[16]
+    assert championship_chances(points,[RACE,RACE],1) == {1: True,4: True,16: False}
@@ -0,0 +1,42 @@
+import os
+import numpy as np
+import pytest
+from ressources.constants import CURRENT_SEASON
+from ressources.helper_functions import compare_results_H2H
+from ressources.columnar_store import COLUMNAR_TABLES, refresh_columnar_season, open_columnar_season, columnar_h2h, column_file
+from ressources.database_functions_sqlite3 import get_driver_by_carnumber_fromDB, get_quali_results_by_driver_fromDB, get_race_results_by_driver_fromDB
+
+def store_columns(folder:str) -> dict:
+    with open_columnar_season(CURRENT_SEASON,folder) as store:
+        return {(table,name): np.array(store.column(table,name)) for table, (columns, fetcher, converter) in COLUMNAR_TABLES.items() for name, dtype in columns}
+
+def test_columns_are_npy_files(season_connection,working_folder):
+    folder: str = os.path.join(working_folder,'columnar','')
+    for table, (columns, fetcher, converter) in COLUMNAR_TABLES.items():
+        for name, dtype in columns:
+            column: np.ndarray = np.load(column_file(folder,CURRENT_SEASON,table,name),mmap_mode='r')
+            assert isinstance(column,np.memmap) and column.dtype == dtype
+
+def test_incremental_refresh_matches_rebuild(season_connection,working_folder):
+    folder: str = os.path.join(working_folder,'columnar','')
+    assert refresh_columnar_season(season_connection,CURRENT_SEASON,folder) == 0
+    assert refresh_columnar_season(season_connection,CURRENT_SEASON,folder,from_round=3) > 0
+    rebuilt: str = os.path.join(working_folder,'rebuilt','')
+    refresh_columnar_season(season_connection,CURRENT_SEASON,rebuilt)
+    incremental: dict = store_columns(folder)
+    for key, values in store_columns(rebuilt).items():
+        np.testing.assert_array_equal(incremental[key],values)
+
+@pytest.mark.parametrize('session_family, get_results',[('Q',get_quali_results_by_driver_fromDB),('Race',get_race_results_by_driver_fromDB)])
+def test_columnar_h2h_matches_database(season_connection,working_folder,session_family,get_results):
+    with open_columnar_season(CURRENT_SEASON,os.path.join(working_folder,'columnar','')) as store:
+        for car_number1, car_number2 in [(4,81),(44,16),(1,22)]:
+            driver1 = get_driver_by_carnumber_fromDB(season_connection,car_number1,CURRENT_SEASON)
+            driver2 = get_driver_by_carnumber_fromDB(season_connection,car_number2,CURRENT_SEASON)
+            expected = compare_results_H2H(driver1,driver2,get_results(season_connection,car_number1,CURRENT_SEASON),get_results(season_connection,car_number2,CURRENT_SEASON))
+            head_to_head = columnar_h2h(store,driver1,driver2,session_family)
+            assert list(head_to_head.comparable_sessions.items()) == list(expected.comparable_sessions.items())
+            assert head_to_head.driver1_ahead == expected.driver1_ahead
+            assert head_to_head.driver2_ahead == expected.driver2_ahead
+            assert head_to_head.time_delta_count == expected.time_delta_count
+            assert head_to_head.time_delta_sum == pytest.approx(expected.time_delta_sum)
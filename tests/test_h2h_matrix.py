@@ -0,0 +1,27 @@
+import numpy as np
+import pytest
+from ressources.constants import CURRENT_SEASON
+from ressources.helper_functions import compare_results_H2H
+from ressources.main_functions import build_drivers_h2h_matrix
+from ressources.database_functions_sqlite3 import get_driver_by_carnumber_fromDB, get_quali_results_by_driver_fromDB, get_race_results_by_driver_fromDB
+
+@pytest.mark.parametrize('session_family, get_results',[('Q',get_quali_results_by_driver_fromDB),('Race',get_race_results_by_driver_fromDB)])
+def test_matrix_matches_pairwise_head_to_head(season_connection,session_family,get_results):
+    matrix = build_drivers_h2h_matrix(season_connection,session_family,CURRENT_SEASON)
+    mean_time_delta: np.ndarray = matrix.mean_time_delta()
+    assert (matrix.comparable_sessions == matrix.wins + matrix.wins.T).all()
+    assert not matrix.wins.diagonal().any()
+    results = {car_number: get_results(season_connection,car_number,CURRENT_SEASON) for car_number in matrix.car_numbers}
+    for i, car_number1 in enumerate(matrix.car_numbers):
+        driver1 = get_driver_by_carnumber_fromDB(season_connection,car_number1,CURRENT_SEASON)
+        for j, car_number2 in enumerate(matrix.car_numbers):
+            if i == j:
+                continue
+            driver2 = get_driver_by_carnumber_fromDB(season_connection,car_number2,CURRENT_SEASON)
+            head_to_head = compare_results_H2H(driver1,driver2,results[car_number1],results[car_number2])
+            assert matrix.wins[i,j] == sum(head_to_head.driver1_ahead.values())
+            assert matrix.comparable_sessions[i,j] == sum(head_to_head.comparable_sessions.values())
+            if head_to_head.time_delta_average is None:
+                assert np.isnan(mean_time_delta[i,j])
+            else:
+                assert mean_time_delta[i,j] == pytest.approx(head_to_head.time_delta_average)
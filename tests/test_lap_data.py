@@ -0,0 +1,20 @@
+import numpy as np
+import pytest
+from ressources.lap_data import rolling_averages, calculate_stint_pace
+
+def test_rolling_averages():
+    assert rolling_averages(np.array([90.0,91.0,92.0,93.0]),2) == pytest.approx([90.5,91.5,92.5])
+    assert rolling_averages(np.array([90.0,91.0,92.0]),3) == pytest.approx([91.0])
+    assert rolling_averages(np.array([90.0,91.0]),3) == []
+
+def test_stint_pace():
+    # Car 4: in-lap on lap 3, out-lap 4 and an untimed lap 6 left out of the second stint
+    laps = [(4,1,90.0,False),(4,2,91.0,False),(4,3,110.0,True),(4,4,112.0,False),(4,5,89.0,False),(4,6,None,False),(4,7,89.5,False),(4,8,90.5,False),(81,1,92.0,False)]
+    first, second, other = calculate_stint_pace(laps,2)
+    assert (first.car_number,first.stint,first.first_lap,first.last_lap,first.laps,first.pace_laps) == (4,1,1,3,3,2)
+    assert first.average == pytest.approx(90.5) and first.best_lap == 90.0
+    assert first.rolling_pace == pytest.approx([90.5]) and first.fade == pytest.approx(0.0)
+    assert (second.stint,second.first_lap,second.last_lap,second.pace_laps) == (2,4,8,3)
+    assert second.rolling_pace == pytest.approx([89.25,90.0])
+    assert second.best_window == pytest.approx(89.25) and second.fade == pytest.approx(0.75)
+    assert other.pace_laps == 1 and other.rolling_pace == [] and other.best_window is None
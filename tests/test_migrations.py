@@ -0,0 +1,56 @@
+import sqlite3
+import pytest
+from ressources.constants import CURRENT_SEASON
+from ressources.migrations import MIGRATIONS, SCHEMA_VERSION, apply_migrations, get_schema_version
+from ressources.db_connection import transaction
+
+# Schema of the Database before the first migration, as created by the first version of initialize_db
+BASELINE_SCHEMA: str = '''
+    CREATE TABLE Drivers (id INTEGER PRIMARY KEY, name TEXT, trigramme TEXT, car_number INTEGER UNIQUE, nationality TEXT);
+    CREATE TABLE Constructors (id INTEGER PRIMARY KEY, full_name TEXT, result_name TEXT, short_name TEXT, paddock_number INTEGER UNIQUE);
+    CREATE TABLE Rounds (id INTEGER PRIMARY KEY, round_name TEXT, country TEXT, circuit TEXT, round_date TEXT, round_type TEXT, round_finished BOOLEAN, round_number INTEGER UNIQUE);
+    CREATE TABLE Results (round_number INT, car_position TEXT, car_number INT, paddock_number INT, session_type TEXT, result_time TEXT, car_points INT, PRIMARY KEY (round_number,car_number,session_type));
+    CREATE TABLE ConstructorsRanking (round_number INT, paddock_number INT, constructor_position INT, constructor_points INT, championship_chance BOOLEAN, PRIMARY KEY (round_number, paddock_number));
+    CREATE TABLE DriversRanking (round_number INT, car_number INT, car_position INT, car_points INT, championship_chance BOOLEAN, PRIMARY KEY (round_number, car_number))
+'''
+
+# Race of round 1: two constructors of two cars
+BASELINE_RESULTS: list[tuple] = [
+    (1,'1',4,1,'Race','1:42:06.304',25),
+    (1,'2',81,1,'Race','+0.895',18),
+    (1,'3',1,2,'Race','+8.481',15),
+    (1,'DNF',22,2,'Race','DNF',0),
+]
+
+def create_baseline_db(filename:str,version:int) -> sqlite3.Connection:
+    '''Creates a Database with the baseline schema and a round of results, upgraded by the migrations up to version'''
+    sql_connection: sqlite3.Connection = sqlite3.connect(filename)
+    sql_connection.executescript(BASELINE_SCHEMA)
+    sql_connection.executemany('''INSERT INTO Results (round_number,car_position,car_number,paddock_number,session_type,result_time,car_points) VALUES (?,?,?,?,?,?,?)''',BASELINE_RESULTS)
+    sql_connection.commit()
+    for migration_version, description, migration in MIGRATIONS:
+        if migration_version > version:
+            break
+        with transaction(sql_connection) as sql_cursor:
+            migration(sql_connection)
+            sql_cursor.execute(f'''PRAGMA user_version = {migration_version}''')
+    return sql_connection
+
+@pytest.mark.parametrize('version',[0,6,7,8])
+def test_upgrade_to_schema_version(working_folder,version):
+    sql_connection: sqlite3.Connection = create_baseline_db(f'{working_folder}/stats-database.sqlite',version)
+    assert get_schema_version(sql_connection) == version
+    assert apply_migrations(sql_connection) == SCHEMA_VERSION
+    assert get_schema_version(sql_connection) == SCHEMA_VERSION
+    assert sql_connection.execute('''SELECT DISTINCT season FROM Results''').fetchall() == [(CURRENT_SEASON,)]
+    # One comparison per constructor, decided by the race
+    assert sql_connection.execute('''SELECT paddock_number, car_number, teammate_number, ahead FROM TeammateComparisons ORDER BY paddock_number''').fetchall() == [(1,4,81,4),(2,1,22,1)]
+    triggers: list[str] = [row[0] for row in sql_connection.execute('''SELECT name FROM sqlite_master WHERE type = 'trigger' ''')]
+    for table in ['Results','TeammateComparisons']:
+        assert {f'data_version_{table}_{event}' for event in ['insert','update','delete']} <= set(triggers)
+    assert not any(trigger.startswith('data_version_Laps_') for trigger in triggers)
+    sql_connection.close()
+
+def test_migrations_are_idempotent_on_a_new_database(seeded_connection):
+    assert get_schema_version(seeded_connection) == SCHEMA_VERSION
+    assert apply_migrations(seeded_connection) == SCHEMA_VERSION
@@ -0,0 +1,50 @@
+import pytest
+from ressources.constants import QUERY_BUDGETS, SESSION_FAMILIES, CURRENT_SEASON
+from ressources.instrumentation import query_budget, QueryBudgetExceeded
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.helper_functions import compare_results_H2H, calculate_h2h_matrix
+from ressources.database_functions_sqlite3 import get_last_round_fromDB, get_drivers_standings_fromDB, get_constructors_standings_fromDB, get_driver_by_carnumber_fromDB, get_race_results_by_driver_fromDB, get_all_drivers_trigramme_fromDB, get_results_by_session_types_fromDB
+from ressources.main_functions import calculate_championship_outlook, get_standings_history, refresh_teammate_comparisons, calculate_teammate_battles
+
+def test_query_budget_raises_over_budget(seeded_connection):
+    with query_budget(seeded_connection,2):
+        seeded_connection.execute('''SELECT 1''')
+        seeded_connection.execute('''SELECT 2''')
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(seeded_connection,1,label='two queries'):
+            seeded_connection.execute('''SELECT 1''')
+            seeded_connection.execute('''SELECT 2''')
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(seeded_connection,0,0,label='one write'):
+            seeded_connection.execute('''UPDATE Seasons SET total_races = total_races''')
+
+def test_standings_budgets(season_connection):
+    last_round: int = get_last_round_fromDB(season_connection,CURRENT_SEASON)
+    with query_budget(season_connection,QUERY_BUDGETS['drivers_standings'],label='drivers_standings'):
+        assert get_drivers_standings_fromDB(season_connection,last_round,CURRENT_SEASON)
+    with query_budget(season_connection,QUERY_BUDGETS['constructors_standings'],label='constructors_standings'):
+        assert get_constructors_standings_fromDB(season_connection,last_round,CURRENT_SEASON)
+    with query_budget(season_connection,QUERY_BUDGETS['championship_outlook'],label='championship_outlook'):
+        calculate_championship_outlook(season_connection,CURRENT_SEASON)
+    REFERENCE_CACHE.invalidate('DriversRanking')
+    with query_budget(season_connection,QUERY_BUDGETS['standings_history'],label='standings_history'):
+        history = get_standings_history(season_connection,'Drivers',CURRENT_SEASON)
+        for round_number in range(1,history.last_round+1):
+            history.standings_as_of(round_number)
+
+def test_teammate_budgets(season_connection):
+    with query_budget(season_connection,QUERY_BUDGETS['teammate_refresh'],label='teammate_refresh'):
+        refresh_teammate_comparisons(season_connection,1,CURRENT_SEASON)
+    with query_budget(season_connection,QUERY_BUDGETS['teammate_battles'],label='teammate_battles'):
+        assert calculate_teammate_battles(season_connection,CURRENT_SEASON)
+
+def test_head_to_head_budgets(season_connection):
+    with query_budget(season_connection,QUERY_BUDGETS['h2h_pair'],label='h2h_pair'):
+        driver1 = get_driver_by_carnumber_fromDB(season_connection,1,CURRENT_SEASON)
+        driver2 = get_driver_by_carnumber_fromDB(season_connection,22,CURRENT_SEASON)
+        compare_results_H2H(driver1,driver2,get_race_results_by_driver_fromDB(season_connection,1,CURRENT_SEASON),get_race_results_by_driver_fromDB(season_connection,22,CURRENT_SEASON))
+    for session_family, step in [('Q','h2h_matrix_q'),('Race','h2h_matrix_race')]:
+        REFERENCE_CACHE.clear()
+        with query_budget(season_connection,QUERY_BUDGETS[step],label=step):
+            trigrammes = get_all_drivers_trigramme_fromDB(season_connection,CURRENT_SEASON)
+            calculate_h2h_matrix(session_family,get_results_by_session_types_fromDB(season_connection,SESSION_FAMILIES[session_family],CURRENT_SEASON),sorted(trigrammes.keys()),trigrammes)
@@ -0,0 +1,11 @@
+import pytest
+from ressources.migrations import QUERY_PLAN_CHECKS, check_query_plans, get_query_plan_fromDB
+
+@pytest.mark.parametrize('access_pattern',list(QUERY_PLAN_CHECKS))
+def test_access_pattern_uses_covering_index(season_connection,access_pattern):
+    query, parameters, index = QUERY_PLAN_CHECKS[access_pattern]
+    query_plan: list[str] = get_query_plan_fromDB(season_connection,query,parameters)
+    assert any(f'COVERING INDEX {index}' in detail for detail in query_plan), query_plan
+
+def test_check_query_plans(seeded_connection):
+    assert check_query_plans(seeded_connection) == {access_pattern: True for access_pattern in QUERY_PLAN_CHECKS}
@@ -0,0 +1,74 @@
+import os
+import sqlite3
+from typing import Callable
+import pytest
+from conftest import SEED_PATHS, copy_results
+from ressources.constants import QUERY_BUDGETS, CURRENT_SEASON
+from ressources.classes.Profiler import PROFILER
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.instrumentation import install_trace, query_budget
+from ressources.db_connection import transaction
+from ressources.migrations import apply_migrations
+from ressources.database_functions_sqlite3 import initialize_db, get_last_round_fromDB, get_drivers_standings_fromDB, get_constructors_standings_fromDB
+from ressources.main_functions import seed_reference_data, import_season, recalculate_rankings_from_round, calculate_drivers_rankings, calculate_constructors_rankings
+
+def count_statements(sql_connection:sqlite3.Connection,function:Callable,*args) -> tuple[int,int]:
+    '''Returns the queries and writes executed on the connection by a call, with an empty reference data cache'''
+    REFERENCE_CACHE.clear()
+    counters = PROFILER.counters()
+    queries: int = counters.queries
+    writes: int = counters.writes
+    install_trace(sql_connection,True)
+    try:
+        function(*args)
+    finally:
+        install_trace(sql_connection)
+    return counters.queries - queries, counters.writes - writes
+
+def season_of_rounds(folder:str,rounds:list[int]) -> sqlite3.Connection:
+    '''Seeded in-memory Database with the results of some rounds of the repository imported, without the rankings of its last round'''
+    sql_connection: sqlite3.Connection = initialize_db(':memory:')
+    apply_migrations(sql_connection)
+    seed_reference_data(sql_connection,SEED_PATHS)
+    import_season(sql_connection,copy_results(os.path.join(folder,f'results-{len(rounds)}'),rounds),1,store_folder=os.path.join(folder,f'columnar-{len(rounds)}',''))
+    assert get_last_round_fromDB(sql_connection,CURRENT_SEASON) == max(rounds)
+    with transaction(sql_connection) as sql_cursor:
+        for table in ['DriversRanking','ConstructorsRanking']:
+            sql_cursor.execute(f'''DELETE FROM {table} WHERE season = ? AND round_number = ?''',(CURRENT_SEASON,max(rounds)))
+    return sql_connection
+
+@pytest.fixture
+def statements_by_season(working_folder) -> Callable[[list[int],Callable],tuple[int,int]]:
+    '''Counts the statements of a ranking calculation after the last round of a season of the given rounds'''
+    def count(rounds:list[int],calculation:Callable) -> tuple[int,int]:
+        sql_connection: sqlite3.Connection = season_of_rounds(working_folder,rounds)
+        try:
+            return count_statements(sql_connection,calculation,sql_connection,max(rounds))
+        finally:
+            sql_connection.close()
+    return count
+
+def test_recalculation_queries_do_not_depend_on_the_rounds(statements_by_season):
+    one_round: tuple[int,int] = statements_by_season([1],lambda sql_connection, last_round: recalculate_rankings_from_round(sql_connection,1,CURRENT_SEASON))
+    all_rounds: tuple[int,int] = statements_by_season([1,2,3,4,5],lambda sql_connection, last_round: recalculate_rankings_from_round(sql_connection,1,CURRENT_SEASON))
+    assert 0 < one_round[0] == all_rounds[0]
+    assert all_rounds[0] <= QUERY_BUDGETS['recalculate_rankings']
+
+@pytest.mark.parametrize('calculation',[calculate_drivers_rankings,calculate_constructors_rankings])
+def test_round_ranking_queries_do_not_depend_on_the_round(statements_by_season,calculation):
+    one_round: tuple[int,int] = statements_by_season([1],lambda sql_connection, last_round: calculation(sql_connection,last_round,CURRENT_SEASON))
+    all_rounds: tuple[int,int] = statements_by_season([1,2,3,4,5],lambda sql_connection, last_round: calculation(sql_connection,last_round,CURRENT_SEASON))
+    assert 0 < one_round[0] == all_rounds[0]
+
+def test_recalculation_budget(season_connection):
+    REFERENCE_CACHE.clear()
+    with query_budget(season_connection,QUERY_BUDGETS['recalculate_rankings'],label='recalculate_rankings'):
+        recalculate_rankings_from_round(season_connection,1,CURRENT_SEASON)
+
+@pytest.mark.parametrize('standings',[get_drivers_standings_fromDB,get_constructors_standings_fromDB])
+def test_standings_of_a_season_without_rules(season_connection,standings):
+    with transaction(season_connection) as sql_cursor:
+        sql_cursor.execute('''DELETE FROM Seasons WHERE season = ?''',(CURRENT_SEASON,))
+    REFERENCE_CACHE.clear()
+    with pytest.raises(ValueError,match=f'season {CURRENT_SEASON} has no rules in Seasons'):
+        standings(season_connection,1,CURRENT_SEASON)
@@ -0,0 +1,32 @@
+import os
+import shutil
+import sqlite3
+from conftest import RESULTS_FOLDER
+from ressources.constants import CURRENT_SEASON, RESULTS_FOLDER as RESULTS_FOLDER_PATH
+from ressources.main_functions import add_results
+
+def copy_result_file(filename:str) -> None:
+    '''Copies a result file of the repository where add_results reads it (RESULTS_FOLDER in the constants.py file)'''
+    if os.path.dirname(RESULTS_FOLDER_PATH):
+        os.makedirs(os.path.dirname(RESULTS_FOLDER_PATH),exist_ok=True)
+    shutil.copyfile(os.path.join(RESULTS_FOLDER,filename),RESULTS_FOLDER_PATH + filename)
+
+def stored_rows(sql_connection:sqlite3.Connection,table:str) -> list[tuple]:
+    return sql_connection.execute(f'''SELECT * FROM {table} WHERE season = ? ORDER BY 1, 2, 3, 4''',(CURRENT_SEASON,)).fetchall()
+
+def test_add_results(seeded_connection):
+    copy_result_file('ROUND 1 - Race.csv')
+    assert add_results('ROUND 1 - Race.csv',1,'Race',seeded_connection)
+    assert len(stored_rows(seeded_connection,'Results')) == 20
+    assert stored_rows(seeded_connection,'TeammateComparisons')
+
+def test_reimport_of_a_stored_session_is_refused(season_connection,caplog):
+    copy_result_file('ROUND 1 - Race.csv')
+    results: list[tuple] = stored_rows(season_connection,'Results')
+    comparisons: list[tuple] = stored_rows(season_connection,'TeammateComparisons')
+    # Rolled back and reported instead of raising to the menu
+    assert not add_results('ROUND 1 - Race.csv',1,'Race',season_connection)
+    assert 'already stored' in caplog.text
+    assert not season_connection.in_transaction
+    assert stored_rows(season_connection,'Results') == results
+    assert stored_rows(season_connection,'TeammateComparisons') == comparisons
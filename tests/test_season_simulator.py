@@ -0,0 +1,20 @@
+import pytest
+from ressources.season_simulator import simulate_seasons, simulate_title_chances
+
+RACE: list[int] = [25,18,15,12,10,8,6,4,2,1]
+
+def test_simulated_titles():
+    # Driver 0 clinched already, driver 1 far ahead of driver 2 in form for the team title
+    driver_titles, team_titles = simulate_seasons([0,1,2],[1.0,50.0,1.0],[0,1,1],[100,0,0],[0,0],[RACE],1000,(0,0))
+    assert driver_titles == [1000,0,0]
+    assert team_titles == [0,1000]
+    # Level on points and strengths: ties on points go to the lowest index
+    driver_titles, team_titles = simulate_seasons([0,1],[1.0,1.0],[0,1],[0,0],[0,0],[],10,(0,0))
+    assert driver_titles == [10,0] and team_titles == [10,0]
+
+def test_title_chances_do_not_depend_on_the_workers():
+    arguments = ([0,1,2],[2.0,1.5,1.0],[0,0,1],[40,30,35],[70,35],[RACE,RACE,RACE])
+    single = simulate_title_chances(*arguments,12000,seed=3,max_workers=1)
+    assert simulate_title_chances(*arguments,12000,seed=3,max_workers=2) == single
+    assert sum(single[0]) == pytest.approx(1.0) and sum(single[1]) == pytest.approx(1.0)
+    assert single[0][0] > single[0][2]
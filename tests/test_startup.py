@@ -0,0 +1,80 @@
+import os
+import time
+import logging
+import shutil
+import sqlite3
+import pytest
+from conftest import SEED_PATHS
+from ressources.constants import SEED_FILES, SEED_SNAPSHOT_FILE, DATABASE_FILE, STARTUP_BUDGETS_MS, CURRENT_SEASON
+from ressources.migrations import SCHEMA_VERSION, get_schema_version
+from ressources.classes.ReferenceDataCache import REFERENCE_CACHE
+from ressources.database_functions_sqlite3 import get_all_drivers_carnumber_fromDB
+from ressources.main_functions import check_and_initialize_db, build_seed_snapshot, is_seed_snapshot_fresh
+
+# Best of several starts, as measure_startup does
+STARTS: int = 3
+
+@pytest.fixture
+def seed_folder(working_folder) -> str:
+    '''The working folder with the seed files of the repository where the program looks for them (SEED_FILES in the constants.py file)'''
+    for kind, path in SEED_FILES.items():
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path),exist_ok=True)
+        shutil.copyfile(SEED_PATHS[kind],path)
+    return working_folder
+
+def remove_database() -> None:
+    for filename in [DATABASE_FILE,DATABASE_FILE + '-wal',DATABASE_FILE + '-shm']:
+        if os.path.isfile(filename):
+            os.remove(filename)
+
+def timed_start(snapshot:str) -> float:
+    '''Returns the milliseconds taken by check_and_initialize_db, then checks the Database it opened'''
+    REFERENCE_CACHE.clear()
+    start: float = time.perf_counter()
+    sql_connection: sqlite3.Connection = check_and_initialize_db(DATABASE_FILE,snapshot)
+    duration_ms: float = (time.perf_counter() - start)*1000
+    try:
+        assert get_schema_version(sql_connection) == SCHEMA_VERSION
+        assert get_all_drivers_carnumber_fromDB(sql_connection,CURRENT_SEASON)
+    finally:
+        sql_connection.close()
+    return duration_ms
+
+def start_case(case:str) -> None:
+    '''Prepares the working folder for a startup case of measure_startup: a fresh seed snapshot for cold_start_snapshot, an existing Database for warm_start, no Database for the cold starts'''
+    if case == 'cold_start_snapshot' and not os.path.isfile(SEED_SNAPSHOT_FILE):
+        build_seed_snapshot(SEED_SNAPSHOT_FILE,SEED_FILES)
+        assert is_seed_snapshot_fresh(SEED_SNAPSHOT_FILE)
+    if case == 'warm_start':
+        if not os.path.isfile(DATABASE_FILE):
+            timed_start(SEED_SNAPSHOT_FILE)
+    else:
+        remove_database()
+
+@pytest.mark.parametrize('case',['cold_start_csv','cold_start_snapshot','warm_start'])
+def test_startup(seed_folder,case,caplog):
+    caplog.set_level(logging.INFO,logger='ressources.main_functions')
+    start_case(case)
+    caplog.clear()
+    timed_start(SEED_SNAPSHOT_FILE)
+    # The snapshot is copied instead of seeding the Database from the seed files
+    assert ('Successfully copied the seed snapshot' in caplog.text) == (case == 'cold_start_snapshot')
+    assert ('Successfully initialized' in caplog.text) == (case == 'cold_start_csv')
+
+@pytest.mark.startup_budget
+@pytest.mark.parametrize('case',['cold_start_csv','cold_start_snapshot','warm_start'])
+def test_startup_within_budget(seed_folder,case):
+    durations: list[float] = []
+    for start in range(STARTS):
+        start_case(case)
+        durations.append(timed_start(SEED_SNAPSHOT_FILE))
+    assert min(durations) <= STARTUP_BUDGETS_MS[case], f'{case}: {min(durations):.0f} ms over the budget of {STARTUP_BUDGETS_MS[case]:.0f} ms'
+
+def test_stale_snapshot_is_ignored(seed_folder):
+    build_seed_snapshot(SEED_SNAPSHOT_FILE,SEED_FILES)
+    snapshot_time: float = os.path.getmtime(SEED_SNAPSHOT_FILE)
+    os.utime(SEED_FILES['drivers'],(snapshot_time + 1,snapshot_time + 1))
+    assert not is_seed_snapshot_fresh(SEED_SNAPSHOT_FILE)
+    remove_database()
+    timed_start(SEED_SNAPSHOT_FILE)